@@ -0,0 +1,196 @@
+"""
+Benchmark du pipeline d'import (préparation, marquage, chargement, basedoc) sur une base PostgreSQL/PostGIS locale.
+
+Un récolement synthétique est généré (voir generate_delivery.py), importé avec ImportPipeline
+exactement comme depuis le bouton "Insérer dans la base", puis les lignes importées sont supprimées.
+Le débit (entités/s) est calculé par étape, ainsi que le pic de mémoire résidente du processus.
+
+Le schéma cible doit contenir les tables des couches (pour les chargeurs COPY et le mode par étape)
+et la table basedoc. À lancer avec l'interpréteur Python de QGIS :
+
+    python bench_import.py --dbname dourbase_bench --schema recolement --layers 20 --features 5000 \
+        --pipeline qgis --loader copy --repeat 3 --json resultats.json
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import psycopg2
+from psycopg2 import sql
+from qgis.core import QgsApplication
+
+from generate_delivery import generate_delivery
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ('stamp', 'load', 'finalize', 'other')
+
+
+def import_plugin_module(name: str):
+    """Importe un module du plugin en tant que paquet (les modules de core/ utilisent des imports relatifs)."""
+    sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+    return importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.{name}")
+
+
+def peak_rss_mib() -> Optional[float]:
+    """Pic de mémoire résidente du processus, en Mio (None si la plateforme ne le fournit pas)."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en kio sous Linux, en octets sous macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def timed_pipeline_class(base):
+    """Sous-classe d'ImportPipeline qui mesure la durée de chaque étape."""
+
+    class TimedPipeline(base):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.timings = {stage: 0.0 for stage in STAGES}
+
+        def _timed(self, stage, method, *args):
+            start = time.perf_counter()
+            try:
+                return method(*args)
+            finally:
+                self.timings[stage] += time.perf_counter() - start
+
+        def stamp_layers(self, *args):
+            return self._timed('stamp', super().stamp_layers, *args)
+
+        def load_layers(self, *args):
+            return self._timed('load', super().load_layers, *args)
+
+        def run_columnar_import(self, *args):
+            # Le pipeline en colonnes marque et charge en une seule passe
+            return self._timed('load', super().run_columnar_import, *args)
+
+        def commit_staged_import(self, *args):
+            return self._timed('finalize', super().commit_staged_import, *args)
+
+    return TimedPipeline
+
+
+def cleanup(database: Dict[str, Any], id_source: str) -> None:
+    """Supprime les lignes importées par le benchmark dans toutes les tables du schéma ayant une colonne id_source."""
+    conn = psycopg2.connect(host=database["host"], port=database["port"], dbname=database["dbname"],
+                            user=database["user"], password=database["password"])
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT table_name FROM information_schema.columns WHERE table_schema = %s AND column_name = 'id_source'",
+                (database["schema"],)
+            )
+            for (table,) in cursor.fetchall():
+                cursor.execute(sql.SQL("DELETE FROM {}.{} WHERE id_source = %s").format(
+                    sql.Identifier(database["schema"]), sql.Identifier(table)), (id_source,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_once(modules, folder: str, database: Dict[str, Any], options: Dict[str, str], run_index: int) -> Dict[str, Any]:
+    id_source = f"BENCH_{int(time.time())}_{run_index}"
+    stamp_values = modules['stamping'].build_stamp_values(
+        id_source, "Benchmark", time.strftime("%Y-%m-%d"), "CLCL", "CLCL", id_source, "Benchmark")
+    basedoc_row = modules['basedoc'].build_basedoc_row(
+        id_source, "BENCH", "", "*", "", "", "Benchmark", "", "Benchmark", "Benchmark",
+        time.strftime("%Y-%m-%d"), "", "Non", "", "", id_source, "Non")
+    pipeline = timed_pipeline_class(modules['import_pipeline'].ImportPipeline)(
+        folder, database, options, stamp_values, basedoc_row, log=lambda message: None)
+    start = time.perf_counter()
+    try:
+        report = pipeline.run()
+    finally:
+        total = time.perf_counter() - start
+        cleanup(database, id_source)
+    timings = dict(pipeline.timings)
+    timings['other'] = max(0.0, total - sum(timings.values()))
+    features = sum(expected for _, expected in report.get('entities_per_layer', {}).values())
+    return {
+        'timings': timings,
+        'total_seconds': total,
+        'features': features,
+        'features_per_second': {stage: features / seconds for stage, seconds in timings.items() if seconds > 0},
+        'total_features_per_second': features / total if total > 0 else None,
+        # Détail du chronométrage du pipeline (voir core/timing.py) : {étape: {wall, cpu, count}}
+        'pipeline_stages': pipeline.timer.totals(),
+        'errors': report.get('shp_files_errors', 0),
+        'peak_rss_mib': peak_rss_mib(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline d'import DourBase.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", default="5432")
+    parser.add_argument("--dbname", required=True)
+    parser.add_argument("--user", default=os.environ.get("PGUSER", "postgres"))
+    parser.add_argument("--password", default=os.environ.get("PGPASSWORD", ""))
+    parser.add_argument("--schema", required=True)
+    parser.add_argument("--layers", type=int, default=None, help="Nombre de couches (défaut : toutes)")
+    parser.add_argument("--features", type=int, default=1000, help="Entités par couche")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pipeline", choices=("qgis", "columnar"), default="qgis")
+    parser.add_argument("--mode", choices=("direct", "staged"), default="direct")
+    parser.add_argument("--stamping", choices=("bulk", "edit_buffer", "ab"), default="bulk")
+    parser.add_argument("--loader", choices=("ogr2ogr", "gdal", "copy"), default="ogr2ogr")
+    parser.add_argument("--copy-format", choices=("binary", "text"), default="binary")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", help="Fichier de résultats JSON")
+    args = parser.parse_args()
+
+    qgs = QgsApplication([], False)
+    qgs.initQgis()
+    modules = {name: import_plugin_module(f"core.{name}") for name in ("import_pipeline", "stamping", "basedoc")}
+    database = {"host": args.host, "port": args.port, "dbname": args.dbname, "user": args.user,
+                "password": args.password, "schema": args.schema}
+    options = {"import_pipeline": args.pipeline, "import_mode": args.mode, "stamping_mode": args.stamping,
+               "loader_backend": args.loader, "copy_format": args.copy_format}
+
+    runs: List[Dict[str, Any]] = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="dourbase_bench_") as folder:
+            start = time.perf_counter()
+            generate_delivery(folder, args.layers, args.features, args.seed)
+            print(f"Récolement généré en {time.perf_counter() - start:.1f}s dans {folder}")
+            for index in range(args.repeat):
+                result = run_once(modules, folder, database, options, index)
+                runs.append(result)
+                rates = ", ".join(f"{stage} {rate:,.0f}/s" for stage, rate in result['features_per_second'].items())
+                print(f"[{index + 1}/{args.repeat}] {result['features']} entité(s) en {result['total_seconds']:.2f}s "
+                      f"({result['total_features_per_second'] or 0:,.0f}/s) - {rates} - "
+                      f"pic RSS {result['peak_rss_mib'] or 0:.0f} Mio - {result['errors']} erreur(s)")
+    finally:
+        qgs.exitQgis()
+
+    summary = {
+        'options': options,
+        'layers': args.layers,
+        'features_per_layer': args.features,
+        'median_total_seconds': statistics.median(r['total_seconds'] for r in runs) if runs else None,
+        'median_stage_seconds': {stage: statistics.median(r['timings'][stage] for r in runs) for stage in STAGES}
+        if runs else {},
+        'peak_rss_mib': max((r['peak_rss_mib'] or 0 for r in runs), default=None),
+        'runs': runs,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Résultats écrits dans {args.json}")
+
+
+if __name__ == "__main__":
+    main()
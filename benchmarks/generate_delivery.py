@@ -0,0 +1,194 @@
+"""
+Génère un récolement synthétique : une couche par entrée de config/shp_type.txt, M entités par couche.
+
+Les schémas attributaires et les types de géométrie sont repris des couches vides de SHPS/blank
+lorsqu'elles sont présentes ; à défaut, un schéma type AEP/EU (champs marqués par le plugin et
+attributs métier courants) est utilisé. Les coordonnées sont en EPSG:2154, autour de Lesneven.
+
+Utilisation :
+    python generate_delivery.py SORTIE --layers 50 --features 1000 [--seed 0]
+"""
+import argparse
+import logging
+import os
+import random
+from typing import Dict, List, Optional, Tuple
+
+from osgeo import ogr, osr
+
+logger = logging.getLogger('DourBase')
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHP_TYPE_FILE = os.path.join(PLUGIN_DIR, "config", "shp_type.txt")
+BLANK_DIR = os.path.join(PLUGIN_DIR, "SHPS", "blank")
+SRID = 2154
+# Emprise approximative de la Communauté Lesneven Côte des Légendes, en Lambert-93
+EXTENT = (140000.0, 6845000.0, 160000.0, 6862000.0)
+
+STAMPED_FIELDS = ('ID_SOURCE', 'AUTEUR', 'DATE_PLAN', 'MOA', 'EXPLOITANT', 'HYPERLIENS',
+                  'ND_AMONT', 'ND_AVAL', 'ID_CARG', 'ENTREPRISE')
+# (nom, type OGR, largeur, précision)
+BUSINESS_FIELDS = (
+    ('ID_OBJET', ogr.OFTString, 30, 0),
+    ('MATERIAU', ogr.OFTString, 20, 0),
+    ('DIAMETRE', ogr.OFTInteger, 5, 0),
+    ('ANNEE_POSE', ogr.OFTInteger, 4, 0),
+    ('PROFONDEUR', ogr.OFTReal, 6, 2),
+    ('Z_TN', ogr.OFTReal, 8, 3),
+    ('ETAT', ogr.OFTString, 20, 0),
+    ('COMMENTAIR', ogr.OFTString, 254, 0),
+)
+MATERIAUX = ('FONTE', 'PVC', 'PEHD', 'ACIER', 'BETON', 'GRES')
+ETATS = ('En service', 'Abandonné', 'Projet')
+
+
+def read_layer_names(path: str = SHP_TYPE_FILE) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def default_geometry_type(layer: str) -> int:
+    """Type de géométrie déduit du nom de la couche (réseaux et cotations linéaires, emprises surfaciques)."""
+    suffix = layer.upper().split('_', 1)[-1]
+    if suffix.endswith('EMPRISE') or suffix == 'PLAN_RECOL':
+        return ogr.wkbPolygon
+    if suffix in ('CANA', 'COTL', 'LHAB', 'LCOL', 'FLEC', 'THAB'):
+        return ogr.wkbLineString
+    return ogr.wkbPoint
+
+
+def layer_schema(layer: str) -> Tuple[int, List[ogr.FieldDefn]]:
+    """Type de géométrie et champs de la couche, repris de SHPS/blank si la couche vide existe."""
+    template = os.path.join(BLANK_DIR, f"{layer}.shp")
+    if os.path.isfile(template):
+        ds = ogr.Open(template)
+        if ds is not None:
+            defn = ds.GetLayer(0).GetLayerDefn()
+            fields = []
+            for i in range(defn.GetFieldCount()):
+                source = defn.GetFieldDefn(i)
+                field = ogr.FieldDefn(source.GetName(), source.GetType())
+                field.SetWidth(source.GetWidth())
+                field.SetPrecision(source.GetPrecision())
+                fields.append(field)
+            return defn.GetGeomType(), fields
+    fields = []
+    for name in STAMPED_FIELDS:
+        field = ogr.FieldDefn(name, ogr.OFTString)
+        field.SetWidth(100)
+        fields.append(field)
+    for name, field_type, width, precision in BUSINESS_FIELDS:
+        field = ogr.FieldDefn(name, field_type)
+        field.SetWidth(width)
+        field.SetPrecision(precision)
+        fields.append(field)
+    return default_geometry_type(layer), fields
+
+
+def random_geometry(geom_type: int, rng: random.Random) -> ogr.Geometry:
+    x = rng.uniform(EXTENT[0], EXTENT[2])
+    y = rng.uniform(EXTENT[1], EXTENT[3])
+    flat = ogr.GT_Flatten(geom_type)
+    if flat in (ogr.wkbLineString, ogr.wkbMultiLineString):
+        # Tronçon de canalisation de 5 à 120 m, en 2 à 6 sommets
+        line = ogr.Geometry(ogr.wkbLineString)
+        line.AddPoint_2D(x, y)
+        for _ in range(rng.randint(1, 5)):
+            x += rng.uniform(-25.0, 25.0)
+            y += rng.uniform(-25.0, 25.0)
+            line.AddPoint_2D(x, y)
+        return line
+    if flat in (ogr.wkbPolygon, ogr.wkbMultiPolygon):
+        width, height = rng.uniform(2.0, 30.0), rng.uniform(2.0, 30.0)
+        ring = ogr.Geometry(ogr.wkbLinearRing)
+        for px, py in ((x, y), (x + width, y), (x + width, y + height), (x, y + height), (x, y)):
+            ring.AddPoint_2D(px, py)
+        polygon = ogr.Geometry(ogr.wkbPolygon)
+        polygon.AddGeometry(ring)
+        return polygon
+    point = ogr.Geometry(ogr.wkbPoint)
+    point.AddPoint_2D(x, y)
+    return point
+
+
+def random_value(field: ogr.FieldDefn, rng: random.Random):
+    name = field.GetName().upper()
+    if name in STAMPED_FIELDS:
+        # Valeurs écrasées par le marquage : on laisse des données à remplacer
+        return "A_REMPLACER"
+    field_type = field.GetType()
+    if field_type == ogr.OFTInteger or field_type == ogr.OFTInteger64:
+        return rng.randint(1950, 2024) if 'ANNEE' in name else rng.choice((40, 60, 80, 100, 125, 150, 200, 300))
+    if field_type == ogr.OFTReal:
+        return round(rng.uniform(0.5, 60.0), 2)
+    if field_type == ogr.OFTDate:
+        return f"{rng.randint(1990, 2024)}/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}"
+    width = field.GetWidth() or 80
+    if name == 'MATERIAU':
+        return rng.choice(MATERIAUX)
+    if name == 'ETAT':
+        return rng.choice(ETATS)
+    return f"{name.lower()}_{rng.randint(0, 10 ** 6)}"[:width]
+
+
+def write_layer(output_dir: str, layer: str, features: int, rng: random.Random) -> str:
+    path = os.path.join(output_dir, f"{layer}.shp")
+    geom_type, fields = layer_schema(layer)
+    driver = ogr.GetDriverByName('ESRI Shapefile')
+    if os.path.exists(path):
+        driver.DeleteDataSource(path)
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(SRID)
+    ds = driver.CreateDataSource(path)
+    ogr_layer = ds.CreateLayer(layer, srs, geom_type, options=['ENCODING=UTF-8'])
+    for field in fields:
+        ogr_layer.CreateField(field)
+    defn = ogr_layer.GetLayerDefn()
+    ogr_layer.StartTransaction()
+    for _ in range(features):
+        feature = ogr.Feature(defn)
+        for i, field in enumerate(fields):
+            feature.SetField(i, random_value(field, rng))
+        feature.SetGeometry(random_geometry(geom_type, rng))
+        ogr_layer.CreateFeature(feature)
+    ogr_layer.CommitTransaction()
+    ds = None
+    return path
+
+
+def generate_delivery(output_dir: str, layers: Optional[int] = None, features: int = 1000,
+                      seed: int = 0) -> Dict[str, str]:
+    """
+    Écrit un récolement synthétique dans output_dir.
+
+    Args:
+        layers (int): Nombre de couches (les premières de shp_type.txt ; toutes si None)
+        features (int): Nombre d'entités par couche
+        seed (int): Graine du générateur, pour des jeux de données reproductibles
+
+    Returns:
+        Dict[str, str]: Chemin du .shp par couche
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    names = read_layer_names()
+    if layers is not None:
+        names = names[:layers]
+    rng = random.Random(seed)
+    written = {name: write_layer(output_dir, name, features, rng) for name in names}
+    logger.info(f"[benchmarks] [generate_delivery] {len(written)} couche(s) de {features} entité(s) dans {output_dir}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère un récolement synthétique pour les benchmarks d'import.")
+    parser.add_argument("output_dir")
+    parser.add_argument("--layers", type=int, default=None, help="Nombre de couches (défaut : toutes)")
+    parser.add_argument("--features", type=int, default=1000, help="Entités par couche")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    written = generate_delivery(args.output_dir, args.layers, args.features, args.seed)
+    print(f"{len(written)} couche(s) écrite(s) dans {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Import DourBase en ligne de commande, sans interface (serveur de traitement, tâche planifiée).
+
+À lancer avec l'interpréteur Python de QGIS, depuis le dossier des extensions qui contient le dossier DourBase
+(par exemple ~/.local/share/QGIS/QGIS3/profiles/default/python/plugins) :
+
+    python -m DourBase import DOSSIER --connection NOM --schema SCHEMA --depco 29019 --num-source 7 --aep ...
+    python -m DourBase batch MANIFESTE.csv --connection NOM --schema SCHEMA --workers 4
+
+Le mot de passe est lu dans DOURBASE_PASSWORD, puis PGPASSWORD, puis dans la connexion QGIS enregistrée.
+Codes de retour : 0 succès, 1 échec de l'import, 2 entrées invalides.
+"""
+import argparse
+import getpass
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, List, NoReturn, Optional
+
+logger = logging.getLogger('DourBase')
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INVALID = 2
+
+
+def start_qgis():
+    """Initialise QGIS sans interface, avec les paramètres du profil QGIS de l'utilisateur."""
+    from qgis.PyQt.QtCore import QCoreApplication
+    from qgis.core import QgsApplication
+
+    QCoreApplication.setOrganizationName("QGIS")
+    QCoreApplication.setApplicationName("QGIS3")
+    app = QgsApplication([], False)
+    app.initQgis()
+    return app
+
+
+def invalid_input(message: str) -> NoReturn:
+    """Signale une entrée invalide et termine avec le code EXIT_INVALID."""
+    print(f"[ERROR] {message}", file=sys.stderr)
+    raise SystemExit(EXIT_INVALID)
+
+
+def database_params(args) -> Dict[str, str]:
+    from .core.service import saved_connection_params
+
+    params = saved_connection_params(args.connection) if args.connection else {}
+    for key in ("host", "port", "dbname", "user", "schema"):
+        if getattr(args, key):
+            params[key] = getattr(args, key)
+    params["password"] = (os.environ.get("DOURBASE_PASSWORD") or os.environ.get("PGPASSWORD")
+                          or params.get("password") or "")
+    if not params["password"] and sys.stdin.isatty():
+        params["password"] = getpass.getpass(f"Mot de passe PostgreSQL de {params.get('user', '')} : ")
+    missing = [key for key in ("host", "dbname", "user", "password", "schema") if not params.get(key)]
+    if missing:
+        invalid_input(f"Paramètre(s) de connexion manquant(s) : {', '.join(missing)}")
+    params.setdefault("port", "5432")
+    return params
+
+
+def import_options(args) -> Dict[str, str]:
+    """Options lues dans les paramètres du plugin, remplacées par les --option nom=valeur."""
+    from .core.import_pipeline import IMPORT_OPTION_DEFAULTS, import_options_from_settings
+
+    options = import_options_from_settings()
+    for item in args.option or []:
+        name, _, value = item.partition("=")
+        if name not in IMPORT_OPTION_DEFAULTS:
+            invalid_input(f"Option inconnue : {name} (options : {', '.join(IMPORT_OPTION_DEFAULTS)})")
+        options[name] = value
+    return options
+
+
+def write_report(path: Optional[str], report: Dict[str, Any]) -> None:
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        print(f"[INFO] Compte rendu écrit dans {path}")
+
+
+def print_problems(problems: List[str]) -> None:
+    for problem in problems:
+        print(f"[ERROR] {problem}", file=sys.stderr)
+    print(f"[ERROR] {len(problems)} problème(s), aucun import n'a été lancé.", file=sys.stderr)
+
+
+def print_connection_error(error: Exception) -> None:
+    """Erreur de la vérification des id_source dans basedoc (connexion refusée, serveur injoignable, schéma sans basedoc)."""
+    logger.error(f"[cli] [print_connection_error] {error}")
+    print(f"[ERROR] Impossible de vérifier les id_source dans basedoc : {error}", file=sys.stderr)
+
+
+def command_import(args) -> int:
+    import psycopg2
+
+    from .core.batch import validate_batch
+    from .core.planner import record_throughput
+    from .core.service import ImportService
+    from .core.timing import StageTimer, format_timings
+
+    row = {name: str(getattr(args, name) or "") for name in
+           ("depco", "num_source", "date_plan", "entreprise", "etat", "q_support", "moa", "exploitant",
+            "localisat", "type_plan", "b_etude", "echelle", "no_origine", "nom_fichier")}
+    row.update(folder=os.path.abspath(args.folder), aep="oui" if args.aep else "", eu="oui" if args.eu else "",
+               epl="oui" if args.epl else "", cote="non" if args.no_cote else "oui",
+               utilisat="oui" if args.utilisat else "")
+    database = database_params(args)
+    try:
+        entries, problems = validate_batch([row], database, allow_existing=args.allow_existing)
+    except (psycopg2.Error, OSError) as e:
+        print_connection_error(e)
+        return EXIT_INVALID
+    if problems:
+        print_problems(problems)
+        return EXIT_INVALID
+
+    entry = entries[0]
+    options = import_options(args)
+    timer = StageTimer()
+    service = ImportService(database, options, log=print)
+    try:
+        report = service.create_pipeline(entry.folder, entry.stamp_values, entry.basedoc_row,
+                                         snapshot=entry.snapshot, timer=timer).run()
+    except Exception as e:
+        logger.exception(f"[cli] [command_import] {e}")
+        print(f"[ERROR] Erreur lors de l'insertion : {e}", file=sys.stderr)
+        return EXIT_FAILED
+    if report.get("elapsed_seconds"):
+        record_throughput(report.get("source_bytes", 0), report["elapsed_seconds"],
+                          options.get("import_pipeline") or "qgis", options.get("loader_backend") or "ogr2ogr")
+    print(f"[INFO] {entry.id_source} importé : {report['shp_files_processed']} couche(s) traitée(s), "
+          f"{report['shp_files_errors']} en erreur, {report['shp_files_ignored']} ignorée(s)")
+    print(format_timings(report.get("timings", []), detailed=args.verbose))
+    write_report(args.report, report)
+    return EXIT_FAILED if report["shp_files_errors"] else EXIT_OK
+
+
+def command_batch(args) -> int:
+    import psycopg2
+
+    from .core.batch import BatchError, BatchImport, format_batch_report, read_batch_manifest, validate_batch
+
+    database = database_params(args)
+    try:
+        entries, problems = validate_batch(read_batch_manifest(args.manifest), database,
+                                           allow_existing=args.allow_existing)
+    except BatchError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return EXIT_INVALID
+    except (psycopg2.Error, OSError) as e:
+        print_connection_error(e)
+        return EXIT_INVALID
+    if problems:
+        print_problems(problems)
+        return EXIT_INVALID
+    report = BatchImport(entries, database, import_options(args), args.workers, log=print).run()
+    print(format_batch_report(report))
+    write_report(args.report, report)
+    return EXIT_FAILED if report["failed"] else EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from .core.batch import DEFAULT_BATCH_WORKERS
+
+    common = argparse.ArgumentParser(add_help=False)
+    connection = common.add_argument_group("connexion")
+    connection.add_argument("--connection", help="Connexion PostgreSQL enregistrée dans QGIS")
+    connection.add_argument("--host")
+    connection.add_argument("--port")
+    connection.add_argument("--dbname")
+    connection.add_argument("--user")
+    connection.add_argument("--schema", help="Schéma cible")
+    common.add_argument("--option", action="append", metavar="NOM=VALEUR",
+                        help="Remplace une option d'import (import_mode=staged, loader_backend=copy...)")
+    common.add_argument("--allow-existing", action="store_true",
+                        help="Importe même si l'id_source existe déjà dans basedoc")
+    common.add_argument("--report", metavar="FICHIER", help="Écrit le compte rendu au format JSON")
+    common.add_argument("--verbose", "-v", action="store_true", help="Journal détaillé et durées par couche")
+
+    parser = argparse.ArgumentParser(prog="python -m DourBase", description="Import DourBase sans interface")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    single = commands.add_parser("import", parents=[common], help="Importe un dossier de récolement")
+    single.add_argument("folder", help="Dossier des shapefiles")
+    single.add_argument("--depco", required=True, help="Code INSEE ou libellé (DEPCO.csv)")
+    single.add_argument("--num-source", dest="num_source", required=True)
+    single.add_argument("--aep", action="store_true")
+    single.add_argument("--eu", action="store_true")
+    single.add_argument("--epl", action="store_true")
+    single.add_argument("--date-plan", dest="date_plan", required=True, help="AAAA-MM-JJ")
+    single.add_argument("--entreprise", required=True, help="Code ou libellé (ENTREPRISE.csv)")
+    single.add_argument("--etat", required=True, help="Libellé ou code (ETAT.csv)")
+    single.add_argument("--q-support", dest="q_support", required=True, help="Libellé ou code (Q_SUPPORT.csv)")
+    single.add_argument("--moa", required=True, help="Code ou libellé (MOA.csv)")
+    single.add_argument("--exploitant", required=True, help="Code ou libellé (EXPLOITANT.csv)")
+    single.add_argument("--localisat")
+    single.add_argument("--type-plan", dest="type_plan")
+    single.add_argument("--b-etude", dest="b_etude", help="Bureau d'étude (aussi écrit comme auteur)")
+    single.add_argument("--echelle")
+    single.add_argument("--no-origine", dest="no_origine")
+    single.add_argument("--nom-fichier", dest="nom_fichier", help="Nom du plan (généré par défaut)")
+    single.add_argument("--no-cote", action="store_true", help="Plan non coté")
+    single.add_argument("--utilisat", action="store_true", help="Plan utilisé pour la numérisation")
+    single.set_defaults(handler=command_import)
+
+    batch = commands.add_parser("batch", parents=[common], help="Importe les dossiers d'un manifeste CSV ou JSON")
+    batch.add_argument("manifest", help="Manifeste du lot (voir core/batch.py pour les colonnes)")
+    batch.add_argument("--workers", type=int, default=DEFAULT_BATCH_WORKERS, help="Imports simultanés")
+    batch.set_defaults(handler=command_batch)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    app = start_qgis()
+    try:
+        return args.handler(args)
+    finally:
+        from .core.pg_pool import shutdown_pool
+
+        shutdown_pool()
+        app.exitQgis()
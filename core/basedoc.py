@@ -0,0 +1,53 @@
+import logging
+from typing import Any, Dict
+
+from psycopg2 import sql
+
+logger = logging.getLogger('DourBase')
+
+# Colonnes de la table basedoc renseignées à chaque import, dans l'ordre historique de run_sql
+BASEDOC_COLUMNS = (
+    'id_source',
+    'depco',
+    'no_origine',
+    'aep',
+    'eu',
+    'epl',
+    'localisat',
+    'type_plan',
+    'b_etude',
+    'entreprise',
+    'date',
+    'echelle',
+    'cote',
+    'etat',
+    'q_support',
+    'nom_fich',
+    'utilisat',
+)
+
+
+def build_basedoc_row(id_source, depco, no_origine, aep, eu, epl, localisat, type_plan, b_etude, entreprise,
+                      date_str, echelle, cote, etat, q_support, nom_fichier, utilisat) -> Dict[str, str]:
+    """
+    Construit la ligne basedoc d'un import.
+
+    Toutes les valeurs sont envoyées sous forme de texte, comme dans l'ancienne requête,
+    et laissées à PostgreSQL pour la conversion vers le type des colonnes.
+    Les valeurs ne doivent pas être échappées : la requête est paramétrée.
+    """
+    values = (id_source, depco, no_origine, aep, eu, epl, localisat, type_plan, b_etude, entreprise,
+              date_str, echelle, cote, etat, q_support, nom_fichier, utilisat)
+    return {column: str(value) for column, value in zip(BASEDOC_COLUMNS, values)}
+
+
+def insert_basedoc(cursor, schema: str, row: Dict[str, Any], table: str = 'basedoc') -> None:
+    """Insère la ligne basedoc dans schema.table (sans valider la transaction)."""
+    query = sql.SQL("INSERT INTO {}.{} ({}) VALUES ({})").format(
+        sql.Identifier(schema),
+        sql.Identifier(table),
+        sql.SQL(', ').join(sql.Identifier(column) for column in row),
+        sql.SQL(', ').join(sql.Placeholder() for _ in row)
+    )
+    logger.info(f"[basedoc] [insert_basedoc] Insertion dans {schema}.{table} : {row}")
+    cursor.execute(query, list(row.values()))
@@ -0,0 +1,365 @@
+import csv
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from psycopg2 import sql
+from qgis.PyQt.QtCore import pyqtSignal
+from qgis.core import QgsTask
+
+from .folder_snapshot import FolderSnapshot
+from .import_pipeline import ImportCancelled
+from .pg_pool import get_pool
+from .service import ImportService, build_import_values
+from ..utils import check_shapefile_completeness, open_config
+
+logger = logging.getLogger('DourBase')
+
+DEFAULT_BATCH_WORKERS = 2
+TRUE_VALUES = ("1", "true", "yes", "on", "oui", "o", "x", "*")
+
+# Colonnes d'une entrée du manifeste de lot (en-tête du CSV, clés du JSON).
+# Les codes (depco, entreprise, moa, exploitant) et les libellés (etat, q_support) sont ceux des fichiers de config ;
+# etat et q_support acceptent aussi leur code.
+BATCH_FIELDS = ('folder', 'depco', 'num_source', 'aep', 'eu', 'epl', 'cote', 'utilisat', 'localisat', 'date_plan',
+                'type_plan', 'b_etude', 'entreprise', 'echelle', 'etat', 'q_support', 'moa', 'exploitant',
+                'no_origine', 'nom_fichier')
+REQUIRED_FIELDS = ('folder', 'depco', 'num_source', 'date_plan', 'entreprise', 'etat', 'q_support', 'moa',
+                   'exploitant')
+
+# Entrée validée : line (numéro dans le manifeste), folder, id_source, stamp_values, basedoc_row, snapshot
+BatchEntry = namedtuple('BatchEntry', ['line', 'folder', 'id_source', 'stamp_values', 'basedoc_row', 'snapshot'])
+
+
+class BatchError(Exception):
+    """Exception levée lorsque le manifeste d'un lot est illisible ou contient des entrées invalides."""
+    pass
+
+
+def read_batch_manifest(path: str) -> List[Dict[str, str]]:
+    """
+    Lit un manifeste de lot : CSV (séparateur ';', avec en-tête) ou JSON (liste d'objets, ou {"entries": [...]}).
+    Les dossiers relatifs sont résolus par rapport au dossier du manifeste.
+
+    Raises:
+        BatchError: Si le fichier est illisible
+    """
+    try:
+        if path.lower().endswith('.json'):
+            with open(path, 'r', encoding='utf-8-sig') as f:
+                data = json.load(f)
+            rows = data.get('entries', []) if isinstance(data, dict) else data
+        else:
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                rows = list(csv.DictReader(f, delimiter=';'))
+    except (OSError, ValueError, csv.Error) as e:
+        raise BatchError(f"Manifeste de lot illisible ({path}) : {e}")
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise BatchError(f"Manifeste de lot invalide ({path}) : liste d'entrées attendue")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    entries = []
+    for row in rows:
+        entry = {str(key).strip().lower(): "" if value is None else str(value).strip()
+                 for key, value in row.items() if key is not None}
+        unknown = sorted(set(entry) - set(BATCH_FIELDS))
+        if unknown:
+            logger.warning(f"[batch] [read_batch_manifest] Colonne(s) ignorée(s) : {', '.join(unknown)}")
+        if entry.get('folder'):
+            entry['folder'] = os.path.normpath(os.path.join(base_dir, os.path.expanduser(entry['folder'])))
+        entries.append(entry)
+    logger.info(f"[batch] [read_batch_manifest] {len(entries)} entrée(s) lue(s) dans {path}")
+    return entries
+
+
+def is_checked(value: str) -> bool:
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def load_config_values() -> Dict[str, List[Tuple[str, int]]]:
+    """Valeurs autorisées, lues dans les fichiers de config comme pour les listes du formulaire."""
+    return {name: open_config(f"{name.upper()}.csv", "config")
+            for name in ('depco', 'entreprise', 'etat', 'q_support', 'moa', 'exploitant')}
+
+
+def resolve_code(options: List[Tuple[str, int]], value: str) -> Optional[int]:
+    """Code d'une valeur de config, donnée par son code ou son libellé (insensible à la casse)."""
+    for label, code in options:
+        if value == str(code) or value.lower() == str(label).lower():
+            return code
+    return None
+
+
+def resolve_label(options: List[Tuple[str, int]], value: str) -> Optional[str]:
+    """Libellé d'une valeur de config, donnée par son libellé ou son code."""
+    for label, code in options:
+        if value.lower() == str(label).lower() or value == str(code):
+            return label
+    return None
+
+
+def build_entry(row: Dict[str, str], line: int, config: Dict[str, List[Tuple[str, int]]]) -> Tuple[Optional[BatchEntry], List[str]]:
+    """
+    Valide une entrée du manifeste et calcule ses valeurs d'import, comme run_sql pour le formulaire.
+
+    Returns:
+        Tuple: (entrée, None si invalide ; problèmes détectés)
+    """
+    problems = [f"champ '{name}' manquant" for name in REQUIRED_FIELDS if not row.get(name)]
+    if problems:
+        return None, problems
+
+    folder = row['folder']
+    snapshot = None
+    if not os.path.isdir(folder):
+        problems.append(f"dossier introuvable : {folder}")
+    else:
+        snapshot = FolderSnapshot(folder)
+        try:
+            if not check_shapefile_completeness(folder, snapshot):
+                problems.append(f"aucun shapefile dans {folder}")
+        except FileNotFoundError as e:
+            problems.append(str(e))
+
+    depco = resolve_code(config['depco'], row['depco'])
+    entreprise = resolve_code(config['entreprise'], row['entreprise'])
+    moa = resolve_code(config['moa'], row['moa'])
+    exploitant = resolve_code(config['exploitant'], row['exploitant'])
+    etat = resolve_label(config['etat'], row['etat'])
+    q_support = resolve_label(config['q_support'], row['q_support'])
+    for name, value in (('depco', depco), ('entreprise', entreprise), ('moa', moa), ('exploitant', exploitant),
+                        ('etat', etat), ('q_support', q_support)):
+        if value is None:
+            problems.append(f"{name} '{row[name]}' absent de {name.upper()}.csv")
+
+    try:
+        num_source = f"{int(row['num_source']):03d}"
+    except ValueError:
+        problems.append(f"num_source '{row['num_source']}' n'est pas un nombre")
+        num_source = None
+    try:
+        date_str = datetime.strptime(row['date_plan'], "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        problems.append(f"date_plan '{row['date_plan']}' invalide (format attendu : AAAA-MM-JJ)")
+        date_str = None
+
+    aep, eu, epl = (is_checked(row.get(name, "")) for name in ('aep', 'eu', 'epl'))
+    if not (aep or eu or epl):
+        problems.append("au moins un réseau (aep, eu, epl) doit être coché")
+    if problems:
+        return None, problems
+
+    id_source, stamp_values, basedoc_row = build_import_values(
+        depco=depco,
+        num_source=num_source,
+        aep=aep,
+        eu=eu,
+        epl=epl,
+        date_str=date_str,
+        entreprise=entreprise,
+        etat=etat,
+        q_support=q_support,
+        moa=moa,
+        exploitant=exploitant,
+        cote=is_checked(row.get('cote', 'oui')),
+        utilisat=is_checked(row.get('utilisat', '')),
+        localisat=row.get('localisat', ''),
+        type_plan=row.get('type_plan', ''),
+        b_etude=row.get('b_etude', ''),
+        echelle=row.get('echelle', ''),
+        no_origine=row.get('no_origine', ''),
+        nom_fichier=row.get('nom_fichier')
+    )
+    return BatchEntry(line, folder, id_source, stamp_values, basedoc_row, snapshot), []
+
+
+def existing_sources(database: Dict[str, Any], id_sources: List[str]) -> set:
+    """id_source déjà présents dans la table basedoc du schéma cible, en une seule requête."""
+    with get_pool().connection(database["host"], database["port"], database["dbname"],
+                               database["user"], database["password"]) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("SELECT id_source FROM {}.basedoc WHERE id_source = ANY(%s)").format(
+                sql.Identifier(database["schema"])), (list(id_sources),))
+            found = {row[0] for row in cursor.fetchall()}
+        conn.rollback()
+    return found
+
+
+def validate_batch(rows: List[Dict[str, str]], database: Optional[Dict[str, Any]] = None,
+                   allow_existing: bool = False) -> Tuple[List[BatchEntry], List[str]]:
+    """
+    Valide toutes les entrées avant le premier import : dossiers complets, valeurs présentes dans les
+    fichiers de config, id_source uniques dans le lot et, avec database, absents de basedoc.
+
+    Returns:
+        Tuple: (entrées valides ; problèmes, préfixés par le numéro de l'entrée)
+    """
+    config = load_config_values()
+    entries: List[BatchEntry] = []
+    problems: List[str] = []
+    seen: Dict[str, int] = {}
+    for line, row in enumerate(rows, 1):
+        entry, entry_problems = build_entry(row, line, config)
+        problems.extend(f"Entrée {line} : {problem}" for problem in entry_problems)
+        if entry is None:
+            continue
+        if entry.id_source in seen:
+            problems.append(f"Entrée {line} : id_source {entry.id_source} déjà utilisé par l'entrée {seen[entry.id_source]}")
+            continue
+        seen[entry.id_source] = line
+        entries.append(entry)
+
+    if database is not None and entries and not allow_existing:
+        existing = existing_sources(database, [entry.id_source for entry in entries])
+        for entry in entries:
+            if entry.id_source in existing:
+                problems.append(f"Entrée {entry.line} : id_source {entry.id_source} existe déjà dans basedoc")
+    logger.info(f"[batch] [validate_batch] {len(entries)} entrée(s) valide(s), {len(problems)} problème(s)")
+    return entries, problems
+
+
+class BatchImport:
+    """
+    Import d'un lot de dossiers, avec un nombre limité d'imports simultanés.
+
+    Chaque entrée est importée par son propre ImportPipeline (espace de travail propre à l'id_source) ;
+    les connexions sont partagées par le pool du plugin. L'échec d'une entrée n'arrête pas le lot.
+
+    Args:
+        entries (List[BatchEntry]): Entrées retournées par validate_batch
+        database (Dict): Paramètres de connexion (host, port, dbname, user, password, schema)
+        options (Dict[str, str]): Options de ImportPipeline, communes à tout le lot
+        max_workers (int): Nombre maximal d'imports simultanés
+        log (Callable[[str], None]): Reçoit les messages, préfixés par l'id_source
+        progress (Callable[[float], None]): Reçoit l'avancement du lot, de 0 à 100
+        is_cancelled (Callable[[], bool]): Retourne True si le lot doit s'arrêter
+    """
+
+    def __init__(self, entries: List[BatchEntry], database: Dict[str, Any], options: Dict[str, str],
+                 max_workers: int = DEFAULT_BATCH_WORKERS, log: Optional[Callable[[str], None]] = None,
+                 progress: Optional[Callable[[float], None]] = None,
+                 is_cancelled: Optional[Callable[[], bool]] = None):
+        self.entries = entries
+        self.database = database
+        self.options = options
+        self.max_workers = max(1, int(max_workers))
+        self._log = log
+        self._progress = progress
+        self._is_cancelled = is_cancelled
+        self._done = 0
+        self._lock = threading.Lock()
+        self.report: Dict[str, Any] = {"entries": [], "succeeded": 0, "failed": 0, "cancelled": 0}
+
+    def log(self, message: str) -> None:
+        if self._log is not None:
+            self._log(message)
+        else:
+            logger.info(f"[batch] {message}")
+
+    def cancelled(self) -> bool:
+        return self._is_cancelled is not None and self._is_cancelled()
+
+    def import_entry(self, entry: BatchEntry) -> Dict[str, Any]:
+        result = {"line": entry.line, "id_source": entry.id_source, "folder": entry.folder,
+                  "status": "annulé", "error": None, "report": None}
+        if self.cancelled():
+            return result
+        service = ImportService(self.database, self.options, log=lambda message: self.log(f"[{entry.id_source}] {message}"))
+        pipeline = service.create_pipeline(entry.folder, entry.stamp_values, entry.basedoc_row, snapshot=entry.snapshot,
+                                           is_cancelled=self._is_cancelled)
+        try:
+            self.log(f"[{entry.id_source}] [INFO] Début de l'import de {entry.folder}")
+            result["report"] = pipeline.run()
+            result["status"] = "réussi"
+        except ImportCancelled:
+            result["report"] = pipeline.report
+        except Exception as e:
+            result["status"] = "échec"
+            result["error"] = str(e)
+            result["report"] = pipeline.report
+            logger.error(f"[batch] [import_entry] {entry.id_source} : {traceback.format_exc()}")
+            self.log(f"[{entry.id_source}] [ERROR] {e}")
+        finally:
+            with self._lock:
+                self._done += 1
+                if self._progress is not None:
+                    self._progress(100.0 * self._done / max(1, len(self.entries)))
+        return result
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Importe toutes les entrées.
+
+        Returns:
+            Dict: entries (line, id_source, folder, status, error, report), succeeded, failed, cancelled,
+                  elapsed_seconds
+        """
+        start = time.perf_counter()
+        self.log(f"[INFO] Import de {len(self.entries)} dossier(s), {self.max_workers} à la fois")
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="DourBaseBatch") as executor:
+            results = list(executor.map(self.import_entry, self.entries))
+        self.report["entries"] = results
+        self.report["succeeded"] = sum(1 for result in results if result["status"] == "réussi")
+        self.report["failed"] = sum(1 for result in results if result["status"] == "échec")
+        self.report["cancelled"] = sum(1 for result in results if result["status"] == "annulé")
+        self.report["elapsed_seconds"] = time.perf_counter() - start
+        self.log(f"[INFO] Lot terminé en {self.report['elapsed_seconds']:.1f}s : {self.report['succeeded']} réussi(s), "
+                 f"{self.report['failed']} en échec, {self.report['cancelled']} annulé(s)")
+        return self.report
+
+
+def format_batch_report(report: Dict[str, Any]) -> str:
+    """Compte rendu texte d'un lot, une ligne par entrée."""
+    lines = [f"Dossiers importés : {report['succeeded']}/{len(report['entries'])}"
+             f" ({report['failed']} en échec, {report['cancelled']} annulé(s))"]
+    if report.get("elapsed_seconds") is not None:
+        lines.append(f"Durée totale : {report['elapsed_seconds']:.1f}s")
+    lines.append("")
+    for result in report["entries"]:
+        line = f"{result['line']}. {result['id_source']} : {result['status']}"
+        if result["error"]:
+            line += f" - {result['error']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class BatchImportTask(QgsTask):
+    """
+    Exécute un BatchImport dans le gestionnaire de tâches de QGIS.
+
+    Les messages des imports sont transmis par le signal logMessage, reçu dans le thread de l'interface.
+    """
+
+    logMessage = pyqtSignal(str)
+    batchFinished = pyqtSignal(object)
+    batchFailed = pyqtSignal(str)
+
+    def __init__(self, batch: BatchImport, description: str = "DourBase : import par lot"):
+        super().__init__(description, QgsTask.CanCancel)
+        self.batch = batch
+        batch._log = self.logMessage.emit
+        batch._progress = self.setProgress
+        batch._is_cancelled = self.isCanceled
+        self.error = None
+
+    def run(self) -> bool:
+        try:
+            self.batch.run()
+            return True
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"[batch] [BatchImportTask.run] {traceback.format_exc()}")
+            return False
+
+    def finished(self, result: bool) -> None:
+        if result:
+            self.batchFinished.emit(self.batch.report)
+        else:
+            self.batchFailed.emit(self.error or "Import par lot annulé.")
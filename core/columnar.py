@@ -0,0 +1,231 @@
+import logging
+import time
+from typing import Any, Dict, Iterator, List
+
+from osgeo import ogr
+
+from .pg_copy import (DEFAULT_SRID, GEOMETRY_COLUMN, TEXT_NULL, create_table, copy_text_lines, describe_layer,
+                      encode_text_value, ewkb_from_wkb, fid_column_for, get_table_columns, launder)
+from .stamping import STAMPED_FIELDS
+
+try:
+    import numpy as np
+except ImportError:  # numpy est fourni avec QGIS, mais reste optionnel pour le reste du plugin
+    np = None
+
+logger = logging.getLogger('DourBase')
+
+DEFAULT_BATCH_SIZE = 65536
+
+
+class ColumnarError(Exception):
+    """Exception levée par le pipeline d'import en colonnes."""
+    pass
+
+
+class ColumnarBatch:
+    """
+    Lot d'entités stocké en colonnes.
+
+    Args:
+        columns (Dict[str, np.ndarray]): Valeurs attributaires par nom de champ source
+        geometry (np.ndarray): Géométries au format WKB (None pour une géométrie nulle)
+    """
+
+    def __init__(self, columns: Dict[str, Any], geometry):
+        self.columns = columns
+        self.geometry = geometry
+        self.constants = {}
+
+    def __len__(self):
+        return len(self.geometry)
+
+    def stamp(self, values: Dict[str, Any]) -> bool:
+        """
+        Écrase les colonnes constantes (voir STAMPED_FIELDS) sur tout le lot.
+
+        Returns:
+            bool: True si au moins une colonne a été écrasée
+        """
+        stamped = False
+        by_upper_name = {name.upper(): name for name in self.columns}
+        for field in STAMPED_FIELDS:
+            name = by_upper_name.get(field)
+            if name is not None:
+                self.columns[name] = np.full(len(self), values[field], dtype=object)
+                self.constants[name] = values[field]
+                stamped = True
+        return stamped and len(self) > 0
+
+
+class ShapefileReader:
+    """
+    Lit une couche shapefile une seule fois, par lots en colonnes.
+
+    Utilise l'interface Arrow de GDAL (GDAL >= 3.6) lorsqu'elle est disponible,
+    sinon construit les tableaux NumPy à partir des entités OGR.
+    """
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        if np is None:
+            raise ColumnarError("Le pipeline en colonnes nécessite numpy.")
+        self.path = path
+        self.batch_size = batch_size
+        self._ds = None
+        self._layer = None
+        self.info = None
+
+    def __enter__(self):
+        self._ds = ogr.Open(self.path, 0)
+        if self._ds is None:
+            raise ColumnarError(f"Impossible d'ouvrir la couche {self.path}")
+        self._layer = self._ds.GetLayer(0)
+        self.info = describe_layer(self._layer)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._layer = None
+        self._ds = None
+        return False
+
+    def batches(self) -> Iterator[ColumnarBatch]:
+        if hasattr(self._layer, 'GetArrowStreamAsNumPy'):
+            return self._arrow_batches()
+        return self._feature_batches()
+
+    def _arrow_batches(self) -> Iterator[ColumnarBatch]:
+        geom_key = self._layer.GetGeometryColumn() or 'wkb_geometry'
+        stream = self._layer.GetArrowStreamAsNumPy(options=[
+            f'MAX_FEATURES_IN_BATCH={self.batch_size}',
+            'INCLUDE_FID=NO',
+        ])
+        for batch in stream:
+            geometry = batch.pop(geom_key)
+            yield ColumnarBatch(dict(batch), geometry)
+
+    def _feature_batches(self) -> Iterator[ColumnarBatch]:
+        names = [field['name'] for field in self.info['fields']]
+        dates = {i for i, field in enumerate(self.info['fields']) if field['type'] == ogr.OFTDate}
+        self._layer.ResetReading()
+        while True:
+            values = [[] for _ in names]
+            geometry = []
+            for feat in self._layer:
+                for i in range(len(names)):
+                    if not feat.IsFieldSetAndNotNull(i):
+                        values[i].append(None)
+                    elif i in dates:
+                        year, month, day = feat.GetFieldAsDateTime(i)[:3]
+                        values[i].append(f"{year:04d}-{month:02d}-{day:02d}")
+                    else:
+                        values[i].append(feat.GetField(i))
+                geom = feat.GetGeometryRef()
+                geometry.append(geom.ExportToWkb(ogr.wkbNDR) if geom is not None else None)
+                if len(geometry) >= self.batch_size:
+                    break
+            if not geometry:
+                return
+            yield ColumnarBatch(
+                {name: np.array(column, dtype=object) for name, column in zip(names, values)},
+                np.array(geometry, dtype=object)
+            )
+            if len(geometry) < self.batch_size:
+                return
+
+
+def encode_text_column(array) -> List[str]:
+    """Encode une colonne entière pour le format texte de COPY, en vectoriel quand c'est possible."""
+    mask = np.ma.getmaskarray(array) if np.ma.isMaskedArray(array) else None
+    data = np.ma.getdata(array)
+    if data.dtype.kind in 'iuf':
+        encoded = data.astype(str)
+    elif data.dtype.kind == 'M':
+        encoded = np.where(np.isnat(data), TEXT_NULL, data.astype(str))
+    else:
+        encoded = np.array([encode_text_value(v) for v in data], dtype=object)
+    if mask is not None and mask.any():
+        encoded = np.where(mask, TEXT_NULL, encoded)
+    return encoded.tolist()
+
+
+class ColumnarImporter:
+    """
+    Pipeline optionnel : lecture en colonnes, marquage vectoriel et envoi direct par COPY.
+
+    Les shapefiles ne sont jamais réécrits sur le disque ; chaque couche est lue une seule
+    fois puis envoyée dans un unique flux COPY sur la connexion fournie.
+
+    Args:
+        conn: Connexion psycopg2 ouverte
+        schema (str): Schéma cible
+        stamp_values (Dict[str, Any]): Valeurs retournées par build_stamp_values
+    """
+
+    def __init__(self, conn, schema: str, stamp_values: Dict[str, Any], srid: int = DEFAULT_SRID,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.conn = conn
+        self.schema = schema
+        self.stamp_values = stamp_values
+        self.srid = srid
+        self.batch_size = batch_size
+
+    def import_layer(self, path: str, table: str) -> Dict[str, Any]:
+        """
+        Importe une couche dans self.schema.table et valide la transaction.
+
+        Returns:
+            Dict: {'layer', 'expected', 'written', 'modified', 'seconds'}
+        """
+        start = time.perf_counter()
+        cursor = self.conn.cursor()
+        try:
+            with ShapefileReader(path, self.batch_size) as reader:
+                target = get_table_columns(cursor, self.schema, table)
+                if not target:
+                    create_table(cursor, self.schema, table, reader.info, self.srid)
+                    target = get_table_columns(cursor, self.schema, table)
+
+                fid_column = fid_column_for(table)
+                sources = [
+                    field['name'] for field in reader.info['fields']
+                    if launder(field['name']) in target and launder(field['name']) not in (fid_column, GEOMETRY_COLUMN)
+                ]
+                ignored = [field['name'] for field in reader.info['fields'] if field['name'] not in sources]
+                if ignored:
+                    logger.warning(f"[columnar] [import_layer] Champs absents de {self.schema}.{table}, ignorés : {ignored}")
+
+                promote = reader.info['geometry_kind'] in ('line', 'polygon')
+                state = {'modified': False}
+
+                def lines():
+                    for batch in reader.batches():
+                        if batch.stamp(self.stamp_values):
+                            state['modified'] = True
+                        encoded = [
+                            [encode_text_value(batch.constants[name])] * len(batch) if name in batch.constants
+                            else encode_text_column(batch.columns[name])
+                            for name in sources
+                        ]
+                        encoded.append([
+                            TEXT_NULL if wkb is None else ewkb_from_wkb(wkb, self.srid, promote).hex()
+                            for wkb in batch.geometry
+                        ])
+                        for row in zip(*encoded):
+                            yield '\t'.join(row)
+
+                written = copy_text_lines(
+                    cursor, self.schema, table,
+                    [launder(name) for name in sources] + [GEOMETRY_COLUMN],
+                    lines()
+                )
+                expected = reader.info['feature_count']
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        seconds = time.perf_counter() - start
+        logger.info(f"[columnar] [import_layer] {written}/{expected} entité(s) importée(s) dans {self.schema}.{table} en {seconds:.3f}s")
+        return {'layer': table, 'expected': expected, 'written': written, 'modified': state['modified'], 'seconds': seconds}
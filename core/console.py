@@ -0,0 +1,127 @@
+import glob
+import logging
+import os
+import time
+from collections import deque
+from typing import List, Optional
+
+from qgis.PyQt.QtCore import QObject, QTimer
+
+logger = logging.getLogger('DourBase')
+
+DEFAULT_MAX_LINES = 5000
+DEFAULT_FLUSH_INTERVAL_MS = 100
+SPILL_FILES_KEPT = 10
+
+
+def format_console_html(message: str) -> str:
+    """Mise en forme HTML d'un message de la console selon son niveau ([INFO], [WARNING], [ERROR])."""
+    color = None
+    html_message = message
+
+    if message.startswith("[INFO]"):
+        color = "blue"
+        html_message = f'<span style="color:{color};"><b>[INFO]</b></span>{message[6:]}'
+    elif message.startswith("[WARNING]"):
+        color = "orange"
+        html_message = f'<span style="color:{color};"><b>[WARNING]</b></span>{message[9:]}'
+    elif message.startswith("[ERROR]"):
+        color = "red"
+        html_message = f'<span style="color:{color};"><b>[ERROR]</b></span>{message[7:]}'
+    elif "Aborting" in message:
+        color = "red"
+        html_message = message.replace('Aborting', f'<span style="color:{color};"><b>Aborting</b></span>')
+    return html_message.replace('\n', '<br>')
+
+
+class BufferedConsole(QObject):
+    """
+    Console de l'onglet "Console" alimentée par lots.
+
+    Les messages sont mis en file puis affichés tous les flush_interval_ms millisecondes,
+    avec un seul défilement par lot. Le document du QTextEdit est limité à max_lines messages
+    (les plus anciens disparaissent de l'affichage), mais l'historique complet est écrit dans
+    un fichier de débordement, relu par text() pour le compte rendu et l'enregistrement des logs.
+
+    Args:
+        textedit (QTextEdit): Widget d'affichage
+        max_lines (int): Nombre maximal de messages affichés et conservés en mémoire
+        flush_interval_ms (int): Intervalle d'affichage des messages en attente
+        spill_dir (str): Dossier du fichier d'historique complet (None : historique en mémoire seulement)
+    """
+
+    def __init__(self, textedit, max_lines: int = DEFAULT_MAX_LINES,
+                 flush_interval_ms: int = DEFAULT_FLUSH_INTERVAL_MS, spill_dir: Optional[str] = None, parent=None):
+        super().__init__(parent)
+        self.textedit = textedit
+        self.textedit.document().setMaximumBlockCount(max_lines)
+        self.lines = deque(maxlen=max_lines)
+        self._pending: List[str] = []
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(flush_interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self.spill_path = None
+        self._spill = None
+        self._dropped = 0
+        if spill_dir:
+            self._open_spill(spill_dir)
+
+    def _open_spill(self, spill_dir: str) -> None:
+        try:
+            os.makedirs(spill_dir, exist_ok=True)
+            previous = sorted(glob.glob(os.path.join(spill_dir, "console_*.log")))
+            for path in previous[:max(0, len(previous) - SPILL_FILES_KEPT + 1)]:
+                os.remove(path)
+            self.spill_path = os.path.join(spill_dir, f"console_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.log")
+            self._spill = open(self.spill_path, "w", encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"[console] [_open_spill] Historique de la console conservé en mémoire seulement : {e}")
+            self.spill_path = None
+            self._spill = None
+
+    def append(self, message: str) -> None:
+        if len(self.lines) == self.lines.maxlen:
+            self._dropped += 1
+        self.lines.append(message)
+        self._pending.append(format_console_html(message))
+        if self._spill is not None:
+            self._spill.write(message + "\n")
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Affiche les messages en attente en un seul lot."""
+        self._timer.stop()
+        if self._spill is not None:
+            self._spill.flush()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self.textedit.setUpdatesEnabled(False)
+        try:
+            for html_message in pending:
+                self.textedit.append(html_message)
+        finally:
+            self.textedit.setUpdatesEnabled(True)
+        scrollbar = self.textedit.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def text(self) -> str:
+        """Historique complet de la console, y compris les messages sortis de l'affichage."""
+        self.flush()
+        if self.spill_path is not None:
+            try:
+                with open(self.spill_path, "r", encoding="utf-8") as f:
+                    return f.read().rstrip("\n")
+            except OSError as e:
+                logger.warning(f"[console] [text] Lecture de l'historique impossible : {e}")
+        if self._dropped:
+            return f"[... {self._dropped} message(s) plus ancien(s) non conservé(s)]\n" + "\n".join(self.lines)
+        return "\n".join(self.lines)
+
+    def close(self) -> None:
+        self.flush()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
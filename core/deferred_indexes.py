@@ -0,0 +1,232 @@
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from psycopg2 import sql
+
+logger = logging.getLogger('DourBase')
+
+GUARD_TABLE = 'dourbase_deferred_indexes'
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_BUILD_WORKERS = 2
+# Index d'un import interrompu depuis plus longtemps : reconstruits par n'importe quel import suivant
+PENDING_STALE_AFTER = 12 * 3600
+
+
+class DeferredIndexError(Exception):
+    """Exception levée lorsque des index supprimés pour l'import n'ont pas pu être reconstruits."""
+    pass
+
+
+def deferrable_indexes(cursor, schema: str, table: str) -> List[Tuple[str, str]]:
+    """
+    Index de la table qui ne portent aucune contrainte (ni clé primaire, ni unicité, ni exclusion).
+
+    Returns:
+        List[Tuple[str, str]]: (nom, définition pg_get_indexdef)
+    """
+    cursor.execute(
+        """
+        SELECT ic.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        WHERE n.nspname = %s AND t.relname = %s
+          AND NOT i.indisprimary AND NOT i.indisunique AND i.indisvalid
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        ORDER BY ic.relname
+        """,
+        (schema, table)
+    )
+    return [(name, definition) for name, definition in cursor.fetchall()]
+
+
+def estimated_rows(cursor, schema: str, table: str) -> Optional[int]:
+    """Nombre de lignes estimé par les statistiques (pg_class.reltuples), None si la table n'existe pas."""
+    cursor.execute(
+        """
+        SELECT c.reltuples::bigint
+        FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %s AND c.relname = %s AND c.relkind = 'r'
+        """,
+        (schema, table)
+    )
+    row = cursor.fetchone()
+    # -1 : table jamais analysée (PostgreSQL 14+)
+    return None if row is None else max(0, row[0])
+
+
+def tables_to_defer(cursor, schema: str, incoming: Dict[str, int], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Tables pour lesquelles l'import représente au moins threshold fois le nombre de lignes existantes."""
+    tables = []
+    for table, count in incoming.items():
+        rows = estimated_rows(cursor, schema, table)
+        if rows is not None and count and count >= threshold * max(rows, 1):
+            tables.append(table)
+    return sorted(tables)
+
+
+def pending_tables(cursor, schema: str) -> Set[str]:
+    """Tables du schéma dont des index supprimés pour un chargement n'ont pas encore été reconstruits."""
+    cursor.execute("SELECT to_regclass(%s)", (f'"{schema}"."{GUARD_TABLE}"',))
+    if cursor.fetchone()[0] is None:
+        return set()
+    cursor.execute(sql.SQL("SELECT DISTINCT table_name FROM {}.{}").format(
+        sql.Identifier(schema), sql.Identifier(GUARD_TABLE)))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _if_not_exists(definition: str) -> str:
+    return definition.replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ", 1)
+
+
+def set_build_workers(cursor, conn, workers: Optional[int]) -> None:
+    """Construction parallèle des index B-tree (PostgreSQL 11+), pour la transaction en cours."""
+    if workers and conn.server_version >= 110000:
+        cursor.execute("SELECT set_config('max_parallel_maintenance_workers', %s, true)", (str(int(workers)),))
+
+
+def rebuild_index(cursor, definition: str) -> None:
+    cursor.execute(_if_not_exists(definition))
+
+
+class DeferredIndexes:
+    """
+    Suppression des index d'une table pendant un chargement massif, puis reconstruction.
+
+    Les définitions sont enregistrées dans schema.dourbase_deferred_indexes, dans la même transaction
+    que la suppression des index : si QGIS est fermé pendant l'import, les index sont reconstruits
+    par l'import suivant de la même source (ou par n'importe quel import après 12 heures).
+    Seuls les index sans contrainte sont supprimés ; clés primaires et index uniques sont conservés.
+
+    Args:
+        conn: Connexion psycopg2 ouverte
+        schema (str): Schéma cible
+        id_source (str): Identifiant de la source importée
+        build_workers (int): Processus parallèles de construction autorisés côté serveur
+    """
+
+    def __init__(self, conn, schema: str, id_source: str, build_workers: Optional[int] = DEFAULT_BUILD_WORKERS,
+                 log: Optional[Callable[[str], None]] = None):
+        self.conn = conn
+        self.schema = schema
+        self.id_source = id_source
+        self.build_workers = build_workers
+        self._log = log
+        self.dropped: Dict[str, List[str]] = {}
+
+    def log(self, message: str) -> None:
+        if self._log is not None:
+            self._log(message)
+        else:
+            logger.info(f"[deferred_indexes] {message}")
+
+    def _guard(self) -> sql.Composable:
+        return sql.SQL("{}.{}").format(sql.Identifier(self.schema), sql.Identifier(GUARD_TABLE))
+
+    def _ensure_guard(self, cursor) -> None:
+        cursor.execute(sql.SQL(
+            """
+            CREATE TABLE IF NOT EXISTS {} (
+                index_name text PRIMARY KEY,
+                table_name text NOT NULL,
+                definition text NOT NULL,
+                id_source text,
+                dropped_at timestamptz NOT NULL DEFAULT now()
+            )
+            """
+        ).format(self._guard()))
+
+    def drop(self, tables: Iterable[str]) -> int:
+        """
+        Enregistre puis supprime les index sans contrainte des tables, en une seule transaction.
+
+        Returns:
+            int: Nombre d'index supprimés
+        """
+        count = 0
+        try:
+            with self.conn.cursor() as cursor:
+                self._ensure_guard(cursor)
+                for table in tables:
+                    for name, definition in deferrable_indexes(cursor, self.schema, table):
+                        cursor.execute(sql.SQL(
+                            "INSERT INTO {} (index_name, table_name, definition, id_source) VALUES (%s, %s, %s, %s) "
+                            "ON CONFLICT (index_name) DO NOTHING"
+                        ).format(self._guard()), (name, table, definition, self.id_source))
+                        cursor.execute(sql.SQL("DROP INDEX {}.{}").format(sql.Identifier(self.schema),
+                                                                         sql.Identifier(name)))
+                        self.dropped.setdefault(table, []).append(name)
+                        count += 1
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            self.dropped = {}
+            raise
+        if count:
+            self.log(f"[INFO] {count} index supprimé(s) avant le chargement : {self.dropped}")
+        return count
+
+    def restore(self) -> int:
+        """
+        Reconstruit les index supprimés par cet import (et ceux laissés par un import interrompu de la source).
+
+        Raises:
+            DeferredIndexError: Si des index n'ont pas pu être reconstruits ; leurs définitions restent enregistrées
+        """
+        restored = restore_pending(self.conn, self.schema, self.id_source, self.build_workers, self.log)
+        self.dropped = {}
+        return restored
+
+
+def restore_pending(conn, schema: str, id_source: Optional[str] = None,
+                    build_workers: Optional[int] = DEFAULT_BUILD_WORKERS,
+                    log: Optional[Callable[[str], None]] = None) -> int:
+    """
+    Reconstruit les index enregistrés dans la table de garde : ceux de id_source, et ceux de plus de 12 heures.
+    Chaque index est reconstruit dans sa propre transaction, puis retiré de la table de garde.
+
+    Returns:
+        int: Nombre d'index reconstruits
+
+    Raises:
+        DeferredIndexError: Si au moins un index n'a pas pu être reconstruit
+    """
+    guard = sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(GUARD_TABLE))
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", (f'"{schema}"."{GUARD_TABLE}"',))
+        if cursor.fetchone()[0] is None:
+            conn.rollback()
+            return 0
+        cursor.execute(sql.SQL(
+            "SELECT index_name, definition FROM {} "
+            "WHERE id_source IS NOT DISTINCT FROM %s OR dropped_at < now() - make_interval(secs => %s) "
+            "ORDER BY table_name, index_name"
+        ).format(guard), (id_source, PENDING_STALE_AFTER))
+        pending = cursor.fetchall()
+    conn.rollback()
+
+    restored = 0
+    failed = []
+    start = time.perf_counter()
+    for name, definition in pending:
+        try:
+            with conn.cursor() as cursor:
+                set_build_workers(cursor, conn, build_workers)
+                rebuild_index(cursor, definition)
+                cursor.execute(sql.SQL("DELETE FROM {} WHERE index_name = %s").format(guard), (name,))
+            conn.commit()
+            restored += 1
+        except Exception as e:
+            conn.rollback()
+            failed.append(f"{name} : {e}")
+    message = f"[INFO] {restored} index reconstruit(s) en {time.perf_counter() - start:.3f}s"
+    if log is not None:
+        log(message)
+    else:
+        logger.info(f"[deferred_indexes] [restore_pending] {message}")
+    if failed:
+        raise DeferredIndexError("Index non reconstruits (définitions conservées dans "
+                                 f"{schema}.{GUARD_TABLE}) :\n" + "\n".join(failed))
+    return restored
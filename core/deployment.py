@@ -0,0 +1,210 @@
+import logging
+import os
+import subprocess
+import sys
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from psycopg2 import sql
+from qgis.PyQt.QtCore import pyqtSignal
+from qgis.core import QgsTask
+
+from .metadata_cache import get_metadata_cache
+from .pg_pool import get_pool
+
+logger = logging.getLogger('DourBase')
+
+DEPLOYMENT_STAGES = ('backup', 'drop', 'restore', 'grant')
+# Au-delà de 'drop', l'annulation laisserait la base de consultation sans schéma
+CANCELLABLE_STAGES = ('backup', 'drop')
+
+
+class DeploymentError(Exception):
+    """Exception levée lorsqu'une étape du déploiement échoue."""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(message)
+        self.stage = stage
+
+
+def pg_executable(name: str) -> str:
+    return f"{name}.exe" if sys.platform.startswith('win') else name
+
+
+class DeploymentPipeline:
+    """
+    Déploiement de la base de travail vers la base de consultation, en quatre étapes :
+    sauvegarde des deux schémas (pg_dump), suppression du schéma de consultation,
+    restauration de la sauvegarde de travail (psql), puis droits du groupe de consultation.
+
+    Une étape en échec arrête le déploiement : le schéma de consultation n'est jamais
+    supprimé si les sauvegardes n'ont pas abouti.
+
+    Args:
+        db_consultation (Dict): Paramètres de la base de consultation (host, port, dbname, schema)
+        db_work (Dict): Paramètres de la base de travail (host, port, dbname, schema)
+        username (str): Utilisateur PostgreSQL
+        password (str): Mot de passe, transmis aux outils par PGPASSWORD
+        group (str): Groupe de consultation recevant les droits de lecture
+        backup_consultation_path (str): Dossier de sauvegarde du schéma de consultation
+        backup_travail_path (str): Dossier de sauvegarde du schéma de travail
+    """
+
+    def __init__(self, db_consultation: Dict[str, Any], db_work: Dict[str, Any], username: str, password: str,
+                 group: str, backup_consultation_path: str, backup_travail_path: str,
+                 log: Optional[Callable[[str], None]] = None,
+                 stage_started: Optional[Callable[[str], None]] = None,
+                 is_cancelled: Optional[Callable[[], bool]] = None):
+        self.db_consultation = db_consultation
+        self.db_work = db_work
+        self.username = username
+        self.password = password
+        self.group = group
+        self.backup_consultation_path = backup_consultation_path
+        self.backup_travail_path = backup_travail_path
+        self._log = log
+        self._stage_started = stage_started
+        self._is_cancelled = is_cancelled
+        self.completed: List[str] = []
+
+    def log(self, message: str) -> None:
+        if self._log is not None:
+            self._log(message)
+        else:
+            logger.info(f"[deployment] {message}")
+
+    @property
+    def consultation_backup_file(self) -> str:
+        return os.path.join(self.backup_consultation_path, f"{self.db_consultation['schema']}_backup.sql")
+
+    @property
+    def work_backup_file(self) -> str:
+        return os.path.join(self.backup_travail_path, f"{self.db_work['schema']}.sql")
+
+    @property
+    def restore_file(self) -> str:
+        # Nom historique : la restauration relit le fichier nommé d'après le schéma de consultation
+        return os.path.join(self.backup_travail_path, f"{self.db_consultation['schema']}.sql")
+
+    def _run_tool(self, stage: str, args: List[str]) -> None:
+        env = dict(os.environ)
+        env['PGPASSWORD'] = self.password
+        self.log(f"[INFO] Commande : {' '.join(args)}")
+        try:
+            result = subprocess.run(
+                args,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding='cp1252',  # ou encoding='mbcs' mais en théorie c'est encoding='cp1252'. à voir si nous devons changer ça dans le futur
+                errors='replace'
+            )
+        except OSError as e:
+            raise DeploymentError(stage, f"Impossible de lancer {args[0]} : {e}")
+        if result.stdout:
+            self.log(f"[INFO] Sortie standard : {result.stdout}")
+        if result.returncode != 0:
+            raise DeploymentError(
+                stage, f"{args[0]} a échoué (code {result.returncode}).\nSortie standard : {result.stdout}\nErreur standard : {result.stderr}")
+        if result.stderr:
+            self.log(f"[WARNING] Erreur standard : {result.stderr}")
+
+    def _connection_args(self, db: Dict[str, Any]) -> List[str]:
+        return ['-h', str(db['host']), '-U', self.username, '-d', str(db['dbname']), '-p', str(db['port'])]
+
+    def backup(self) -> None:
+        self._run_tool('backup', [pg_executable('pg_dump')] + self._connection_args(self.db_consultation)
+                       + ['-n', self.db_consultation['schema'], '-E', 'UTF8', '-f', self.consultation_backup_file])
+        self._run_tool('backup', [pg_executable('pg_dump')] + self._connection_args(self.db_work)
+                       + ['-n', self.db_work['schema'], '-E', 'UTF8', '-f', self.work_backup_file])
+
+    def drop(self) -> None:
+        db = self.db_consultation
+        with get_pool().connection(db["host"], db["port"], db["dbname"], self.username, self.password) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(db['schema'])))
+            conn.commit()
+        get_metadata_cache().invalidate(db["host"], db["port"], db["dbname"], schema=db["schema"])
+
+    def restore(self) -> None:
+        self._run_tool('restore', [pg_executable('psql')] + self._connection_args(self.db_consultation)
+                       + ['-f', self.restore_file])
+
+    def grant(self) -> None:
+        db = self.db_consultation
+        schema = sql.Identifier(db['schema'])
+        group = sql.Identifier(self.group)
+        with get_pool().connection(db["host"], db["port"], db["dbname"], self.username, self.password) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("GRANT USAGE ON SCHEMA {} TO {}").format(schema, group))
+                self.log(f"[INFO] GRANT USAGE ON SCHEMA {db['schema']} TO {self.group} : succès")
+                cur.execute(sql.SQL("ALTER DEFAULT PRIVILEGES IN SCHEMA {} GRANT SELECT ON TABLES TO {}").format(schema, group))
+                self.log(f"[INFO] ALTER DEFAULT PRIVILEGES IN SCHEMA {db['schema']} GRANT SELECT ON TABLES TO {self.group} : succès")
+            conn.commit()
+
+    def run(self) -> List[str]:
+        """
+        Enchaîne les étapes du déploiement.
+
+        Returns:
+            List[str]: Étapes terminées
+
+        Raises:
+            DeploymentError: Dès qu'une étape échoue ; les étapes suivantes ne sont pas lancées
+        """
+        for stage in DEPLOYMENT_STAGES:
+            if stage in CANCELLABLE_STAGES and self._is_cancelled is not None and self._is_cancelled():
+                raise DeploymentError(stage, "Déploiement annulé par l'utilisateur.")
+            if self._stage_started is not None:
+                self._stage_started(stage)
+            self.log(f"[INFO] Étape '{stage}' en cours")
+            try:
+                getattr(self, stage)()
+            except DeploymentError:
+                raise
+            except Exception as e:
+                raise DeploymentError(stage, str(e))
+            self.completed.append(stage)
+            self.log(f"[INFO] Étape '{stage}' terminée")
+        return self.completed
+
+
+class DeploymentTask(QgsTask):
+    """Exécute un DeploymentPipeline dans le gestionnaire de tâches de QGIS."""
+
+    logMessage = pyqtSignal(str)
+    stageStarted = pyqtSignal(str)
+    deploymentSucceeded = pyqtSignal()
+    deploymentFailed = pyqtSignal(str, str)
+
+    def __init__(self, pipeline: DeploymentPipeline, description: str = "DourBase : déploiement"):
+        super().__init__(description, QgsTask.CanCancel)
+        self.pipeline = pipeline
+        pipeline._log = self.logMessage.emit
+        pipeline._stage_started = self._on_stage_started
+        pipeline._is_cancelled = self.isCanceled
+        self.stage = None
+        self.error = None
+
+    def _on_stage_started(self, stage: str) -> None:
+        self.setProgress(100.0 * DEPLOYMENT_STAGES.index(stage) / len(DEPLOYMENT_STAGES))
+        self.stageStarted.emit(stage)
+
+    def run(self) -> bool:
+        try:
+            self.pipeline.run()
+            return True
+        except DeploymentError as e:
+            self.stage = e.stage
+            self.error = str(e)
+        except Exception as e:
+            self.error = str(e)
+        logger.error(f"[deployment] [DeploymentTask.run] {self.stage} : {traceback.format_exc()}")
+        return False
+
+    def finished(self, result: bool) -> None:
+        if result:
+            self.deploymentSucceeded.emit()
+        else:
+            self.deploymentFailed.emit(self.stage or "", self.error or "Déploiement annulé.")
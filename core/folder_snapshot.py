@@ -0,0 +1,78 @@
+import logging
+import os
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger('DourBase')
+
+FileInfo = namedtuple('FileInfo', ['path', 'size', 'mtime'])
+
+
+class FolderSnapshot:
+    """
+    Contenu d'un dossier de shapefiles, lu en un seul passage os.scandir.
+
+    Les fichiers sont regroupés par nom de base (sans extension) : {nom: {extension: FileInfo}}.
+    Les extensions sont conservées telles quelles (sensibles à la casse, comme la vérification
+    historique des fichiers manquants). Le même instantané sert à la vérification des fichiers,
+    à la préparation des shapefiles et à la liste des couches importées.
+
+    Args:
+        folder (str): Dossier à lire
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.groups: Dict[str, Dict[str, FileInfo]] = {}
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                basename, ext = os.path.splitext(entry.name)
+                self.groups.setdefault(basename, {})[ext] = FileInfo(entry.path, stat.st_size, stat.st_mtime)
+        self._by_lower = {basename.lower(): basename for basename in self.groups}
+        logger.debug(f"[folder_snapshot] [__init__] {sum(len(g) for g in self.groups.values())} fichier(s) "
+                     f"dans {folder}")
+
+    def shapefile_basenames(self) -> List[str]:
+        return [basename for basename, files in self.groups.items() if '.shp' in files]
+
+    def missing_components(self, required_exts: Iterable[str]) -> List[str]:
+        """Fichiers manquants ('nom.ext') des shapefiles du dossier."""
+        required = set(required_exts)
+        missing = []
+        for basename in self.shapefile_basenames():
+            for ext in required - set(self.groups[basename]):
+                missing.append(f"{basename}{ext}")
+        return missing
+
+    def files_with_extensions(self, extensions: Iterable[str]) -> List[FileInfo]:
+        """Fichiers dont l'extension (insensible à la casse) figure dans extensions."""
+        wanted = {ext.lower() for ext in extensions}
+        return [info for files in self.groups.values() for ext, info in files.items() if ext.lower() in wanted]
+
+    def shapefiles(self) -> Dict[str, str]:
+        """Chemin du .shp par nom de couche en minuscules (extension .shp insensible à la casse)."""
+        layers = {}
+        for basename, files in self.groups.items():
+            for ext, info in files.items():
+                if ext.lower() == '.shp':
+                    layers[basename.lower()] = info.path
+        return layers
+
+    def _files(self, layer: str) -> Dict[str, FileInfo]:
+        basename = self._by_lower.get(layer.lower())
+        return self.groups[basename] if basename is not None else {}
+
+    def layer_size(self, layer: str, extensions: Iterable[str] = ('.shp', '.dbf')) -> int:
+        """Taille cumulée des fichiers d'une couche (nom insensible à la casse), en octets."""
+        wanted = {ext.lower() for ext in extensions}
+        return sum(info.size for ext, info in self._files(layer).items() if ext.lower() in wanted)
+
+    def sidecar(self, layer: str, ext: str) -> Optional[FileInfo]:
+        """Fichier compagnon d'une couche (nom et extension insensibles à la casse)."""
+        for file_ext, info in self._files(layer).items():
+            if file_ext.lower() == ext.lower():
+                return info
+        return None
@@ -0,0 +1,691 @@
+import glob
+import logging
+import os
+import sys
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from psycopg2 import sql
+from qgis.PyQt.QtCore import pyqtSignal
+from qgis.core import QgsTask, QgsVectorLayer
+
+from .basedoc import insert_basedoc
+from .columnar import ColumnarImporter
+from .deferred_indexes import (DEFAULT_BUILD_WORKERS, DEFAULT_THRESHOLD, DeferredIndexError, DeferredIndexes,
+                               restore_pending, tables_to_defer)
+from .folder_snapshot import FolderSnapshot
+from .layer_metadata import get_layer_metadata_cache
+from .layer_registry import get_layer_registry
+from .loaders import GdalLoader, LoaderError, ShapefileCopyLoader
+from .maintenance import finalize_tables
+from .manifest import ImportManifest, layer_content_hash
+from .pg_copy import get_table_columns
+from .pg_pool import get_pool
+from .planner import layer_size
+from .staging import StagedImport, StagingError
+from .stamping import AttributeStamper, StampingError
+from .timing import StageTimer
+from .workspace import RunWorkspace
+from ..utils import (get_filename_without_extension, get_param, get_suffix_after_last_underscore,
+                     list_source_shapefiles, main_prepare_shapefiles)
+
+logger = logging.getLogger('DourBase')
+
+class ImportCancelled(Exception):
+    """Exception levée lorsque l'utilisateur annule l'import en cours."""
+    pass
+
+
+def option_enabled(value, default: bool = False) -> bool:
+    """Interprète un paramètre booléen lu dans QSettings ('true', '1', 'oui'...)."""
+    if value is None or value == "":
+        return default
+    return str(value).lower() in ("1", "true", "yes", "on", "oui")
+
+
+# Options du pipeline lues dans les paramètres DourBase/<nom>, avec leur valeur par défaut
+IMPORT_OPTION_DEFAULTS = {
+    "import_pipeline": "qgis",
+    "import_mode": "direct",
+    "stamping_mode": "bulk",
+    "loader_backend": "ogr2ogr",
+    "copy_format": "binary",
+    "import_manifest": "false",
+    "prepare_mode": "copy",
+    "scratch_root": "",
+    "post_load_maintenance": "true",
+    "deferred_indexes": "false",
+    "deferred_index_threshold": "",
+    "index_build_workers": "",
+}
+
+
+def import_options_from_settings() -> Dict[str, str]:
+    """Options de ImportPipeline lues dans les paramètres du plugin."""
+    return {name: get_param(name) or default for name, default in IMPORT_OPTION_DEFAULTS.items()}
+
+
+def new_report() -> Dict[str, Any]:
+    """Compte rendu vide d'un import, complété au fil du traitement."""
+    return {
+        "total_layers": 0,
+        "added_layers": 0,
+        "modified_layers": 0,
+        "shp_files_processed": 0,
+        "shp_files_errors": 0,
+        "shp_files_ignored": 0,
+        "stamping": {},
+        "logs": []
+    }
+
+
+class ImportPipeline:
+    """
+    Chaîne complète d'import d'un récolement, sans interface : préparation des shapefiles,
+    marquage des attributs, chargement des couches et insertion de la ligne basedoc.
+
+    Args:
+        folder (str): Dossier des shapefiles sélectionné par l'utilisateur
+        database (Dict): Paramètres de connexion (host, port, dbname, user, password, schema)
+        options (Dict[str, str]): import_pipeline, import_mode, stamping_mode, loader_backend, copy_format, prepare_mode,
+            scratch_root (dossier des espaces de travail, un par id_source),
+            import_manifest ('true' pour ignorer les couches inchangées depuis le dernier import de la source),
+            post_load_maintenance ('false' pour ne pas créer les index manquants ni analyser les tables importées),
+            deferred_indexes ('true' pour supprimer les index des tables pendant un gros chargement, puis les reconstruire),
+            deferred_index_threshold (part minimale de la table cible que doit représenter la livraison, 0.2 par défaut),
+            index_build_workers (processus parallèles de reconstruction des index côté serveur)
+        stamp_values (Dict): Valeurs retournées par build_stamp_values
+        basedoc_row (Dict): Ligne retournée par build_basedoc_row
+        log (Callable[[str], None]): Reçoit les messages destinés à la console ('[INFO] ...')
+        progress (Callable[[float], None]): Reçoit l'avancement, de 0 à 100
+        is_cancelled (Callable[[], bool]): Retourne True si l'import doit s'arrêter
+        timer (StageTimer): Chronomètre partagé avec l'appelant (un nouveau par défaut)
+        snapshot (FolderSnapshot): Contenu du dossier déjà lu par l'appelant (relu sinon)
+    """
+
+    def __init__(self, folder: str, database: Dict[str, Any], options: Dict[str, str], stamp_values: Dict[str, Any],
+                 basedoc_row: Dict[str, str], log: Optional[Callable[[str], None]] = None,
+                 progress: Optional[Callable[[float], None]] = None,
+                 is_cancelled: Optional[Callable[[], bool]] = None, timer: Optional[StageTimer] = None,
+                 snapshot: Optional[FolderSnapshot] = None):
+        self.folder = folder
+        self.snapshot = snapshot if snapshot is not None else FolderSnapshot(folder)
+        self.database = database
+        self.options = options
+        self.stamp_values = stamp_values
+        self.basedoc_row = basedoc_row
+        self.id_source = stamp_values['ID_SOURCE']
+        self._log = log
+        self._progress = progress
+        self._is_cancelled = is_cancelled
+        self.report = new_report()
+        self.timer = timer if timer is not None else StageTimer()
+        self.report["timings"] = self.timer.entries
+        self._allowed_types = None
+        self._steps = 1
+        self._done = 0
+        self.manifest = None
+        self.staging = None
+        self.workspace = None
+        self._hashes: Dict[str, str] = {}
+        self._loaded: Dict[str, int] = {}
+        self._touched = set()
+        self._deferred_tables: List[str] = []
+
+    def log(self, message: str) -> None:
+        if self._log is not None:
+            self._log(message)
+        else:
+            logger.info(f"[import_pipeline] {message}")
+
+    def _step(self) -> None:
+        self._done += 1
+        if self._progress is not None:
+            self._progress(min(100.0, 100.0 * self._done / self._steps))
+
+    def check_cancelled(self) -> None:
+        if self._is_cancelled is not None and self._is_cancelled():
+            raise ImportCancelled("Import annulé par l'utilisateur.")
+
+    def is_shp_allowed(self, shpfile: str) -> bool:
+        if self._allowed_types is None:
+            try:
+                # Figé pour la durée de l'import, même si shp_type.txt est modifié entre-temps
+                self._allowed_types = get_layer_registry().allowed
+            except Exception as e:
+                self.log(f"[ERROR] Impossible de lire shp_type.txt : {e}")
+                self._allowed_types = frozenset()
+        return get_filename_without_extension(shpfile).lower() in self._allowed_types
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Exécute l'import complet.
+
+        Returns:
+            Dict: Compte rendu du traitement
+
+        Raises:
+            Exception: En cas d'erreur bloquante (la ligne basedoc n'est alors pas insérée)
+            WorkspaceError: Si un autre import de la même source est en cours
+        """
+        try:
+            return self._run()
+        finally:
+            if self.workspace is not None:
+                self.workspace.release()
+                self.workspace = None
+
+    def _run(self) -> Dict[str, Any]:
+        import_pipeline = self.options.get("import_pipeline") or "qgis"
+        import_mode = self.options.get("import_mode") or "direct"
+        start = time.perf_counter()
+        self.log(f"[INFO] Pipeline d'import : {import_pipeline}")
+        self.log(f"[INFO] Mode d'import : {import_mode}")
+
+        if import_pipeline == "columnar":
+            # Les couches sont lues directement depuis le dossier source, sans copie ni réécriture
+            convert_dir = self.folder
+            shp_files = list_source_shapefiles(self.folder, self.snapshot)
+        else:
+            # Dossier de préparation propre à la source : plusieurs imports peuvent s'exécuter en parallèle
+            self.workspace = RunWorkspace(self.id_source, self.options.get("scratch_root"))
+            with self.timer.stage("main_prepare_shapefiles"):
+                convert_dir = main_prepare_shapefiles(self.folder, self.options.get("prepare_mode"),
+                                                      convert_dir=self.workspace.acquire(), snapshot=self.snapshot)
+            shp_files = glob.glob(os.path.join(convert_dir, '*.shp'))
+        self.report["total_layers"] = len(shp_files)
+        self.log(f"[INFO] Dossier de sortie : {convert_dir}\n* fichiers shp : {shp_files}")
+        self._steps = max(1, len(shp_files) * (1 if import_pipeline == "columnar" else 2) + 1)
+
+        database = self.database
+        conn = get_pool().acquire(database["host"], database["port"], database["dbname"],
+                                  database["user"], database["password"])
+        staging = None
+        try:
+            if option_enabled(self.options.get("import_manifest")):
+                self.manifest = ImportManifest(conn, database["schema"], self.id_source)
+                self.manifest.load()
+                shp_files = self.skip_unchanged_layers(shp_files)
+                self._steps = max(1, len(shp_files) * (1 if import_pipeline == "columnar" else 2) + 1)
+
+            # Volume chargé, pour l'historique de débit utilisé par le planificateur
+            self.report["source_bytes"] = sum(layer_size(path) for path in shp_files if self.is_shp_allowed(path))
+
+            if option_enabled(self.options.get("deferred_indexes")):
+                self._deferred_tables = self.plan_deferred_indexes(conn, database["schema"], shp_files)
+
+            load_database = database
+            if import_mode == "staged":
+                # Les couches sont chargées dans un schéma de préparation, puis transférées en une transaction
+                staging = StagedImport(conn, database["schema"], self.id_source)
+                self.staging = staging
+                staging.create()
+                self.log(f"[INFO] Schéma de préparation : {staging.schema}")
+                for layer in shp_files:
+                    if self.is_shp_allowed(layer):
+                        staging.prepare_table(get_filename_without_extension(layer).lower())
+                load_database = staging.database(database)
+
+            deferred = None
+            if self._deferred_tables and staging is None:
+                # En mode staged, les index sont supprimés et reconstruits dans la transaction de transfert
+                deferred = DeferredIndexes(conn, database["schema"], self.id_source, self.build_workers(), self.log)
+                with self.timer.stage("suppression des index"):
+                    deferred.drop(self._deferred_tables)
+            try:
+                if import_pipeline == "columnar":
+                    self.run_columnar_import(shp_files, load_database, conn)
+                else:
+                    stamping_mode = self.options.get("stamping_mode") or "bulk"
+                    self.log(f"[INFO] Mode de marquage des attributs : {stamping_mode}")
+                    self.stamp_layers(shp_files, AttributeStamper(self.stamp_values), stamping_mode)
+                    self.load_layers(shp_files, load_database, conn)
+            finally:
+                if deferred is not None:
+                    self.restore_deferred_indexes(deferred)
+
+            self.check_cancelled()
+            if staging is not None:
+                self.commit_staged_import(staging)
+            else:
+                cursor = conn.cursor()
+                if self.manifest is not None:
+                    self.manifest.delete_previous(cursor, database["schema"], 'basedoc')
+                self.log("[INFO] executing sql request")
+                with self.timer.stage("insertion basedoc"):
+                    insert_basedoc(cursor, database["schema"], self.basedoc_row)
+                    self.log("[INFO] commiting changes")
+                    conn.commit()
+                self._touched.add('basedoc')
+                cursor.close()
+                self.log("[INFO] cursor closed")
+
+            if option_enabled(self.options.get("post_load_maintenance"), default=True):
+                # Index manquants et statistiques, une seule fois et uniquement sur les tables modifiées
+                with self.timer.stage("finalisation"):
+                    self.report["created_indexes"] = finalize_tables(conn, database["schema"], self._touched, self.log)
+            self._step()
+            self.report["elapsed_seconds"] = time.perf_counter() - start
+        finally:
+            if staging is not None:
+                staging.drop()
+            get_pool().release(conn)
+        return self.report
+
+    def build_workers(self) -> int:
+        try:
+            return int(self.options.get("index_build_workers") or DEFAULT_BUILD_WORKERS)
+        except ValueError:
+            return DEFAULT_BUILD_WORKERS
+
+    def plan_deferred_indexes(self, conn, schema: str, shp_files: List[str]) -> List[str]:
+        """
+        Tables dont les index seront reconstruits après le chargement plutôt que mis à jour ligne à ligne :
+        celles pour lesquelles la livraison représente au moins deferred_index_threshold de la table cible.
+        Les index laissés par un import interrompu de la même source sont d'abord restaurés.
+        """
+        try:
+            threshold = float(self.options.get("deferred_index_threshold") or DEFAULT_THRESHOLD)
+        except ValueError:
+            threshold = DEFAULT_THRESHOLD
+        try:
+            restore_pending(conn, schema, self.id_source, self.build_workers(), self.log)
+        except DeferredIndexError as e:
+            self.log(f"[ERROR] {e}")
+        incoming = {}
+        for path in shp_files:
+            if not self.is_shp_allowed(path):
+                continue
+            features = get_layer_metadata_cache().describe(path).features
+            if features:
+                incoming[get_filename_without_extension(path).lower()] = features
+        with conn.cursor() as cursor:
+            tables = tables_to_defer(cursor, schema, incoming, threshold)
+        conn.rollback()
+        if tables:
+            self.log(f"[INFO] Index reconstruits après le chargement pour : {', '.join(tables)}")
+        self.report["deferred_indexes"] = tables
+        return tables
+
+    def restore_deferred_indexes(self, deferred: DeferredIndexes) -> None:
+        """Reconstruit les index supprimés avant le chargement, que celui-ci ait réussi ou non."""
+        try:
+            with self.timer.stage("reconstruction des index"):
+                deferred.restore()
+        except DeferredIndexError as e:
+            # Les définitions restent enregistrées : le prochain import de la source les reconstruira
+            self.log(f"[ERROR] {e}")
+            self.report["logs"].append(f"Index non reconstruits : {e}")
+
+    def skip_unchanged_layers(self, shp_files: List[str]) -> List[str]:
+        """Retire les couches dont l'empreinte est identique à celle du dernier import de la source."""
+        sources = {get_filename_without_extension(path).lower(): path for path in list_source_shapefiles(self.folder, self.snapshot)}
+        remaining = []
+        for layer_path in shp_files:
+            layer_name = get_filename_without_extension(layer_path).lower()
+            try:
+                self._hashes[layer_name] = layer_content_hash(sources.get(layer_name, layer_path), self.stamp_values)
+            except FileNotFoundError as e:
+                self.log(f"[WARNING] Empreinte impossible pour {layer_name} : {e}")
+                remaining.append(layer_path)
+                continue
+            if self.manifest.is_unchanged(layer_name, self._hashes[layer_name]):
+                self.report["shp_files_unchanged"] = self.report.get("shp_files_unchanged", 0) + 1
+                self.report["logs"].append(f"Inchangé depuis le dernier import, ignoré : {layer_path}")
+                self.log(f"[INFO] Couche inchangée depuis le dernier import, ignorée : {layer_name}")
+            else:
+                remaining.append(layer_path)
+        return remaining
+
+    def replace_previous(self, conn, database: Dict[str, Any], layer_name: str,
+                         shared: bool) -> Optional[Tuple[str, Optional[int]]]:
+        """
+        Avec le manifeste, remplace les entités importées précédemment pour la source.
+
+        Sur une connexion partagée avec le chargeur, la suppression est validée avec le chargement.
+        Pour un chargeur externe (ogr2ogr, gdal), rien n'est supprimé avant le chargement : la clé primaire
+        maximale est relevée, puis finish_replacement supprime les anciennes entités une fois le chargement vérifié.
+
+        Returns:
+            Tuple: Limite à passer à finish_replacement (None si rien n'est à remplacer ensuite)
+
+        Raises:
+            LoaderError: Si la table n'a pas de clé primaire entière (anciennes et nouvelles entités indiscernables)
+        """
+        if self.manifest is None or self.staging is not None:
+            return None
+        with conn.cursor() as cursor:
+            if shared:
+                deleted = self.manifest.delete_previous(cursor, database['schema'], layer_name)
+                if deleted:
+                    self.log(f"[INFO] {deleted} entité(s) de l'import précédent remplacée(s) dans {layer_name}")
+                return None
+            if 'id_source' not in get_table_columns(cursor, database['schema'], layer_name):
+                conn.commit()
+                return None
+            boundary = self.manifest.key_boundary(cursor, database['schema'], layer_name)
+        conn.commit()
+        if boundary is None:
+            raise LoaderError(f"{layer_name} n'a pas de clé primaire entière : l'import précédent ne peut pas être "
+                              f"remplacé sans risque avec ce chargeur (utiliser le mode d'import 'staged').")
+        return boundary
+
+    def finish_replacement(self, conn, database: Dict[str, Any], layer_name: str,
+                           boundary: Optional[Tuple[str, Optional[int]]], verified: bool) -> None:
+        """
+        Après un chargement externe : supprime les entités de l'import précédent si le chargement est vérifié,
+        sinon les entités partiellement chargées (l'import précédent est alors conservé intact).
+        """
+        if boundary is None:
+            return
+        with conn.cursor() as cursor:
+            if verified:
+                deleted = self.manifest.delete_previous(cursor, database['schema'], layer_name, boundary)
+            else:
+                removed = self.manifest.delete_loaded(cursor, database['schema'], layer_name, boundary)
+        conn.commit()
+        if verified and deleted:
+            self.log(f"[INFO] {deleted} entité(s) de l'import précédent remplacée(s) dans {layer_name}")
+        elif not verified:
+            self.log(f"[WARNING] Chargement de {layer_name} annulé ({removed} entité(s) retirée(s)), "
+                     f"import précédent conservé")
+
+    def record_loaded(self, conn, layer_name: str, feature_count: int) -> None:
+        """Enregistre l'empreinte d'une couche chargée (à la validation du transfert en mode par étape)."""
+        if self.manifest is None or layer_name not in self._hashes:
+            return
+        self._loaded[layer_name] = feature_count
+        if self.staging is None:
+            with conn.cursor() as cursor:
+                self.manifest.record(cursor, layer_name, self._hashes[layer_name], feature_count)
+            conn.commit()
+
+    def _record_staged(self, cursor) -> None:
+        for layer_name, feature_count in self._loaded.items():
+            self.manifest.record(cursor, layer_name, self._hashes[layer_name], feature_count)
+
+    def stamp_layers(self, shp_files: List[str], stamper: AttributeStamper, stamping_mode: str) -> None:
+        """Marque les attributs de chaque couche préparée avant son import (pipeline QGIS)."""
+        for layer_path in shp_files:
+            self.check_cancelled()
+            self.log(f"[INFO] Traitement de la couche : {layer_path}")
+            try:
+                layer_edit = QgsVectorLayer(layer_path, '', 'ogr')
+                if not layer_edit.isValid():
+                    self.report["shp_files_errors"] += 1
+                    self.log(f"[ERROR] Couche invalide {layer_path}")
+                    self.report["logs"].append(f"Erreur : Couche invalide {layer_path}")
+                    continue
+                # Réutilisé par le chargement et le compte rendu, sans rouvrir la couche
+                get_layer_metadata_cache().put_from_layer(layer_path, layer_edit)
+
+                layer_name = get_filename_without_extension(layer_path).lower()
+                with self.timer.stage("marquage", layer_name):
+                    stamp_result = stamper.stamp(layer_edit, mode=stamping_mode)
+                self.report["stamping"][layer_name] = stamp_result
+
+                self.report["shp_files_processed"] += 1
+                if stamp_result["modified"]:
+                    self.report["modified_layers"] += 1
+                    self.report["logs"].append(f"Modifié : {layer_path}")
+                else:
+                    self.report["added_layers"] += 1
+                    self.report["logs"].append(f"Ajouté (pas de modif détectée) : {layer_path}")
+            except StampingError as e:
+                self.log(f"[ERROR] {str(e)}")
+                self.report["shp_files_errors"] += 1
+                self.report["logs"].append(f"Erreur sur {layer_path} : {str(e)}")
+            except Exception as e:
+                self.log(f"[ERROR] Erreur lors de la modification de la couche {layer_path} :\n{str(e)}")
+                self.report["shp_files_errors"] += 1
+                self.report["logs"].append(f"Erreur sur {layer_path} : {str(e)}")
+            finally:
+                self._step()
+
+    def load_layers(self, shp_files: List[str], database: Dict[str, Any], conn) -> None:
+        """Import des couches préparées dans PostgreSQL-PostGIS avec le chargeur configuré."""
+        loader_backend = self.options.get("loader_backend") or "ogr2ogr"
+        self.report["loader_backend"] = loader_backend
+        self.log(f"[INFO] Chargeur utilisé : {loader_backend}")
+        if loader_backend == "gdal":
+            loader = GdalLoader(database, id_source=self.id_source)
+        elif loader_backend == "copy":
+            loader = ShapefileCopyLoader(database, copy_format=self.options.get("copy_format") or "binary", conn=conn)
+        else:
+            loader = None
+        try:
+            for layer in shp_files:
+                self.check_cancelled()
+                try:
+                    self.log(f"[INFO] importing layer {layer}")
+                    self.upload_layer(layer, database, loader=loader, conn=conn)
+                    self.log(f"[INFO] layer imported succesfuly ({layer})")
+                    self.report["logs"].append(f"Import réussi : {layer}")
+                except Exception as e:
+                    self.report["shp_files_errors"] += 1
+                    self.log(f"[INFO] Error importing layer {layer}: {str(e)}")
+                    self.report["logs"].append(f"Erreur d'import sur {layer} : {str(e)}")
+                finally:
+                    self._step()
+        finally:
+            if loader is not None:
+                loader.close()
+
+    def count_features(self, conn, schema: str, table: str) -> int:
+        """
+        Compte les entités de la source importée (filtre sur la colonne id_source, si elle existe) :
+        le coût dépend de la taille de l'import et non de celle de la table.
+        """
+        cur = conn.cursor()
+        try:
+            query = sql.SQL("SELECT COUNT(*) FROM {}.{}").format(sql.Identifier(schema), sql.Identifier(table))
+            params = ()
+            if 'id_source' in get_table_columns(cur, schema, table):
+                query = query + sql.SQL(" WHERE id_source = %s")
+                params = (self.id_source,)
+            else:
+                self.log(f"[WARNING] Pas de colonne id_source dans {schema}.{table}, comptage complet de la table")
+            with self.timer.stage("comptage", table):
+                cur.execute(query, params)
+                count = cur.fetchone()[0]
+                conn.commit()
+        finally:
+            cur.close()
+        return count
+
+    def upload_layer(self, shpfile: str, database: Dict[str, Any], loader=None, conn=None) -> None:
+        if not self.is_shp_allowed(shpfile):
+            self.log(f"[WARNING] Le shapefile {shpfile} n'est pas dans la liste des types autorisés. Ignoré.")
+            self.report['shp_files_ignored'] = self.report['shp_files_ignored'] + 1
+            return
+
+        # Métadonnées capturées au marquage, ou lues dans les en-têtes : la couche n'est pas rechargée dans QGIS
+        metadata = get_layer_metadata_cache().describe(shpfile)
+        if metadata.errors:
+            self.log(f"[ERROR] Failed to load the shapefile : {shpfile}. {'; '.join(metadata.errors)}")
+            return
+
+        layer_name = get_filename_without_extension(shpfile).lower()
+        expected = metadata.features  # X
+        self.report.setdefault('layer_metadata', {})[layer_name] = {
+            'features': metadata.features,
+            'geometry_type': metadata.geometry_type,
+            'crs': metadata.crs,
+            'fields': len(metadata.fields),
+            'source': metadata.source,
+        }
+
+        geometry_type = metadata.geometry_type
+        self.log(f"[INFO] Geometry Type: {geometry_type}.\n[INFO] layer name : {layer_name}")
+
+        if str(geometry_type) in ("1", "3"):
+            nlt = "PROMOTE_TO_MULTI"
+        elif str(geometry_type) == "0":
+            nlt = "POINT"
+        else:
+            self.log(f"Geometry type of {shpfile} is unknown. Aborting.")
+            return
+        nlt_arg = f"-nlt {nlt}"
+        layer_type = get_layer_registry().get(layer_name)
+        fid_column = layer_type.fid_column if layer_type is not None else f"ID_{get_suffix_after_last_underscore(shpfile)}"
+
+        if loader is not None:
+            # Chargement en mémoire, une transaction par couche ; written est mesuré (gdal) ou confirmé par COPY
+            boundary = self.replace_previous(conn, database, layer_name, shared=isinstance(loader, ShapefileCopyLoader))
+            try:
+                with self.timer.stage(f"chargement {self.options.get('loader_backend')}", layer_name):
+                    result = loader.load_layer(shpfile, layer_name, fid_column, nlt)
+            except Exception:
+                self.finish_replacement(conn, database, layer_name, boundary, verified=False)
+                raise
+            self.report.setdefault('load_results', {})[layer_name] = result
+            self.report.setdefault('entities_per_layer', {})[layer_name] = (result['written'], result['expected'])
+            for warning in result['warnings']:
+                self.log(f"[WARNING] {layer_name} : {warning}")
+            verified = not result['errors'] and result['written'] == result['expected']
+            self.finish_replacement(conn, database, layer_name, boundary, verified)
+            if result['errors']:
+                raise LoaderError("; ".join(result['errors']))
+            if not verified:
+                raise LoaderError(f"{result['written']}/{result['expected']} entité(s) chargée(s) pour {layer_name}")
+            self.log(f"[INFO] Chargement : {result['written']}/{result['expected']} entité(s) en {result['seconds']:.3f}s")
+            self._touched.add(layer_name)
+            self.record_loaded(conn, layer_name, result['written'])
+            return
+
+        boundary = self.replace_previous(conn, database, layer_name, shared=False)
+
+        # 1. Compter avant import (entités de la source uniquement)
+        count_before = self.count_features(conn, database['schema'], layer_name)
+
+        password = database['password']
+        password = password.replace('"', '\\"')
+        ogr2ogr_exe = "ogr2ogr.exe" if sys.platform.startswith('win') else "ogr2ogr"
+        command = f"""{ogr2ogr_exe} -f PostgreSQL "PG:dbname='{database["dbname"]}' host={database["host"]} port={database["port"]} sslmode=disable user={database['user']} password={password}" -lco DIM=2 {shpfile} {get_filename_without_extension(shpfile)} -append -lco GEOMETRY_NAME=geom -lco FID={fid_column} -nln {database['schema']}.{layer_name} -a_srs EPSG:2154 {nlt_arg}"""
+        safe_command = command.replace(
+            f"password={password}",
+            "password=[PASSWORD HIDDEN FOR SECURITY REASONS]"
+        )
+
+        with self.timer.stage("ogr2ogr", layer_name):
+            status = os.system(command)
+        self.log(f"[INFO] Command executed {safe_command}.")
+
+        # 2. Compter après import
+        count_after = self.count_features(conn, database['schema'], layer_name)
+        inserted = count_after - count_before  # Y
+
+        # 3. Stocker dans le rapport
+        self.report.setdefault('entities_per_layer', {})[layer_name] = (inserted, expected)
+        verified = status == 0 and inserted == expected
+        self.finish_replacement(conn, database, layer_name, boundary, verified)
+        if inserted:
+            self._touched.add(layer_name)
+        if not verified:
+            raise LoaderError(f"ogr2ogr a retourné le code {status} pour {layer_name} : "
+                              f"{inserted}/{expected} entité(s) chargée(s)")
+        self.record_loaded(conn, layer_name, inserted)
+
+    def run_columnar_import(self, shp_files: List[str], database: Dict[str, Any], conn) -> None:
+        """
+        Pipeline en colonnes : chaque couche est lue une fois, marquée en vectoriel
+        puis envoyée par COPY, sans réécriture des shapefiles sur le disque.
+        """
+        importer = ColumnarImporter(conn, database["schema"], self.stamp_values)
+        for layer_path in shp_files:
+            self.check_cancelled()
+            try:
+                if not self.is_shp_allowed(layer_path):
+                    self.log(f"[WARNING] Le shapefile {layer_path} n'est pas dans la liste des types autorisés. Ignoré.")
+                    self.report['shp_files_ignored'] += 1
+                    continue
+
+                layer_name = get_filename_without_extension(layer_path).lower()
+                self.log(f"[INFO] importing layer {layer_path}")
+                try:
+                    self.replace_previous(conn, database, layer_name, shared=True)
+                    with self.timer.stage("chargement en colonnes", layer_name):
+                        result = importer.import_layer(layer_path, layer_name)
+                except Exception as e:
+                    self.report["shp_files_errors"] += 1
+                    self.log(f"[ERROR] Error importing layer {layer_path}: {str(e)}")
+                    self.report["logs"].append(f"Erreur d'import sur {layer_path} : {str(e)}")
+                    continue
+            finally:
+                self._step()
+
+            self.report["shp_files_processed"] += 1
+            if result["modified"]:
+                self.report["modified_layers"] += 1
+                self.report["logs"].append(f"Modifié : {layer_path}")
+            else:
+                self.report["added_layers"] += 1
+                self.report["logs"].append(f"Ajouté (pas de modif détectée) : {layer_path}")
+            self.report.setdefault('entities_per_layer', {})[layer_name] = (result["written"], result["expected"])
+            self._touched.add(layer_name)
+            self.record_loaded(conn, layer_name, result["written"])
+            self.log(f"[INFO] layer imported succesfuly ({layer_path}) : {result['written']}/{result['expected']} en {result['seconds']:.3f}s")
+            self.report["logs"].append(f"Import réussi : {layer_path}")
+
+    def commit_staged_import(self, staging: StagedImport) -> None:
+        """
+        Termine un import par schéma de préparation : ajout de la ligne basedoc, validation,
+        puis transfert de toutes les tables vers le schéma cible en une seule transaction.
+        """
+        if self.report["shp_files_errors"]:
+            raise StagingError(
+                f"{self.report['shp_files_errors']} couche(s) en erreur : import annulé, aucune donnée n'a été transférée.")
+        staging.stage_basedoc(self.basedoc_row)
+        expected = {layer: counts[1] for layer, counts in self.report.get('entities_per_layer', {}).items()}
+        problems = staging.validate(expected)
+        if problems:
+            raise StagingError("Validation du schéma de préparation échouée, aucune donnée n'a été transférée :\n"
+                               + "\n".join(problems))
+        with self.timer.stage("transfert"):
+            moved = staging.commit_to_target(replace_id_source=self.manifest is not None,
+                                             on_commit=self._record_staged if self.manifest is not None else None,
+                                             deferred_tables=self._deferred_tables,
+                                             build_workers=self.build_workers())
+        self.report['staged_rows'] = moved
+        self._touched.update(moved)
+        for layer, rows in moved.items():
+            self.log(f"[INFO] {rows} ligne(s) transférée(s) dans {staging.target_schema}.{layer}")
+
+
+class ImportTask(QgsTask):
+    """
+    Exécute un ImportPipeline dans le gestionnaire de tâches de QGIS.
+
+    Les messages de la console, l'avancement et le compte rendu sont transmis au fil de
+    l'eau par des signaux, reçus dans le thread de l'interface.
+    """
+
+    logMessage = pyqtSignal(str)
+    importSucceeded = pyqtSignal(object)
+    importFailed = pyqtSignal(str, object)
+
+    def __init__(self, pipeline: ImportPipeline, description: str = "DourBase : import"):
+        super().__init__(description, QgsTask.CanCancel)
+        self.pipeline = pipeline
+        pipeline._log = self.logMessage.emit
+        pipeline._progress = self.setProgress
+        pipeline._is_cancelled = self.isCanceled
+        self.error = None
+        self.details = None
+
+    def run(self) -> bool:
+        try:
+            self.pipeline.run()
+            return True
+        except Exception as e:
+            self.error = str(e)
+            self.details = traceback.format_exc()
+            logger.error(f"[import_pipeline] [ImportTask.run] {self.details}")
+            return False
+
+    def finished(self, result: bool) -> None:
+        if result:
+            self.importSucceeded.emit(self.pipeline.report)
+        else:
+            self.importFailed.emit(self.error or "Import annulé.", self.pipeline.report)
@@ -0,0 +1,113 @@
+import logging
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Optional, Tuple
+
+from .shp_inspector import inspect_shapefile
+
+logger = logging.getLogger('DourBase')
+
+DEFAULT_MAX_ENTRIES = 512
+
+# Métadonnées d'une couche :
+#   features : nombre d'entités ; geometry_type : code QGIS (0 point, 1 ligne, 2 polygone, 4 sans géométrie)
+#   fields : noms des champs ; crs : identifiant du SCR ('EPSG:2154'), None s'il est inconnu
+#   source : 'qgis' (couche ouverte dans QGIS) ou 'headers' (en-têtes des fichiers) ; errors : problèmes détectés
+LayerMetadata = namedtuple('LayerMetadata', ['path', 'features', 'geometry_type', 'fields', 'crs', 'source', 'errors'])
+
+
+def _stat_key(path: str) -> Tuple[str, int, int]:
+    """Clé de cache : chemin, taille et date du .shp (le marquage ne réécrit que le .dbf)."""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+class LayerMetadataCache:
+    """
+    Cache des métadonnées des couches, par chemin, taille et date de modification du .shp.
+
+    Les métadonnées sont capturées à la première ouverture de la couche (marquage des attributs)
+    puis réutilisées par le chargement et le compte rendu, sans rouvrir la couche dans QGIS.
+    À défaut, elles sont lues dans les en-têtes des fichiers.
+
+    Args:
+        max_entries (int): Nombre maximal de couches conservées (les plus anciennes sont oubliées)
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, LayerMetadata]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, key: Tuple, metadata: LayerMetadata) -> LayerMetadata:
+        with self._lock:
+            self._entries[key] = metadata
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return metadata
+
+    def get(self, path: str) -> Optional[LayerMetadata]:
+        """Métadonnées en cache, None si la couche est inconnue ou a été modifiée depuis."""
+        try:
+            key = _stat_key(path)
+        except OSError:
+            return None
+        with self._lock:
+            metadata = self._entries.get(key)
+            if metadata is not None:
+                self._entries.move_to_end(key)
+        return metadata
+
+    def put_from_layer(self, path: str, layer) -> LayerMetadata:
+        """Capture les métadonnées d'une QgsVectorLayer valide, déjà ouverte."""
+        crs = layer.crs()
+        metadata = LayerMetadata(
+            path=path,
+            features=layer.featureCount(),
+            geometry_type=int(layer.geometryType()),
+            fields=tuple(field.name() for field in layer.fields()),
+            crs=crs.authid() if crs.isValid() else None,
+            source='qgis',
+            errors=(),
+        )
+        return self._store(_stat_key(path), metadata)
+
+    def describe(self, path: str) -> LayerMetadata:
+        """Métadonnées en cache, ou lues dans les en-têtes du .shp, du .shx et du .dbf."""
+        metadata = self.get(path)
+        if metadata is not None:
+            logger.debug(f"[layer_metadata] [describe] Lecture depuis le cache : {path}")
+            return metadata
+        info = inspect_shapefile(path)
+        metadata = LayerMetadata(
+            path=path,
+            features=info['features'],
+            geometry_type=info['geometry_type'],
+            fields=tuple(field['name'] for field in info['fields']),
+            crs=None,
+            source='headers',
+            errors=tuple(info['errors']),
+        )
+        try:
+            return self._store(_stat_key(path), metadata)
+        except OSError:
+            return metadata
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache: Optional[LayerMetadataCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_layer_metadata_cache() -> LayerMetadataCache:
+    """Retourne le cache partagé du plugin."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LayerMetadataCache()
+        return _cache
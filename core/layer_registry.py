@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+from collections import namedtuple
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .shp_inspector import ShapefileHeaderError, inspect_shapefile
+
+logger = logging.getLogger('DourBase')
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHP_TYPE_FILE = os.path.join(PLUGIN_DIR, "config", "shp_type.txt")
+BLANK_DIR = os.path.join(PLUGIN_DIR, "SHPS", "blank")
+
+# Type de couche autorisé :
+#   name : nom tel qu'écrit dans shp_type.txt ; table : table cible (nom en minuscules)
+#   network : réseau (AEP, EU, EPL) ; fid_column : colonne FID passée aux chargeurs (ID_<suffixe>)
+#   geometry_kind : 'point', 'line', 'polygon' ou None (lu dans la couche vide de SHPS/blank)
+#   expected_fields : champs de la couche vide de SHPS/blank (vide si elle est absente)
+LayerType = namedtuple('LayerType', ['name', 'table', 'network', 'fid_column', 'geometry_kind', 'expected_fields'])
+
+_GEOMETRY_KINDS = {0: 'point', 1: 'line', 2: 'polygon'}
+
+
+def _describe_blank(name: str, blank_dir: str) -> Tuple[Optional[str], Tuple[str, ...]]:
+    for candidate in (name, name.lower(), name.upper()):
+        path = os.path.join(blank_dir, f"{candidate}.shp")
+        if os.path.isfile(path):
+            info = inspect_shapefile(path)
+            return (_GEOMETRY_KINDS.get(info['geometry_type']),
+                    tuple(field['name'] for field in info['fields']))
+    return None, ()
+
+
+class LayerTypeRegistry:
+    """
+    Types de couches autorisés (config/shp_type.txt), lus une seule fois.
+
+    Le fichier est relu uniquement si sa date de modification change. La recherche se fait
+    dans un frozenset de noms en minuscules ; chaque type est associé à sa table cible, sa
+    colonne FID, son type de géométrie et ses champs attendus (couche vide de SHPS/blank).
+
+    Args:
+        path (str): Fichier des types autorisés
+        blank_dir (str): Dossier des couches vides de référence
+    """
+
+    def __init__(self, path: str = SHP_TYPE_FILE, blank_dir: str = BLANK_DIR):
+        self.path = path
+        self.blank_dir = blank_dir
+        self._mtime = None
+        self._names: List[str] = []
+        self._allowed: FrozenSet[str] = frozenset()
+        self._types: Dict[str, LayerType] = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        """
+        Relit le fichier si sa date de modification a changé.
+
+        Raises:
+            OSError: Si le fichier est illisible
+        """
+        mtime = os.path.getmtime(self.path)
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                names = [line.strip() for line in f if line.strip()]
+            types = {}
+            for name in names:
+                try:
+                    geometry_kind, fields = _describe_blank(name, self.blank_dir)
+                except (OSError, ShapefileHeaderError):
+                    geometry_kind, fields = None, ()
+                types[name.lower()] = LayerType(
+                    name=name,
+                    table=name.lower(),
+                    network=name.split('_', 1)[0].upper(),
+                    fid_column=f"ID_{name.split('_')[-1]}",
+                    geometry_kind=geometry_kind,
+                    expected_fields=fields,
+                )
+            self._names = names
+            self._types = types
+            self._allowed = frozenset(types)
+            self._mtime = mtime
+        logger.info(f"[layer_registry] [_refresh] {len(names)} type(s) de couche chargé(s) depuis {self.path}")
+
+    @property
+    def names(self) -> List[str]:
+        """Types autorisés, dans l'ordre et la casse du fichier."""
+        self._refresh()
+        return list(self._names)
+
+    @property
+    def allowed(self) -> FrozenSet[str]:
+        """Noms des types autorisés, en minuscules."""
+        self._refresh()
+        return self._allowed
+
+    def is_allowed(self, layer: str) -> bool:
+        """layer : nom de couche ou chemin d'un shapefile (insensible à la casse)."""
+        return os.path.splitext(os.path.basename(layer))[0].lower() in self.allowed
+
+    def get(self, layer: str) -> Optional[LayerType]:
+        self._refresh()
+        return self._types.get(os.path.splitext(os.path.basename(layer))[0].lower())
+
+
+_registries: Dict[str, LayerTypeRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_layer_registry(path: Optional[str] = None) -> LayerTypeRegistry:
+    """Registre partagé pour un fichier de types (config/shp_type.txt par défaut)."""
+    path = os.path.abspath(path or SHP_TYPE_FILE)
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = LayerTypeRegistry(path)
+        return _registries[path]
@@ -0,0 +1,335 @@
+import logging
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import psycopg2
+from osgeo import gdal, ogr
+
+from .pg_copy import (DEFAULT_SRID, GEOMETRY_COLUMN, copy_rows, create_table, describe_layer, ewkb_from_wkb,
+                      get_table_columns, launder, supports_binary)
+
+logger = logging.getLogger('DourBase')
+
+LOADER_BACKENDS = ('ogr2ogr', 'gdal', 'copy')
+
+
+class LoaderError(Exception):
+    """Exception levée lorsqu'un chargeur ne peut pas accéder à la base de données."""
+    pass
+
+
+def pg_connection_string(database: Dict[str, Any]) -> str:
+    """Construit la chaîne 'PG:' utilisée par GDAL à partir du dictionnaire de connexion."""
+    def quote(value):
+        return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+    return (
+        f"PG:dbname={quote(database['dbname'])} host={quote(database['host'])} port={quote(database['port'])} "
+        f"sslmode=disable user={quote(database['user'])} password={quote(database['password'])}"
+    )
+
+
+class _ErrorCollector:
+    """Gestionnaire d'erreurs GDAL qui conserve les messages au lieu de les afficher."""
+
+    def __init__(self):
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+
+    def __call__(self, err_class, err_no, message):
+        if err_class in (gdal.CE_Failure, gdal.CE_Fatal):
+            self.errors.append(message)
+        elif err_class == gdal.CE_Warning:
+            self.warnings.append(message)
+
+
+class GdalLoader:
+    """
+    Chargeur des shapefiles préparés basé sur gdal.VectorTranslate, sans processus externe.
+
+    La source PostgreSQL est ouverte une seule fois et réutilisée pour toutes les couches.
+    Chaque couche est chargée dans une transaction unique (-gt unlimited) : en cas d'erreur,
+    rien n'est écrit. Le nombre d'entités écrites est mesuré dans la table cible (entités
+    de id_source avant et après le chargement), comme pour ogr2ogr.
+
+    Args:
+        database (Dict): Paramètres de connexion (host, port, dbname, user, password, schema)
+        id_source (str): Identifiant de la source importée (None : la table entière est comptée)
+    """
+
+    def __init__(self, database: Dict[str, Any], id_source: Optional[str] = None):
+        self.database = database
+        self.id_source = id_source
+        self._ds = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def open(self):
+        if self._ds is not None:
+            return self._ds
+        collector = _ErrorCollector()
+        gdal.PushErrorHandler(collector)
+        try:
+            self._ds = gdal.OpenEx(pg_connection_string(self.database), gdal.OF_VECTOR | gdal.OF_UPDATE)
+        except RuntimeError as e:
+            collector.errors.append(str(e))
+        finally:
+            gdal.PopErrorHandler()
+        if self._ds is None:
+            raise LoaderError("Impossible d'ouvrir la base de données : " + "; ".join(collector.errors or ["erreur inconnue"]))
+        logger.info(f"[loaders] [GdalLoader.open] Connexion ouverte sur {self.database['dbname']}@{self.database['host']}")
+        return self._ds
+
+    def close(self):
+        if self._ds is not None:
+            self._ds.FlushCache()
+            self._ds = None
+            logger.info("[loaders] [GdalLoader.close] Connexion fermée")
+
+    def count_rows(self, layer_name: str) -> Optional[int]:
+        """
+        Entités de schema.layer_name, limitées à id_source si la table a cette colonne.
+
+        Returns:
+            int: Nombre d'entités (0 si la table n'existe pas encore), None si le comptage a échoué
+        """
+        collector = _ErrorCollector()
+        gdal.PushErrorHandler(collector)
+        try:
+            layer = self.open().GetLayerByName(f"{self.database['schema']}.{layer_name}")
+            if layer is None:
+                return 0
+            if self.id_source is not None and layer.GetLayerDefn().GetFieldIndex('id_source') >= 0:
+                layer.SetAttributeFilter("id_source = '" + str(self.id_source).replace("'", "''") + "'")
+            try:
+                count = layer.GetFeatureCount()
+            finally:
+                layer.SetAttributeFilter(None)
+        except RuntimeError as e:
+            collector.errors.append(str(e))
+            count = -1
+        finally:
+            gdal.PopErrorHandler()
+        if count < 0:
+            logger.warning(f"[loaders] [GdalLoader.count_rows] Comptage impossible dans {layer_name} : {collector.errors}")
+            return None
+        return count
+
+    def load_layer(self, shpfile: str, layer_name: str, fid_column: str, nlt: str) -> Dict[str, Any]:
+        """
+        Ajoute une couche dans schema.layer_name avec la sémantique de la commande ogr2ogr historique.
+
+        Args:
+            shpfile (str): Chemin du shapefile préparé
+            layer_name (str): Nom de la table cible (sans schéma)
+            fid_column (str): Colonne FID passée en -lco FID=
+            nlt (str): Valeur de -nlt ('PROMOTE_TO_MULTI' ou 'POINT')
+
+        Returns:
+            Dict: {'layer', 'expected', 'written' (mesuré dans la table cible), 'errors', 'warnings', 'seconds'}
+        """
+        start = time.perf_counter()
+        src = ogr.Open(shpfile, 0)
+        if src is None:
+            raise LoaderError(f"Impossible d'ouvrir la couche {shpfile}")
+        src_layer = src.GetLayer(0)
+        expected = src_layer.GetFeatureCount()
+        count_before = self.count_rows(layer_name)
+
+        options = gdal.VectorTranslateOptions(options=[
+            '-append',
+            '-gt', 'unlimited',
+            '-lco', 'DIM=2',
+            '-lco', 'GEOMETRY_NAME=geom',
+            '-lco', f'FID={fid_column}',
+            '-nln', f"{self.database['schema']}.{layer_name}",
+            '-a_srs', 'EPSG:2154',
+            '-nlt', nlt,
+            src_layer.GetName(),
+        ])
+
+        collector = _ErrorCollector()
+        gdal.PushErrorHandler(collector)
+        try:
+            ok = gdal.VectorTranslate(self.open(), src, options=options)
+        except RuntimeError as e:
+            ok = None
+            collector.errors.append(str(e))
+        finally:
+            gdal.PopErrorHandler()
+            src = None
+
+        if not ok and not collector.errors:
+            collector.errors.append(gdal.GetLastErrorMsg() or "VectorTranslate a échoué sans message")
+
+        count_after = self.count_rows(layer_name)
+        if count_before is None or count_after is None:
+            written = 0
+            collector.errors.append(f"Nombre d'entités écrites dans {layer_name} impossible à mesurer")
+        else:
+            written = count_after - count_before
+
+        result = {
+            'layer': layer_name,
+            'expected': expected,
+            'written': written,
+            'errors': collector.errors,
+            'warnings': collector.warnings,
+            'seconds': time.perf_counter() - start,
+        }
+        if collector.errors:
+            logger.error(f"[loaders] [GdalLoader.load_layer] {layer_name} : {collector.errors}")
+        else:
+            logger.info(f"[loaders] [GdalLoader.load_layer] {written}/{expected} entité(s) chargée(s) dans {layer_name} en {result['seconds']:.3f}s")
+        return result
+
+
+def _field_value(feat, index: int, field_type: int):
+    """Lit la valeur typée d'un champ OGR (None si nul)."""
+    if not feat.IsFieldSetAndNotNull(index):
+        return None
+    if field_type == ogr.OFTInteger:
+        return feat.GetFieldAsInteger(index)
+    if field_type == ogr.OFTInteger64:
+        return feat.GetFieldAsInteger64(index)
+    if field_type == ogr.OFTReal:
+        return feat.GetFieldAsDouble(index)
+    if field_type == ogr.OFTDate:
+        year, month, day = feat.GetFieldAsDateTime(index)[:3]
+        return date(year, month, day)
+    if field_type == ogr.OFTDateTime:
+        year, month, day, hour, minute, second = feat.GetFieldAsDateTime(index)[:6]
+        return datetime(year, month, day, hour, minute, int(second), int(round((second % 1) * 1000000)) % 1000000)
+    return feat.GetFieldAsString(index)
+
+
+class ShapefileCopyLoader:
+    """
+    Chargeur des shapefiles préparés par COPY ... FROM STDIN, sans ogr2ogr.
+
+    Les entités sont lues avec OGR et envoyées en EWKB avec leurs attributs dans un unique
+    flux COPY par couche (format binaire ou texte), dans une transaction par couche.
+    Les conventions de upload_to_db sont conservées : géométrie dans 'geom' (2D, EPSG:2154),
+    colonne FID 'id_<suffixe>' laissée à la séquence de la table.
+
+    Args:
+        database (Dict): Paramètres de connexion (host, port, dbname, user, password, schema)
+        copy_format (str): 'binary' (défaut) ou 'text'
+        conn: Connexion psycopg2 déjà ouverte à réutiliser (optionnel)
+    """
+
+    def __init__(self, database: Dict[str, Any], copy_format: str = 'binary', conn=None):
+        self.database = database
+        self.copy_format = copy_format
+        self._conn = conn
+        self._owns_conn = conn is None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def open(self):
+        if self._conn is None:
+            self._conn = psycopg2.connect(
+                host=self.database["host"],
+                dbname=self.database["dbname"],
+                user=self.database["user"],
+                password=self.database["password"],
+                port=self.database["port"]
+            )
+        return self._conn
+
+    def close(self):
+        if self._owns_conn and self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def load_layer(self, shpfile: str, layer_name: str, fid_column: str, nlt: str) -> Dict[str, Any]:
+        """
+        Ajoute une couche dans schema.layer_name par un unique COPY.
+
+        Returns:
+            Dict: {'layer', 'expected', 'written', 'errors', 'warnings', 'seconds'}
+        """
+        start = time.perf_counter()
+        schema = self.database['schema']
+        errors: List[str] = []
+        warnings: List[str] = []
+        written = 0
+
+        src = ogr.Open(shpfile, 0)
+        if src is None:
+            raise LoaderError(f"Impossible d'ouvrir la couche {shpfile}")
+        src_layer = src.GetLayer(0)
+        info = describe_layer(src_layer)
+
+        conn = self.open()
+        cursor = conn.cursor()
+        try:
+            target = get_table_columns(cursor, schema, layer_name)
+            if not target:
+                create_table(cursor, schema, layer_name, info, DEFAULT_SRID, fid_column=fid_column)
+                target = get_table_columns(cursor, schema, layer_name)
+
+            fid = launder(fid_column)
+            selected = [
+                (index, field) for index, field in enumerate(info['fields'])
+                if launder(field['name']) in target and launder(field['name']) not in (fid, GEOMETRY_COLUMN)
+            ]
+            ignored = [field['name'] for field in info['fields'] if launder(field['name']) not in target]
+            if ignored:
+                warnings.append(f"Champs absents de la table cible, ignorés : {', '.join(ignored)}")
+
+            columns = [launder(field['name']) for _, field in selected] + [GEOMETRY_COLUMN]
+            udt_names = [target[column] for column in columns]
+            copy_format = self.copy_format
+            if copy_format == 'binary' and not supports_binary(udt_names):
+                unsupported = sorted({udt for udt in udt_names if not supports_binary([udt])})
+                warnings.append(f"Types sans encodage binaire ({', '.join(unsupported)}), COPY au format texte")
+                copy_format = 'text'
+
+            promote = nlt == 'PROMOTE_TO_MULTI'
+
+            def rows():
+                src_layer.ResetReading()
+                for feat in src_layer:
+                    values = [_field_value(feat, index, field['type']) for index, field in selected]
+                    geom = feat.GetGeometryRef()
+                    values.append(ewkb_from_wkb(geom.ExportToWkb(ogr.wkbNDR), DEFAULT_SRID, promote)
+                                  if geom is not None else None)
+                    yield values
+
+            written = copy_rows(cursor, schema, layer_name, columns, udt_names, rows(), copy_format)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            errors.append(str(e))
+            written = 0
+        finally:
+            cursor.close()
+            src = None
+
+        result = {
+            'layer': layer_name,
+            'expected': info['feature_count'],
+            'written': written,
+            'errors': errors,
+            'warnings': warnings,
+            'seconds': time.perf_counter() - start,
+        }
+        if errors:
+            logger.error(f"[loaders] [ShapefileCopyLoader.load_layer] {layer_name} : {errors}")
+        else:
+            logger.info(f"[loaders] [ShapefileCopyLoader.load_layer] {written} entité(s) copiée(s) dans {layer_name} en {result['seconds']:.3f}s")
+        return result
@@ -0,0 +1,111 @@
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from psycopg2 import sql
+
+from .deferred_indexes import pending_tables
+from .pg_copy import GEOMETRY_COLUMN, get_table_columns
+
+logger = logging.getLogger('DourBase')
+
+ID_SOURCE_COLUMN = 'id_source'
+
+
+def index_name(table: str, suffix: str) -> str:
+    """Nom d'index <table>_<suffixe>, tronqué à 63 caractères (limite PostgreSQL)."""
+    return f"{table[:63 - len(suffix) - 1]}_{suffix}"
+
+
+def indexed_columns(cursor, schema: str, table: str) -> Dict[str, set]:
+    """Retourne {colonne: {méthodes d'accès}} pour la première colonne de chaque index de la table."""
+    cursor.execute(
+        """
+        SELECT a.attname, am.amname
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        JOIN pg_am am ON am.oid = ic.relam
+        JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[0]
+        WHERE n.nspname = %s AND t.relname = %s
+        """,
+        (schema, table)
+    )
+    columns: Dict[str, set] = {}
+    for column, method in cursor.fetchall():
+        columns.setdefault(column, set()).add(method)
+    return columns
+
+
+def ensure_indexes(cursor, schema: str, table: str) -> List[str]:
+    """
+    Crée les index manquants : GiST sur la géométrie, B-tree sur id_source.
+    Un index existant sur la colonne (quel que soit son nom) suffit.
+
+    Returns:
+        List[str]: Index créés
+    """
+    columns = get_table_columns(cursor, schema, table)
+    existing = indexed_columns(cursor, schema, table)
+    wanted = []
+    if GEOMETRY_COLUMN in columns and 'gist' not in existing.get(GEOMETRY_COLUMN, set()):
+        wanted.append((index_name(table, f"{GEOMETRY_COLUMN}_gist"), GEOMETRY_COLUMN, 'gist'))
+    if ID_SOURCE_COLUMN in columns and ID_SOURCE_COLUMN not in existing:
+        wanted.append((index_name(table, f"{ID_SOURCE_COLUMN}_idx"), ID_SOURCE_COLUMN, 'btree'))
+    created = []
+    for name, column, method in wanted:
+        cursor.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {}.{} USING {} ({})").format(
+            sql.Identifier(name), sql.Identifier(schema), sql.Identifier(table),
+            sql.SQL(method), sql.Identifier(column)
+        ))
+        created.append(name)
+    return created
+
+
+def finalize_tables(conn, schema: str, tables: Iterable[str],
+                    log: Optional[Callable[[str], None]] = None) -> Dict[str, List[str]]:
+    """
+    Étape de fin d'import, une fois par import sur les seules tables modifiées :
+    création des index manquants, puis ANALYZE de ces tables.
+
+    Chaque table est traitée dans sa propre transaction : un échec est signalé
+    mais n'empêche pas le traitement des autres tables. Les tables dont les index ont été supprimés
+    pour un chargement (par cet import ou un import concurrent) sont ignorées : ces index seront
+    reconstruits sous leur nom d'origine, un index créé ici ferait double emploi.
+
+    Returns:
+        Dict[str, List[str]]: Index créés par table
+    """
+    def report(message):
+        if log is not None:
+            log(message)
+        else:
+            logger.info(f"[maintenance] [finalize_tables] {message}")
+
+    created = {}
+    start = time.perf_counter()
+    try:
+        with conn.cursor() as cursor:
+            deferred = pending_tables(cursor, schema)
+        conn.rollback()
+    except Exception as e:
+        conn.rollback()
+        report(f"[WARNING] Index différés non vérifiés, maintenance annulée : {e}")
+        return created
+    for table in sorted(set(tables)):
+        if table in deferred:
+            report(f"[WARNING] {schema}.{table} : index en cours de reconstruction, maintenance ignorée")
+            continue
+        try:
+            with conn.cursor() as cursor:
+                created[table] = ensure_indexes(cursor, schema, table)
+                cursor.execute(sql.SQL("ANALYZE {}.{}").format(sql.Identifier(schema), sql.Identifier(table)))
+            conn.commit()
+            if created[table]:
+                report(f"[INFO] {schema}.{table} : index créé(s) {', '.join(created[table])}")
+        except Exception as e:
+            conn.rollback()
+            report(f"[WARNING] Maintenance de {schema}.{table} impossible : {e}")
+    report(f"[INFO] {len(created)} table(s) analysée(s) en {time.perf_counter() - start:.3f}s")
+    return created
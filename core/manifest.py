@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from psycopg2 import sql
+
+from .pg_copy import get_table_columns
+from .shp_inspector import sidecar_path
+
+logger = logging.getLogger('DourBase')
+
+MANIFEST_TABLE = 'dourbase_manifest'
+# Types (udt_name) acceptés pour la clé qui distingue les entités chargées hors transaction
+INTEGER_TYPES = ('int2', 'int4', 'int8')
+HASHED_EXTENSIONS = ('.shp', '.dbf')
+_CHUNK_SIZE = 1024 * 1024
+
+
+def primary_key_column(cursor, schema: str, table: str) -> Optional[str]:
+    """Colonne de la clé primaire de schema.table, None si elle est absente ou composée."""
+    cursor.execute(
+        """
+        SELECT a.attname
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ANY(i.indkey)
+        WHERE n.nspname = %s AND t.relname = %s AND i.indisprimary
+        """,
+        (schema, table)
+    )
+    rows = cursor.fetchall()
+    return rows[0][0] if len(rows) == 1 else None
+
+
+def stamp_digest(stamp_values: Dict[str, Any]) -> str:
+    """Empreinte des valeurs de marquage : un changement d'auteur, de date... impose un nouvel import."""
+    return hashlib.sha256(json.dumps(stamp_values, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def layer_content_hash(shp_path: str, stamp_values: Dict[str, Any]) -> str:
+    """
+    Empreinte SHA-256 du couple .shp/.dbf d'une couche source et des valeurs de marquage.
+
+    Raises:
+        FileNotFoundError: Si le .shp ou le .dbf est absent
+    """
+    digest = hashlib.sha256()
+    for ext in HASHED_EXTENSIONS:
+        path = sidecar_path(shp_path, ext)
+        if path is None:
+            raise FileNotFoundError(f"Fichier {ext} introuvable pour {shp_path}")
+        digest.update(ext.encode('ascii'))
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    digest.update(stamp_digest(stamp_values).encode('ascii'))
+    return digest.hexdigest()
+
+
+class ImportManifest:
+    """
+    Manifeste des couches importées, stocké dans la table schema.dourbase_manifest.
+
+    Une ligne par (id_source, couche) conserve l'empreinte du contenu importé. Lors d'un nouvel
+    import de la même source, les couches dont l'empreinte est inchangée sont ignorées ; les autres
+    remplacent les entités précédemment importées pour cet id_source.
+
+    Args:
+        conn: Connexion psycopg2 ouverte
+        schema (str): Schéma cible
+        id_source (str): Identifiant de la source importée
+    """
+
+    def __init__(self, conn, schema: str, id_source: str):
+        self.conn = conn
+        self.schema = schema
+        self.id_source = id_source
+        self.entries: Dict[str, str] = {}
+
+    def _table(self) -> sql.Composable:
+        return sql.SQL("{}.{}").format(sql.Identifier(self.schema), sql.Identifier(MANIFEST_TABLE))
+
+    def load(self) -> Dict[str, str]:
+        """Crée la table du manifeste si besoin et lit les empreintes de la source."""
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql.SQL(
+                """
+                CREATE TABLE IF NOT EXISTS {} (
+                    id_source text NOT NULL,
+                    layer text NOT NULL,
+                    content_hash text NOT NULL,
+                    feature_count integer,
+                    imported_at timestamptz NOT NULL DEFAULT now(),
+                    PRIMARY KEY (id_source, layer)
+                )
+                """
+            ).format(self._table()))
+            cursor.execute(sql.SQL("SELECT layer, content_hash FROM {} WHERE id_source = %s").format(self._table()),
+                           (self.id_source,))
+            self.entries = dict(cursor.fetchall())
+        self.conn.commit()
+        logger.info(f"[manifest] [load] {len(self.entries)} couche(s) déjà importée(s) pour {self.id_source}")
+        return self.entries
+
+    def is_unchanged(self, layer: str, content_hash: str) -> bool:
+        return self.entries.get(layer) == content_hash
+
+    def delete_previous(self, cursor, schema: str, table: str,
+                        boundary: Optional[Tuple[str, Optional[int]]] = None) -> int:
+        """
+        Supprime les entités déjà importées pour cet id_source dans schema.table (sans valider).
+
+        Args:
+            boundary: (clé primaire, valeur maximale avant le chargement), retourné par key_boundary :
+                seules les entités antérieures au chargement sont supprimées
+
+        Returns:
+            int: Nombre d'entités supprimées (0 si la table n'a pas de colonne id_source)
+        """
+        if 'id_source' not in get_table_columns(cursor, schema, table):
+            return 0
+        query = sql.SQL("DELETE FROM {}.{} WHERE id_source = %s").format(sql.Identifier(schema), sql.Identifier(table))
+        params = [self.id_source]
+        if boundary is not None:
+            key, up_to = boundary
+            if up_to is None:
+                # Table vide avant le chargement : aucune entité antérieure
+                return 0
+            query = query + sql.SQL(" AND {} <= %s").format(sql.Identifier(key))
+            params.append(up_to)
+        cursor.execute(query, params)
+        return cursor.rowcount
+
+    def delete_loaded(self, cursor, schema: str, table: str, boundary: Tuple[str, Optional[int]]) -> int:
+        """Supprime les entités de cet id_source chargées après boundary (chargement partiel annulé, sans valider)."""
+        key, up_to = boundary
+        query = sql.SQL("DELETE FROM {}.{} WHERE id_source = %s").format(sql.Identifier(schema), sql.Identifier(table))
+        params = [self.id_source]
+        if up_to is not None:
+            query = query + sql.SQL(" AND {} > %s").format(sql.Identifier(key))
+            params.append(up_to)
+        cursor.execute(query, params)
+        return cursor.rowcount
+
+    def key_boundary(self, cursor, schema: str, table: str) -> Optional[Tuple[str, Optional[int]]]:
+        """
+        Clé primaire entière de schema.table et sa valeur maximale avant un chargement hors transaction :
+        les entités chargées ensuite ont une clé supérieure.
+
+        Returns:
+            Tuple: (clé, maximum ; None si la table est vide), None si la table n'a pas de clé primaire entière
+                   ou pas de colonne id_source
+        """
+        columns = get_table_columns(cursor, schema, table)
+        if 'id_source' not in columns:
+            return None
+        key = primary_key_column(cursor, schema, table)
+        if key is None or columns.get(key) not in INTEGER_TYPES:
+            return None
+        cursor.execute(sql.SQL("SELECT max({}) FROM {}.{}").format(
+            sql.Identifier(key), sql.Identifier(schema), sql.Identifier(table)))
+        return key, cursor.fetchone()[0]
+
+    def record(self, cursor, layer: str, content_hash: str, feature_count: Optional[int]) -> None:
+        """Enregistre l'empreinte d'une couche importée (sans valider)."""
+        cursor.execute(sql.SQL(
+            """
+            INSERT INTO {} (id_source, layer, content_hash, feature_count)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (id_source, layer)
+            DO UPDATE SET content_hash = EXCLUDED.content_hash,
+                          feature_count = EXCLUDED.feature_count,
+                          imported_at = now()
+            """
+        ).format(self._table()), (self.id_source, layer, content_hash, feature_count))
+        self.entries[layer] = content_hash
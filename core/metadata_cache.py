@@ -0,0 +1,137 @@
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .pg_pool import get_pool
+
+logger = logging.getLogger('DourBase')
+
+DEFAULT_TTL = 300.0
+
+
+def fetch_schemas(conn) -> List[str]:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT schema_name FROM information_schema.schemata")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def fetch_group_roles(conn) -> List[str]:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT rolname FROM pg_roles WHERE rolcanlogin = false;")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def fetch_tables(conn, schema: str) -> List[str]:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = %s AND table_type = 'BASE TABLE'
+            ORDER BY table_name
+            """,
+            (schema,)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class MetadataCache:
+    """
+    Cache des métadonnées de la base (schémas, rôles sans connexion, tables par schéma),
+    par connexion (host, port, dbname, user) et empreinte du mot de passe : un mot de passe
+    erroné n'est jamais servi depuis le cache, il provoque une vraie connexion (et son erreur).
+
+    Les entrées expirent après ttl secondes ; un ttl de 0 désactive le cache.
+    Les erreurs ne sont jamais mises en cache.
+
+    Args:
+        ttl (float): Durée de validité d'une entrée, en secondes
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self._entries: Dict[Tuple, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _connection_key(host, port, dbname, user, password) -> Tuple[str, str, str, str, str]:
+        # Seule une empreinte du mot de passe est conservée en mémoire
+        digest = hashlib.sha256(str(password or "").encode('utf-8')).hexdigest()
+        return str(host), str(port), str(dbname), str(user), digest
+
+    def _get(self, key: Tuple, loader: Callable[[], Any], refresh: bool = False):
+        now = time.monotonic()
+        if not refresh and self.ttl > 0:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                logger.debug(f"[metadata_cache] [_get] Lecture depuis le cache : {key[1:]}")
+                return list(entry[1])
+        value = loader()
+        with self._lock:
+            self._entries[key] = (now, value)
+        return list(value)
+
+    def _query(self, host, port, dbname, user, password, fetch: Callable, *args):
+        def loader():
+            with get_pool().connection(host, port, dbname, user, password) as conn:
+                return fetch(conn, *args)
+        return loader
+
+    def schemas(self, host, port, dbname, user, password, refresh: bool = False) -> List[str]:
+        """Schémas de la base (information_schema.schemata)."""
+        key = (self._connection_key(host, port, dbname, user, password), 'schemas')
+        return self._get(key, self._query(host, port, dbname, user, password, fetch_schemas), refresh)
+
+    def group_roles(self, host, port, dbname, user, password, refresh: bool = False) -> List[str]:
+        """Rôles sans droit de connexion (groupes), proposés lors du déploiement."""
+        key = (self._connection_key(host, port, dbname, user, password), 'roles')
+        return self._get(key, self._query(host, port, dbname, user, password, fetch_group_roles), refresh)
+
+    def tables(self, host, port, dbname, user, password, schema: str, refresh: bool = False) -> List[str]:
+        """Tables d'un schéma."""
+        key = (self._connection_key(host, port, dbname, user, password), 'tables', schema)
+        return self._get(key, self._query(host, port, dbname, user, password, fetch_tables, schema), refresh)
+
+    def invalidate(self, host=None, port=None, dbname=None, schema: Optional[str] = None) -> int:
+        """
+        Supprime les entrées d'une base (tous utilisateurs confondus), ou tout le cache sans argument.
+        Avec schema, seuls la liste des schémas et les tables de ce schéma sont supprimés.
+
+        Returns:
+            int: Nombre d'entrées supprimées
+        """
+        def matches(key):
+            connection = key[0]
+            if host is not None and connection[:3] != (str(host), str(port), str(dbname)):
+                return False
+            if schema is not None:
+                return key[1] == 'schemas' or (key[1] == 'tables' and key[2] == schema)
+            return True
+
+        with self._lock:
+            removed = [key for key in self._entries if matches(key)]
+            for key in removed:
+                del self._entries[key]
+        logger.info(f"[metadata_cache] [invalidate] {len(removed)} entrée(s) supprimée(s)")
+        return len(removed)
+
+    def clear(self) -> int:
+        return self.invalidate()
+
+
+_cache: Optional[MetadataCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_metadata_cache(ttl: Optional[float] = None) -> MetadataCache:
+    """Retourne le cache partagé du plugin ; ttl, s'il est fourni, remplace la durée de validité."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MetadataCache()
+        if ttl is not None:
+            _cache.ttl = ttl
+        return _cache
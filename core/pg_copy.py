@@ -0,0 +1,379 @@
+import io
+import logging
+import struct
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from osgeo import ogr
+from psycopg2 import sql
+
+logger = logging.getLogger('DourBase')
+
+# Conventions historiques de upload_to_db (-a_srs EPSG:2154 -lco GEOMETRY_NAME=geom)
+DEFAULT_SRID = 2154
+GEOMETRY_COLUMN = 'geom'
+
+_EWKB_SRID_FLAG = 0x20000000
+_FLAT_2D_TYPES = {1, 2, 3, 4, 5, 6, 7}
+_PROMOTABLE_TYPES = {2: 5, 3: 6}  # LineString -> MultiLineString, Polygon -> MultiPolygon
+
+_TEXT_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+TEXT_NULL = '\\N'
+
+COPY_FORMATS = ('binary', 'text')
+_BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+_BINARY_TRAILER = struct.pack('!h', -1)
+_BINARY_NULL = struct.pack('!i', -1)
+_PG_EPOCH_DATE = date(2000, 1, 1)
+_PG_EPOCH = datetime(2000, 1, 1)
+_ONE_MICROSECOND = datetime(2000, 1, 1, 0, 0, 0, 1) - _PG_EPOCH
+
+
+class CopyError(Exception):
+    """Exception levée lorsqu'un flux COPY ne peut pas être préparé ou envoyé."""
+    pass
+
+
+def launder(name: str) -> str:
+    """Reproduit le 'LAUNDER' du pilote PostgreSQL d'ogr2ogr (minuscules, sans espace, '-' ni '#')."""
+    return name.lower().replace(' ', '_').replace('-', '_').replace('#', '_')
+
+
+def fid_column_for(table: str) -> str:
+    """Colonne FID passée à ogr2ogr par upload_to_db (-lco FID=ID_<suffixe>), une fois 'blanchie'."""
+    return launder(f"ID_{table.split('_')[-1]}")
+
+
+def geometry_kind(ogr_geom_type: int) -> Optional[str]:
+    """Retourne 'point', 'line' ou 'polygon' pour un type de géométrie OGR, None sinon."""
+    flat = ogr.GT_Flatten(ogr_geom_type)
+    if flat in (ogr.wkbPoint, ogr.wkbMultiPoint):
+        return 'point'
+    if flat in (ogr.wkbLineString, ogr.wkbMultiLineString):
+        return 'line'
+    if flat in (ogr.wkbPolygon, ogr.wkbMultiPolygon):
+        return 'polygon'
+    return None
+
+
+def describe_layer(ogr_layer) -> Dict[str, Any]:
+    """Décrit une couche OGR : nombre d'entités, nature de la géométrie et champs."""
+    defn = ogr_layer.GetLayerDefn()
+    return {
+        'feature_count': ogr_layer.GetFeatureCount(),
+        'geometry_kind': geometry_kind(ogr_layer.GetGeomType()),
+        'fields': [
+            {
+                'name': defn.GetFieldDefn(i).GetName(),
+                'type': defn.GetFieldDefn(i).GetType(),
+                'width': defn.GetFieldDefn(i).GetWidth(),
+                'precision': defn.GetFieldDefn(i).GetPrecision(),
+            }
+            for i in range(defn.GetFieldCount())
+        ],
+    }
+
+
+def ewkb_from_wkb(wkb, srid: int = DEFAULT_SRID, promote_to_multi: bool = False) -> Optional[bytes]:
+    """
+    Convertit un WKB en EWKB PostGIS 2D portant le SRID.
+
+    Reproduit '-lco DIM=2 -a_srs EPSG:<srid>' et, si demandé, '-nlt PROMOTE_TO_MULTI'.
+    Les géométries 2D simples sont traitées octet par octet, les autres passent par OGR.
+    """
+    if wkb is None:
+        return None
+    wkb = bytes(wkb)
+    if not wkb:
+        return None
+
+    endian = '<' if wkb[0] == 1 else '>'
+    geom_type = struct.unpack(endian + 'I', wkb[1:5])[0]
+
+    if geom_type not in _FLAT_2D_TYPES:
+        geom = ogr.CreateGeometryFromWkb(wkb)
+        if geom is None:
+            raise CopyError(f"Géométrie WKB illisible (type {geom_type}).")
+        geom.FlattenTo2D()
+        if promote_to_multi:
+            geom = ogr.ForceToMulti(geom)
+        wkb = geom.ExportToWkb(ogr.wkbNDR)
+        endian = '<'
+        geom_type = struct.unpack('<I', wkb[1:5])[0]
+    elif promote_to_multi and geom_type in _PROMOTABLE_TYPES:
+        # Les sous-géométries d'un WKB portent leur propre ordre d'octets : on encapsule tel quel
+        wkb = struct.pack('<BII', 1, _PROMOTABLE_TYPES[geom_type], 1) + wkb
+        endian = '<'
+        geom_type = _PROMOTABLE_TYPES[geom_type]
+
+    return wkb[0:1] + struct.pack(endian + 'II', geom_type | _EWKB_SRID_FLAG, srid) + wkb[5:]
+
+
+def get_table_columns(cursor, schema: str, table: str) -> Dict[str, str]:
+    """Retourne {colonne: udt_name} de la table cible dans l'ordre des colonnes (vide si absente)."""
+    cursor.execute(
+        """
+        SELECT column_name, udt_name
+        FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s
+        ORDER BY ordinal_position
+        """,
+        (schema, table)
+    )
+    return {name: udt for name, udt in cursor.fetchall()}
+
+
+def _pg_type_for_field(field_type: int, width: int, precision: int) -> str:
+    """Correspondance des types OGR vers PostgreSQL utilisée par le pilote PG d'ogr2ogr."""
+    if field_type == ogr.OFTInteger:
+        return 'integer'
+    if field_type == ogr.OFTInteger64:
+        return 'bigint'
+    if field_type == ogr.OFTReal:
+        if width and precision:
+            return f'numeric({width},{precision})'
+        return 'double precision'
+    if field_type == ogr.OFTDate:
+        return 'date'
+    if field_type == ogr.OFTDateTime:
+        return 'timestamp'
+    if field_type == ogr.OFTString and width:
+        return f'varchar({width})'
+    return 'varchar'
+
+
+def create_table(cursor, schema: str, table: str, layer_info: Dict[str, Any], srid: int = DEFAULT_SRID,
+                 fid_column: Optional[str] = None) -> None:
+    """
+    Crée la table cible comme le ferait ogr2ogr en mode -append sur une table absente.
+
+    Args:
+        layer_info (Dict): Description de la couche source ('fields' et 'geometry_kind')
+        fid_column (str): Colonne FID passée à ogr2ogr (-lco FID=...), déduite du nom de la table par défaut
+    """
+    fid = launder(fid_column) if fid_column else fid_column_for(table)
+    kind = layer_info.get('geometry_kind')
+    pg_geom_type = {'point': 'Point', 'line': 'MultiLineString', 'polygon': 'MultiPolygon'}.get(kind, 'Geometry')
+    columns = [
+        sql.SQL("{} serial PRIMARY KEY").format(sql.Identifier(fid))
+    ]
+    for field in layer_info['fields']:
+        name = launder(field['name'])
+        if name == fid:
+            continue
+        columns.append(sql.SQL("{} {}").format(
+            sql.Identifier(name),
+            sql.SQL(_pg_type_for_field(field['type'], field['width'], field['precision']))
+        ))
+    columns.append(sql.SQL("{} geometry({}, {})").format(
+        sql.Identifier(GEOMETRY_COLUMN), sql.SQL(pg_geom_type), sql.Literal(srid)
+    ))
+    cursor.execute(sql.SQL("CREATE TABLE {}.{} ({})").format(
+        sql.Identifier(schema), sql.Identifier(table), sql.SQL(', ').join(columns)
+    ))
+    cursor.execute(sql.SQL("CREATE INDEX ON {}.{} USING gist ({})").format(
+        sql.Identifier(schema), sql.Identifier(table), sql.Identifier(GEOMETRY_COLUMN)
+    ))
+    logger.info(f"[pg_copy] [create_table] Table {schema}.{table} créée")
+
+
+def encode_text_value(value) -> str:
+    """Encode une valeur Python pour le format texte de COPY."""
+    if value is None:
+        return TEXT_NULL
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    elif isinstance(value, bool):
+        value = 't' if value else 'f'
+    elif not isinstance(value, str):
+        value = str(value)
+    return value.translate(_TEXT_ESCAPES)
+
+
+class IterStream(io.RawIOBase):
+    """Fichier en lecture seule alimenté par un itérable de blocs d'octets (pour copy_expert)."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self._buffer:
+            try:
+                self._buffer = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def copy_text_lines(cursor, schema: str, table: str, columns: List[str], lines: Iterable[str]) -> int:
+    """
+    Envoie des lignes déjà encodées (format texte, sans saut de ligne final) dans un unique COPY.
+
+    Returns:
+        int: Nombre de lignes envoyées
+    """
+    counter = {'rows': 0}
+
+    def chunks():
+        block = []
+        for line in lines:
+            block.append(line)
+            if len(block) >= 1000:
+                counter['rows'] += len(block)
+                yield ('\n'.join(block) + '\n').encode('utf-8')
+                block = []
+        if block:
+            counter['rows'] += len(block)
+            yield ('\n'.join(block) + '\n').encode('utf-8')
+
+    query = sql.SQL("COPY {}.{} ({}) FROM STDIN WITH (FORMAT text)").format(
+        sql.Identifier(schema),
+        sql.Identifier(table),
+        sql.SQL(', ').join(sql.Identifier(c) for c in columns)
+    )
+    cursor.copy_expert(query.as_string(cursor), IterStream(chunks()))
+    return counter['rows']
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10].replace('/', '-'))
+
+
+def _as_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value).replace('/', '-'))
+
+
+def _binary_numeric(value) -> bytes:
+    """Encode une valeur au format binaire 'numeric' de PostgreSQL (chiffres en base 10000)."""
+    number = value if isinstance(value, Decimal) else Decimal(str(value))
+    if number.is_nan():
+        return struct.pack('!hhHH', 0, 0, 0xC000, 0)
+    sign, digits, exponent = number.as_tuple()
+    digits = ''.join(str(d) for d in digits)
+    if exponent > 0:
+        digits += '0' * exponent
+        exponent = 0
+    int_len = len(digits) + exponent
+    int_part = digits[:int_len] if int_len > 0 else ''
+    frac_part = digits[int_len:] if int_len >= 0 else '0' * -int_len + digits
+    int_part = int_part.rjust((len(int_part) + 3) // 4 * 4, '0')
+    frac_part = frac_part.ljust((len(frac_part) + 3) // 4 * 4, '0')
+    padded = int_part + frac_part
+    groups = [int(padded[i:i + 4]) for i in range(0, len(padded), 4)]
+    weight = len(int_part) // 4 - 1
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight = 0
+    header = struct.pack('!hhHH', len(groups), weight, 0x4000 if sign else 0, max(0, -exponent))
+    return header + struct.pack(f'!{len(groups)}H', *groups)
+
+
+def _binary_text(value) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode('utf-8')
+
+
+BINARY_ENCODERS: Dict[str, Callable[[Any], bytes]] = {
+    'int2': lambda v: struct.pack('!h', int(v)),
+    'int4': lambda v: struct.pack('!i', int(v)),
+    'int8': lambda v: struct.pack('!q', int(v)),
+    'float4': lambda v: struct.pack('!f', float(v)),
+    'float8': lambda v: struct.pack('!d', float(v)),
+    'numeric': _binary_numeric,
+    'bool': lambda v: b'\x01' if v else b'\x00',
+    'date': lambda v: struct.pack('!i', (_as_date(v) - _PG_EPOCH_DATE).days),
+    'timestamp': lambda v: struct.pack('!q', (_as_datetime(v) - _PG_EPOCH) // _ONE_MICROSECOND),
+    'varchar': _binary_text,
+    'text': _binary_text,
+    'bpchar': _binary_text,
+    'geometry': bytes,
+}
+
+
+def supports_binary(udt_names: Sequence[str]) -> bool:
+    """Indique si toutes les colonnes peuvent être encodées au format binaire."""
+    return all(udt in BINARY_ENCODERS for udt in udt_names)
+
+
+def _text_encoder(udt: str) -> Callable[[Any], str]:
+    if udt == 'geometry':
+        return lambda v: TEXT_NULL if v is None else bytes(v).hex()
+    return encode_text_value
+
+
+def _binary_chunks(rows: Iterable[Sequence[Any]], udt_names: Sequence[str], counter: Dict[str, int]) -> Iterable[bytes]:
+    encoders = [BINARY_ENCODERS[udt] for udt in udt_names]
+    field_count = struct.pack('!h', len(encoders))
+    pack_length = struct.Struct('!i').pack
+    yield _BINARY_HEADER
+    block = []
+    for row in rows:
+        parts = [field_count]
+        for encode, value in zip(encoders, row):
+            if value is None:
+                parts.append(_BINARY_NULL)
+            else:
+                data = encode(value)
+                parts.append(pack_length(len(data)))
+                parts.append(data)
+        block.append(b''.join(parts))
+        if len(block) >= 1000:
+            counter['rows'] += len(block)
+            yield b''.join(block)
+            block = []
+    if block:
+        counter['rows'] += len(block)
+        yield b''.join(block)
+    yield _BINARY_TRAILER
+
+
+def copy_rows(cursor, schema: str, table: str, columns: List[str], udt_names: Sequence[str],
+              rows: Iterable[Sequence[Any]], copy_format: str = 'binary') -> int:
+    """
+    Envoie des lignes de valeurs Python dans un unique COPY ... FROM STDIN.
+
+    Args:
+        udt_names (Sequence[str]): Type PostgreSQL (udt_name) de chaque colonne, pour l'encodage
+        rows (Iterable[Sequence]): Valeurs dans l'ordre de columns ; la géométrie est en EWKB
+        copy_format (str): 'binary' ou 'text'
+
+    Returns:
+        int: Nombre de lignes envoyées
+    """
+    if copy_format not in COPY_FORMATS:
+        raise CopyError(f"Format COPY inconnu : {copy_format}")
+    if copy_format == 'text':
+        encoders = [_text_encoder(udt) for udt in udt_names]
+        lines = ('\t'.join(TEXT_NULL if value is None else encode(value)
+                           for encode, value in zip(encoders, row)) for row in rows)
+        return copy_text_lines(cursor, schema, table, columns, lines)
+
+    counter = {'rows': 0}
+    query = sql.SQL("COPY {}.{} ({}) FROM STDIN WITH (FORMAT binary)").format(
+        sql.Identifier(schema),
+        sql.Identifier(table),
+        sql.SQL(', ').join(sql.Identifier(c) for c in columns)
+    )
+    cursor.copy_expert(query.as_string(cursor), IterStream(_binary_chunks(rows, udt_names, counter)))
+    return counter['rows']
@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+
+logger = logging.getLogger('DourBase')
+
+DEFAULT_IDLE_TIMEOUT = 300.0
+DEFAULT_HEALTH_CHECK_INTERVAL = 30.0
+DEFAULT_MAX_IDLE_PER_KEY = 2
+
+
+class PoolError(Exception):
+    """Exception levée lorsqu'une connexion ne peut pas être rendue au pool."""
+    pass
+
+
+class _IdleConnection:
+    """Connexion inutilisée conservée par le pool."""
+
+    __slots__ = ('conn', 'password', 'released_at', 'checked_at')
+
+    def __init__(self, conn, password: str, checked_at: float):
+        self.conn = conn
+        self.password = password
+        self.released_at = time.monotonic()
+        self.checked_at = checked_at
+
+
+class ConnectionPool:
+    """
+    Pool de connexions psycopg2 partagé, indexé par (host, port, dbname, user).
+
+    Une connexion n'est jamais prêtée à deux appelants en même temps. Avant d'être prêtée,
+    une connexion inutilisée depuis plus de health_check_interval secondes est testée par un
+    SELECT 1 ; les connexions inutilisées depuis plus de idle_timeout secondes sont fermées.
+    Une connexion n'est réutilisée que si le mot de passe fourni est identique.
+
+    Args:
+        idle_timeout (float): Durée maximale d'inactivité d'une connexion conservée, en secondes
+        health_check_interval (float): Délai au-delà duquel une connexion est testée avant d'être prêtée
+        max_idle_per_key (int): Nombre maximal de connexions inutilisées conservées par clé
+    """
+
+    def __init__(self, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+                 max_idle_per_key: int = DEFAULT_MAX_IDLE_PER_KEY):
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.max_idle_per_key = max_idle_per_key
+        self._idle: Dict[Tuple[str, str, str, str], List[_IdleConnection]] = {}
+        self._in_use: Dict[int, Tuple[Tuple[str, str, str, str], str, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(host, port, dbname, user) -> Tuple[str, str, str, str]:
+        return str(host), str(port), str(dbname), str(user)
+
+    def _is_healthy(self, entry: _IdleConnection) -> bool:
+        if entry.conn.closed:
+            return False
+        if time.monotonic() - entry.checked_at < self.health_check_interval:
+            return True
+        try:
+            with entry.conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            entry.conn.rollback()
+            entry.checked_at = time.monotonic()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"[pg_pool] [_is_healthy] Connexion inutilisable écartée : {e}")
+            return False
+
+    @staticmethod
+    def _close(conn) -> None:
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def acquire(self, host, port, dbname, user, password):
+        """
+        Prête une connexion ouverte, réutilisée si possible.
+
+        Raises:
+            psycopg2.Error: Si une nouvelle connexion ne peut pas être ouverte
+        """
+        key = self.key(host, port, dbname, user)
+        self.evict_idle()
+        while True:
+            with self._lock:
+                idle = self._idle.get(key, [])
+                entry = next((e for e in reversed(idle) if e.password == password), None)
+                if entry is not None:
+                    idle.remove(entry)
+            if entry is None:
+                break
+            if self._is_healthy(entry):
+                with self._lock:
+                    self._in_use[id(entry.conn)] = (key, password, entry.checked_at)
+                logger.debug(f"[pg_pool] [acquire] Connexion réutilisée pour {user}@{host}:{port}/{dbname}")
+                return entry.conn
+            self._close(entry.conn)
+
+        conn = psycopg2.connect(host=host, port=port, dbname=dbname, user=user, password=password)
+        with self._lock:
+            self._in_use[id(conn)] = (key, password, time.monotonic())
+        logger.info(f"[pg_pool] [acquire] Nouvelle connexion ouverte pour {user}@{host}:{port}/{dbname}")
+        return conn
+
+    def release(self, conn, discard: bool = False) -> None:
+        """
+        Rend une connexion au pool. Une transaction en cours est annulée ; si l'annulation
+        échoue, ou si discard est vrai, la connexion est fermée.
+        """
+        with self._lock:
+            borrowed = self._in_use.pop(id(conn), None)
+        if borrowed is None:
+            raise PoolError("Cette connexion n'a pas été prêtée par le pool.")
+        key, password, checked_at = borrowed
+
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except psycopg2.Error as e:
+                logger.warning(f"[pg_pool] [release] Connexion fermée après un échec de réinitialisation : {e}")
+                discard = True
+        if discard or conn.closed:
+            self._close(conn)
+            return
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            idle.append(_IdleConnection(conn, password, checked_at))
+            excess = max(0, len(idle) - self.max_idle_per_key)
+            surplus = idle[:excess]
+            del idle[:excess]
+        for entry in surplus:
+            self._close(entry.conn)
+
+    @contextmanager
+    def connection(self, host, port, dbname, user, password):
+        """Prête une connexion le temps d'un bloc 'with' ; elle est annulée et rendue en sortie."""
+        conn = self.acquire(host, port, dbname, user, password)
+        try:
+            yield conn
+        except Exception:
+            self.release(conn, discard=conn.closed != 0)
+            raise
+        else:
+            self.release(conn)
+
+    def evict_idle(self) -> int:
+        """Ferme les connexions inutilisées depuis plus de idle_timeout secondes."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                expired.extend(e for e in idle if now - e.released_at > self.idle_timeout)
+                idle[:] = [e for e in idle if now - e.released_at <= self.idle_timeout]
+        for entry in expired:
+            self._close(entry.conn)
+        if expired:
+            logger.info(f"[pg_pool] [evict_idle] {len(expired)} connexion(s) inactive(s) fermée(s)")
+        return len(expired)
+
+    def close_all(self) -> None:
+        """Ferme toutes les connexions inutilisées. Les connexions prêtées seront fermées à leur retour."""
+        with self._lock:
+            entries = [e for idle in self._idle.values() for e in idle]
+            self._idle.clear()
+            self.max_idle_per_key = 0
+        for entry in entries:
+            self._close(entry.conn)
+        logger.info(f"[pg_pool] [close_all] {len(entries)} connexion(s) fermée(s)")
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Retourne le pool partagé du plugin, créé au premier appel."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+
+def configure_pool(idle_timeout: Optional[float] = None, health_check_interval: Optional[float] = None) -> ConnectionPool:
+    """Applique les réglages du pool partagé (les valeurs None sont ignorées)."""
+    pool = get_pool()
+    if idle_timeout is not None:
+        pool.idle_timeout = idle_timeout
+    if health_check_interval is not None:
+        pool.health_check_interval = health_check_interval
+    return pool
+
+
+def shutdown_pool() -> None:
+    """Ferme le pool partagé (appelé au déchargement du plugin)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close_all()
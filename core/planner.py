@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import statistics
+from typing import Any, Dict, Iterable, List, Optional
+
+from qgis.PyQt.QtCore import QSettings
+
+from .folder_snapshot import FolderSnapshot
+from .shp_inspector import inspect_shapefile, sidecar_path
+from ..utils import list_source_shapefiles
+
+logger = logging.getLogger('DourBase')
+
+THROUGHPUT_SETTING = "DourBase/import_throughput_history"
+THROUGHPUT_HISTORY_SIZE = 20
+
+
+def layer_size(shp_path: str) -> int:
+    """Taille cumulée du .shp et du .dbf d'une couche, en octets."""
+    total = 0
+    for ext in ('.shp', '.dbf'):
+        path = sidecar_path(shp_path, ext)
+        if path is not None:
+            total += os.path.getsize(path)
+    return total
+
+
+def _history_key(import_pipeline: str, loader_backend: str) -> str:
+    return import_pipeline if import_pipeline == 'columnar' else f"{import_pipeline}/{loader_backend}"
+
+
+def read_throughput_history() -> List[Dict[str, Any]]:
+    try:
+        history = json.loads(QSettings().value(THROUGHPUT_SETTING, "[]") or "[]")
+    except (TypeError, ValueError):
+        return []
+    return [entry for entry in history if isinstance(entry, dict)]
+
+
+def record_throughput(size_bytes: int, seconds: float, import_pipeline: str, loader_backend: str) -> None:
+    """Ajoute le débit d'un import réussi à l'historique (les THROUGHPUT_HISTORY_SIZE derniers sont conservés)."""
+    if size_bytes <= 0 or seconds <= 0:
+        return
+    history = read_throughput_history()
+    history.append({'key': _history_key(import_pipeline, loader_backend), 'bytes': size_bytes, 'seconds': seconds})
+    QSettings().setValue(THROUGHPUT_SETTING, json.dumps(history[-THROUGHPUT_HISTORY_SIZE:]))
+    logger.info(f"[planner] [record_throughput] {size_bytes / seconds / 1024:.0f} Kio/s enregistrés")
+
+
+def estimated_throughput(import_pipeline: str, loader_backend: str,
+                         history: Optional[Iterable[Dict[str, Any]]] = None) -> Optional[float]:
+    """
+    Débit médian (octets/s) des imports précédents du même pipeline, ou de tous les imports à défaut.
+
+    Returns:
+        float: Débit estimé, None sans historique
+    """
+    history = list(read_throughput_history() if history is None else history)
+    key = _history_key(import_pipeline, loader_backend)
+    rates = [e['bytes'] / e['seconds'] for e in history if e.get('key') == key and e.get('seconds')]
+    if not rates:
+        rates = [e['bytes'] / e['seconds'] for e in history if e.get('seconds')]
+    return statistics.median(rates) if rates else None
+
+
+class ImportPlanner:
+    """
+    Plan d'un import, établi à partir des seuls en-têtes des shapefiles : rien n'est copié ni écrit.
+
+    Pour chaque couche, le plan indique le nombre d'entités et la taille lus dans les en-têtes,
+    si la couche figure dans shp_type.txt et si la table cible existe. La durée est estimée
+    à partir du débit des imports précédents.
+
+    Args:
+        folder (str): Dossier des shapefiles sélectionné par l'utilisateur
+        allowed_types (Iterable[str]): Couches autorisées (config/shp_type.txt)
+        existing_tables (Iterable[str]): Tables du schéma cible (None : existence non vérifiée)
+        throughput (float): Débit en octets/s (None : pas d'estimation de durée)
+        snapshot (FolderSnapshot): Contenu du dossier déjà lu (relu sinon)
+    """
+
+    def __init__(self, folder: str, allowed_types: Iterable[str], existing_tables: Optional[Iterable[str]] = None,
+                 throughput: Optional[float] = None, snapshot: Optional[FolderSnapshot] = None):
+        self.folder = folder
+        self.allowed_types = {t.lower() for t in allowed_types}
+        self.existing_tables = None if existing_tables is None else {t.lower() for t in existing_tables}
+        self.throughput = throughput
+        self.snapshot = snapshot
+
+    def plan_layer(self, shp_path: str) -> Dict[str, Any]:
+        entry = inspect_shapefile(shp_path)
+        entry['allowed'] = entry['layer'] in self.allowed_types
+        entry['table_exists'] = None if self.existing_tables is None else entry['layer'] in self.existing_tables
+        return entry
+
+    def plan(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict: layers (détail par couche), ignored, missing_tables, errors,
+                  total_features, total_bytes, estimated_seconds (None sans historique)
+        """
+        layers = [self.plan_layer(path) for path in sorted(list_source_shapefiles(self.folder, self.snapshot))]
+        imported = [entry for entry in layers if entry['allowed'] and not entry['errors']]
+        total_bytes = sum(entry['size_bytes'] for entry in imported)
+        plan = {
+            'layers': layers,
+            'ignored': [entry['layer'] for entry in layers if not entry['allowed']],
+            'missing_tables': [entry['layer'] for entry in imported if entry['table_exists'] is False],
+            'errors': {entry['layer']: entry['errors'] for entry in layers if entry['errors']},
+            'total_features': sum(entry['features'] or 0 for entry in imported),
+            'total_bytes': total_bytes,
+            'estimated_seconds': total_bytes / self.throughput if self.throughput else None,
+        }
+        logger.info(f"[planner] [plan] {len(imported)} couche(s) à importer, {plan['total_features']} entité(s), "
+                    f"{total_bytes} octet(s), {len(plan['ignored'])} ignorée(s)")
+        return plan
+
+
+def format_plan(plan: Dict[str, Any]) -> str:
+    """Texte du plan affiché à l'utilisateur."""
+    lines = []
+    for entry in plan['layers']:
+        if not entry['allowed']:
+            status = "ignorée (absente de shp_type.txt)"
+        elif entry['errors']:
+            status = "en erreur"
+        elif entry['table_exists'] is False:
+            status = "table absente"
+        else:
+            status = "à importer"
+        features = entry['features'] if entry['features'] is not None else "?"
+        lines.append(f"  - {entry['layer']} : {features} entité(s), {entry['size_bytes'] / 1024:.0f} Kio, {status}")
+    if plan['estimated_seconds'] is None:
+        estimate = "inconnue (aucun import précédent)"
+    else:
+        minutes, seconds = divmod(int(round(plan['estimated_seconds'])), 60)
+        estimate = f"{minutes} min {seconds:02d} s"
+    text = (
+        f"Entités à importer : {plan['total_features']}\n"
+        f"Volume à importer : {plan['total_bytes'] / (1024 * 1024):.1f} Mio\n"
+        f"Durée estimée : {estimate}\n"
+        f"Couches ignorées : {len(plan['ignored'])}\n"
+        f"Tables absentes : {', '.join(plan['missing_tables']) or 'aucune'}\n\n"
+        "Détail par couche :\n" + "\n".join(lines)
+    )
+    for layer, errors in plan['errors'].items():
+        text += f"\n[ERROR] {layer} : {'; '.join(errors)}"
+    return text
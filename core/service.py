@@ -0,0 +1,155 @@
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from psycopg2 import sql
+
+from .basedoc import build_basedoc_row
+from .folder_snapshot import FolderSnapshot
+from .import_pipeline import ImportPipeline, import_options_from_settings
+from .pg_pool import get_pool
+from .stamping import build_stamp_values
+from .timing import StageTimer
+from ..utils import check_shapefile_completeness, update_file_name
+
+logger = logging.getLogger('DourBase')
+
+
+def build_import_values(depco, num_source, aep: bool, eu: bool, epl: bool, date_str: str, entreprise, etat, q_support,
+                        moa, exploitant, cote: bool = True, utilisat: bool = False, localisat: str = '',
+                        type_plan: str = '', b_etude: str = '', echelle: str = '', no_origine: str = '',
+                        nom_fichier: Optional[str] = None, auteur: Optional[str] = None
+                        ) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+    """
+    Calcule l'id_source, les valeurs de marquage et la ligne basedoc d'un import, sans interface.
+
+    Args:
+        depco, entreprise, moa, exploitant: Codes lus dans les fichiers de config
+        etat, q_support: Libellés lus dans les fichiers de config
+        num_source (str): Numéro de la source, tel qu'il doit apparaître dans l'id_source ('007')
+        date_str (str): Date du plan au format 'yyyy-MM-dd'
+        nom_fichier (str): Nom du fichier du plan (généré à partir du depco, des réseaux et du numéro par défaut)
+        auteur (str): Auteur écrit dans les entités (le bureau d'étude par défaut)
+
+    Returns:
+        Tuple: (id_source, stamp_values, basedoc_row)
+    """
+    id_source = f"{depco}_{num_source}"
+    if not nom_fichier:
+        nom_fichier = update_file_name(depco, num_source, aep, eu, epl)
+    stamp_values = build_stamp_values(
+        id_source=id_source,
+        auteur=b_etude if auteur is None else auteur,
+        date_plan=date_str,
+        moa=moa,
+        exploitant=exploitant,
+        nom_fichier=nom_fichier,
+        entreprise=entreprise
+    )
+    basedoc_row = build_basedoc_row(
+        id_source=id_source,
+        depco=depco,
+        no_origine=no_origine,
+        aep='*' if aep else '',
+        eu='*' if eu else '',
+        epl='*' if epl else '',
+        localisat=localisat,
+        type_plan=type_plan,
+        b_etude=b_etude,
+        entreprise=entreprise,
+        date_str=date_str,
+        echelle=echelle,
+        cote='Oui' if cote else 'Non',
+        etat=etat,
+        q_support=q_support,
+        nom_fichier=nom_fichier,
+        utilisat='Oui' if utilisat else 'Non'
+    )
+    return id_source, stamp_values, basedoc_row
+
+
+def source_exists(cursor, schema: str, id_source: str) -> bool:
+    """Retourne True si schema.basedoc contient déjà une ligne pour id_source."""
+    cursor.execute(
+        sql.SQL("SELECT 1 FROM {}.basedoc WHERE id_source = %s").format(sql.Identifier(schema)),
+        (id_source,)
+    )
+    return cursor.fetchone() is not None
+
+
+def saved_connection_params(name: str) -> Dict[str, str]:
+    """
+    Paramètres d'une connexion PostgreSQL enregistrée dans QGIS (PostgreSQL/connections/<name>).
+    Le schéma est celui enregistré avec la connexion, vide s'il n'y en a pas.
+    """
+    from qgis.core import QgsSettings
+
+    settings = QgsSettings()
+    settings.beginGroup(f"PostgreSQL/connections/{name}")
+    params = {
+        "host": settings.value("host", ""),
+        "port": settings.value("port", ""),
+        "dbname": settings.value("database", ""),
+        "user": settings.value("username", ""),
+        "password": settings.value("password", ""),
+        "schema": settings.value("schema", "")
+    }
+    settings.endGroup()
+    return params
+
+
+class ImportService:
+    """
+    Point d'entrée de l'import sans interface, utilisé par le formulaire, l'import par lot et la ligne de commande.
+
+    Args:
+        database (Dict): Paramètres de connexion (host, port, dbname, user, password, schema)
+        options (Dict[str, str]): Options de ImportPipeline (lues dans les paramètres du plugin par défaut)
+        log (Callable[[str], None]): Reçoit les messages destinés à la console
+    """
+
+    def __init__(self, database: Dict[str, Any], options: Optional[Dict[str, str]] = None,
+                 log: Optional[Callable[[str], None]] = None):
+        self.database = database
+        self.options = options if options is not None else import_options_from_settings()
+        self.log = log
+
+    def source_exists(self, id_source: str) -> bool:
+        """
+        Raises:
+            psycopg2.Error: Si la connexion ou la requête échoue
+        """
+        database = self.database
+        with get_pool().connection(database["host"], database["port"], database["dbname"],
+                                   database["user"], database["password"]) as conn:
+            with conn.cursor() as cursor:
+                exists = source_exists(cursor, database["schema"], id_source)
+            conn.rollback()
+        return exists
+
+    def create_pipeline(self, folder: str, stamp_values: Dict[str, Any], basedoc_row: Dict[str, str],
+                        snapshot: Optional[FolderSnapshot] = None, timer: Optional[StageTimer] = None,
+                        **callbacks) -> ImportPipeline:
+        """
+        Vérifie que les shapefiles du dossier sont complets, puis prépare l'import.
+
+        Args:
+            callbacks: progress, is_cancelled (voir ImportPipeline)
+
+        Raises:
+            FileNotFoundError: Si des fichiers d'un shapefile sont manquants
+        """
+        if snapshot is None:
+            snapshot = FolderSnapshot(folder)
+            check_shapefile_completeness(folder, snapshot)
+        return ImportPipeline(folder, self.database, self.options, stamp_values, basedoc_row, log=self.log,
+                              timer=timer, snapshot=snapshot, **callbacks)
+
+    def run(self, folder: str, stamp_values: Dict[str, Any], basedoc_row: Dict[str, str],
+            timer: Optional[StageTimer] = None, **callbacks) -> Dict[str, Any]:
+        """
+        Importe le dossier dans le thread appelant.
+
+        Returns:
+            Dict: Compte rendu de ImportPipeline.run
+        """
+        return self.create_pipeline(folder, stamp_values, basedoc_row, timer=timer, **callbacks).run()
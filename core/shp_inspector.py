@@ -0,0 +1,167 @@
+import logging
+import os
+import struct
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger('DourBase')
+
+SHP_FILE_CODE = 9994
+SHP_HEADER_SIZE = 100
+SHX_RECORD_SIZE = 8
+DBF_FIELD_TERMINATOR = 0x0D
+
+SHP_SHAPE_TYPES = {
+    0: 'Null', 1: 'Point', 3: 'PolyLine', 5: 'Polygon', 8: 'MultiPoint',
+    11: 'PointZ', 13: 'PolyLineZ', 15: 'PolygonZ', 18: 'MultiPointZ',
+    21: 'PointM', 23: 'PolyLineM', 25: 'PolygonM', 28: 'MultiPointM', 31: 'MultiPatch',
+}
+# Type de géométrie QGIS (QgsWkbTypes.GeometryType) correspondant, comme retourné par QgsVectorLayer.geometryType()
+QGIS_GEOMETRY_TYPES = {
+    0: 4,
+    1: 0, 8: 0, 11: 0, 18: 0, 21: 0, 28: 0,
+    3: 1, 13: 1, 23: 1,
+    5: 2, 15: 2, 25: 2, 31: 2,
+}
+
+
+class ShapefileHeaderError(Exception):
+    """Exception levée lorsque l'en-tête d'un .shp, d'un .shx ou d'un .dbf est illisible."""
+    pass
+
+
+def sidecar_path(shp_path: str, ext: str) -> Optional[str]:
+    """Fichier compagnon d'un shapefile (extension en minuscules ou en majuscules), None s'il est absent."""
+    base = os.path.splitext(shp_path)[0]
+    for candidate in (base + ext, base + ext.upper()):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _read_main_header(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        header = f.read(SHP_HEADER_SIZE)
+    if len(header) < SHP_HEADER_SIZE or struct.unpack('>i', header[:4])[0] != SHP_FILE_CODE:
+        raise ShapefileHeaderError(f"En-tête shapefile invalide : {path}")
+    return header
+
+
+def read_shp_header(path: str) -> Dict[str, Any]:
+    """
+    Lit l'en-tête de 100 octets d'un .shp (ou d'un .shx), sans lire les entités.
+
+    Returns:
+        Dict: shape_type_code, shape_type, bbox (xmin, ymin, xmax, ymax), file_length (octets)
+
+    Raises:
+        ShapefileHeaderError: Si le fichier n'est pas un shapefile
+    """
+    header = _read_main_header(path)
+    shape_type = struct.unpack('<i', header[32:36])[0]
+    return {
+        'shape_type_code': shape_type,
+        'shape_type': SHP_SHAPE_TYPES.get(shape_type, str(shape_type)),
+        'bbox': struct.unpack('<4d', header[36:68]),
+        # La longueur est stockée en mots de 16 bits
+        'file_length': struct.unpack('>i', header[24:28])[0] * 2,
+    }
+
+
+def read_shx_count(path: str) -> int:
+    """Nombre d'enregistrements d'un .shx, déduit de sa longueur (8 octets par entité)."""
+    length = read_shp_header(path)['file_length']
+    if length < SHP_HEADER_SIZE or (length - SHP_HEADER_SIZE) % SHX_RECORD_SIZE:
+        raise ShapefileHeaderError(f"Longueur d'index incohérente ({length} octets) : {path}")
+    return (length - SHP_HEADER_SIZE) // SHX_RECORD_SIZE
+
+
+def read_dbf_header(path: str) -> Dict[str, Any]:
+    """
+    Lit l'en-tête d'un .dbf et ses descripteurs de champs.
+
+    Returns:
+        Dict: records, header_length, record_length, fields ([{name, type, length, decimals}])
+
+    Raises:
+        ShapefileHeaderError: Si l'en-tête est tronqué
+    """
+    with open(path, 'rb') as f:
+        header = f.read(32)
+        if len(header) < 32:
+            raise ShapefileHeaderError(f"En-tête dBase invalide : {path}")
+        records, header_length, record_length = struct.unpack('<IHH', header[4:12])
+        descriptors = f.read(max(0, header_length - 32))
+    fields: List[Dict[str, Any]] = []
+    for offset in range(0, len(descriptors) - 31, 32):
+        if descriptors[offset] == DBF_FIELD_TERMINATOR:
+            break
+        descriptor = descriptors[offset:offset + 32]
+        fields.append({
+            'name': descriptor[:11].split(b'\x00', 1)[0].decode('latin-1').strip(),
+            'type': chr(descriptor[11]),
+            'length': descriptor[16],
+            'decimals': descriptor[17],
+        })
+    return {'records': records, 'header_length': header_length, 'record_length': record_length, 'fields': fields}
+
+
+def inspect_shapefile(shp_path: str) -> Dict[str, Any]:
+    """
+    Métadonnées d'une couche lues dans les seuls en-têtes du .shp, du .shx et du .dbf.
+
+    Le nombre d'entités est celui du .dbf ; il est comparé à celui du .shx. Les incohérences
+    et les fichiers illisibles sont listés dans errors (la couche est alors inutilisable).
+
+    Returns:
+        Dict: layer, path, shape_type, geometry_type (code QGIS, None si inconnu), bbox,
+              features, shx_features, fields, size_bytes, errors
+    """
+    info = {
+        'layer': os.path.splitext(os.path.basename(shp_path))[0].lower(),
+        'path': shp_path,
+        'shape_type': None,
+        'geometry_type': None,
+        'bbox': None,
+        'features': None,
+        'shx_features': None,
+        'fields': [],
+        'size_bytes': 0,
+        'errors': [],
+    }
+    try:
+        header = read_shp_header(shp_path)
+        info['shape_type'] = header['shape_type']
+        info['geometry_type'] = QGIS_GEOMETRY_TYPES.get(header['shape_type_code'])
+        info['bbox'] = header['bbox']
+        info['size_bytes'] += os.path.getsize(shp_path)
+    except (OSError, ShapefileHeaderError) as e:
+        info['errors'].append(str(e))
+
+    shx_path = sidecar_path(shp_path, '.shx')
+    if shx_path is None:
+        info['errors'].append(f"Fichier .shx introuvable pour {shp_path}")
+    else:
+        try:
+            info['shx_features'] = read_shx_count(shx_path)
+        except (OSError, ShapefileHeaderError) as e:
+            info['errors'].append(str(e))
+
+    dbf_path = sidecar_path(shp_path, '.dbf')
+    if dbf_path is None:
+        info['errors'].append(f"Fichier .dbf introuvable pour {shp_path}")
+    else:
+        try:
+            dbf = read_dbf_header(dbf_path)
+            info['features'] = dbf['records']
+            info['fields'] = dbf['fields']
+            info['size_bytes'] += os.path.getsize(dbf_path)
+        except (OSError, ShapefileHeaderError) as e:
+            info['errors'].append(str(e))
+
+    if info['features'] is not None and info['shx_features'] is not None \
+            and info['features'] != info['shx_features']:
+        info['errors'].append(f"{info['layer']} : {info['features']} enregistrement(s) dans le .dbf "
+                              f"pour {info['shx_features']} dans le .shx")
+    if info['errors']:
+        logger.warning(f"[shp_inspector] [inspect_shapefile] {shp_path} : {'; '.join(info['errors'])}")
+    return info
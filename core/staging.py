@@ -0,0 +1,242 @@
+import logging
+import os
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from psycopg2 import sql
+
+from .basedoc import insert_basedoc
+from .deferred_indexes import deferrable_indexes, rebuild_index, set_build_workers
+from .pg_copy import DEFAULT_SRID, GEOMETRY_COLUMN
+
+logger = logging.getLogger('DourBase')
+
+IMPORT_MODES = ('direct', 'staged')
+STAGING_PREFIX = 'dourbase_stage_'
+
+
+class StagingError(Exception):
+    """Exception levée lorsque le schéma de préparation ne peut pas être créé, validé ou transféré."""
+    pass
+
+
+def staging_schema_name(id_source: str) -> str:
+    """Nom du schéma de préparation d'un import (unique par exécution, 63 caractères au plus)."""
+    tag = re.sub(r'[^a-z0-9_]', '_', str(id_source).lower())
+    suffix = f"_{int(time.time())}_{os.getpid()}"
+    return (STAGING_PREFIX + tag)[:63 - len(suffix)] + suffix
+
+
+class StagedImport:
+    """
+    Import en deux temps à travers un schéma de préparation propre à l'exécution.
+
+    Les couches et la ligne basedoc sont d'abord chargées dans des tables UNLOGGED, sans index,
+    qui reprennent les colonnes des tables cibles. Après validation, toutes les lignes sont
+    transférées dans le schéma cible par des INSERT ... SELECT dans une seule transaction :
+    l'import est entièrement visible, ou pas du tout. Le schéma de préparation est toujours supprimé.
+
+    Args:
+        conn: Connexion psycopg2 ouverte
+        target_schema (str): Schéma cible
+        id_source (str): Identifiant de la source importée, utilisé pour nommer le schéma
+    """
+
+    def __init__(self, conn, target_schema: str, id_source: str):
+        self.conn = conn
+        self.target_schema = target_schema
+        self.id_source = id_source
+        self.schema = staging_schema_name(id_source)
+        self.tables: Dict[str, List[str]] = {}
+        self._created = False
+
+    def __enter__(self):
+        self.create()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.drop()
+        return False
+
+    def database(self, database: Dict[str, Any]) -> Dict[str, Any]:
+        """Paramètres de connexion dont le schéma pointe sur le schéma de préparation."""
+        staged = dict(database)
+        staged['schema'] = self.schema
+        return staged
+
+    def create(self) -> None:
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql.SQL("CREATE SCHEMA {}").format(sql.Identifier(self.schema)))
+        self.conn.commit()
+        self._created = True
+        logger.info(f"[staging] [create] Schéma de préparation {self.schema} créé")
+
+    def drop(self) -> None:
+        if not self._created:
+            return
+        try:
+            self.conn.rollback()
+            with self.conn.cursor() as cursor:
+                cursor.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(self.schema)))
+            self.conn.commit()
+            self._created = False
+            logger.info(f"[staging] [drop] Schéma de préparation {self.schema} supprimé")
+        except Exception as e:
+            logger.error(f"[staging] [drop] Impossible de supprimer le schéma {self.schema} : {e}")
+
+    def _target_columns(self, cursor, table: str) -> List[str]:
+        """Colonnes de la table cible, hors colonnes alimentées par une séquence (FID)."""
+        cursor.execute(
+            """
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s
+              AND coalesce(column_default, '') NOT LIKE 'nextval(%%'
+              AND is_identity = 'NO'
+            ORDER BY ordinal_position
+            """,
+            (self.target_schema, table)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def prepare_table(self, table: str) -> List[str]:
+        """
+        Crée la table de préparation de schema_cible.table (mêmes colonnes et types, sans FID ni index).
+
+        Raises:
+            StagingError: Si la table n'existe pas dans le schéma cible
+        """
+        if table in self.tables:
+            return self.tables[table]
+        with self.conn.cursor() as cursor:
+            columns = self._target_columns(cursor, table)
+            if not columns:
+                raise StagingError(
+                    f"La table {self.target_schema}.{table} n'existe pas : l'import par schéma de préparation "
+                    f"nécessite des tables cibles existantes."
+                )
+            cursor.execute(sql.SQL("CREATE UNLOGGED TABLE {}.{} AS SELECT {} FROM {}.{} WITH NO DATA").format(
+                sql.Identifier(self.schema), sql.Identifier(table),
+                sql.SQL(', ').join(sql.Identifier(c) for c in columns),
+                sql.Identifier(self.target_schema), sql.Identifier(table)
+            ))
+        self.conn.commit()
+        self.tables[table] = columns
+        logger.info(f"[staging] [prepare_table] Table {self.schema}.{table} préparée ({len(columns)} colonne(s))")
+        return columns
+
+    def stage_basedoc(self, row: Dict[str, Any]) -> None:
+        """Prépare la table basedoc et y insère la ligne de l'import."""
+        self.prepare_table('basedoc')
+        with self.conn.cursor() as cursor:
+            insert_basedoc(cursor, self.schema, row)
+        self.conn.commit()
+
+    def _count(self, cursor, table: str, where: Optional[sql.Composable] = None, params: Tuple = ()) -> int:
+        query = sql.SQL("SELECT count(*) FROM {}.{}").format(sql.Identifier(self.schema), sql.Identifier(table))
+        if where is not None:
+            query = query + sql.SQL(" WHERE ") + where
+        cursor.execute(query, params)
+        return cursor.fetchone()[0]
+
+    def validate(self, expected: Dict[str, int], srid: int = DEFAULT_SRID) -> List[str]:
+        """
+        Contrôle le contenu du schéma de préparation avant le transfert.
+
+        Args:
+            expected (Dict[str, int]): Nombre d'entités attendu par table (entités des shapefiles)
+
+        Returns:
+            List[str]: Problèmes détectés (vide si l'import peut être transféré)
+        """
+        problems = []
+        with self.conn.cursor() as cursor:
+            for table, columns in self.tables.items():
+                if table == 'basedoc':
+                    count = self._count(cursor, table)
+                    if count != 1:
+                        problems.append(f"basedoc : {count} ligne(s) préparée(s) au lieu de 1")
+                    continue
+                count = self._count(cursor, table)
+                if table in expected and count != expected[table]:
+                    problems.append(f"{table} : {count} entité(s) préparée(s) pour {expected[table]} attendue(s)")
+                if GEOMETRY_COLUMN in columns:
+                    wrong_srid = self._count(
+                        cursor, table,
+                        sql.SQL("{} IS NOT NULL AND ST_SRID({}) <> %s").format(
+                            sql.Identifier(GEOMETRY_COLUMN), sql.Identifier(GEOMETRY_COLUMN)),
+                        (srid,)
+                    )
+                    if wrong_srid:
+                        problems.append(f"{table} : {wrong_srid} géométrie(s) hors EPSG:{srid}")
+                if 'id_source' in columns:
+                    foreign = self._count(
+                        cursor, table,
+                        sql.SQL("id_source IS DISTINCT FROM %s"),
+                        (self.id_source,)
+                    )
+                    if foreign:
+                        problems.append(f"{table} : {foreign} entité(s) avec un id_source différent de {self.id_source}")
+            missing = sorted(set(expected) - set(self.tables))
+            if missing:
+                problems.append(f"Tables non préparées : {', '.join(missing)}")
+        self.conn.rollback()
+        for problem in problems:
+            logger.warning(f"[staging] [validate] {problem}")
+        return problems
+
+    def commit_to_target(self, replace_id_source: bool = False,
+                         on_commit: Optional[Callable[[Any], None]] = None,
+                         deferred_tables: Iterable[str] = (), build_workers: Optional[int] = None) -> Dict[str, int]:
+        """
+        Transfère toutes les tables préparées dans le schéma cible en une seule transaction.
+
+        Args:
+            replace_id_source (bool): Supprime d'abord, dans chaque table cible, les lignes de cet id_source
+            on_commit (Callable): Appelé avec le curseur juste avant la validation, dans la même transaction
+            deferred_tables (Iterable[str]): Tables cibles dont les index sans contrainte sont supprimés avant
+                l'insertion puis reconstruits, dans la même transaction (annulée, ils sont restaurés)
+            build_workers (int): Processus parallèles de construction des index autorisés côté serveur
+
+        Returns:
+            Dict[str, int]: Nombre de lignes transférées par table
+        """
+        moved = {}
+        start = time.perf_counter()
+        cursor = self.conn.cursor()
+        try:
+            deferred = []
+            for table in sorted(set(deferred_tables) & set(self.tables)):
+                for name, definition in deferrable_indexes(cursor, self.target_schema, table):
+                    cursor.execute(sql.SQL("DROP INDEX {}.{}").format(sql.Identifier(self.target_schema),
+                                                                     sql.Identifier(name)))
+                    deferred.append(definition)
+            for table, columns in self.tables.items():
+                if replace_id_source and 'id_source' in columns:
+                    cursor.execute(sql.SQL("DELETE FROM {}.{} WHERE id_source = %s").format(
+                        sql.Identifier(self.target_schema), sql.Identifier(table)), (self.id_source,))
+                    if cursor.rowcount:
+                        logger.info(f"[staging] [commit_to_target] {cursor.rowcount} ligne(s) remplacée(s) dans {table}")
+                column_list = sql.SQL(', ').join(sql.Identifier(c) for c in columns)
+                cursor.execute(sql.SQL("INSERT INTO {}.{} ({}) SELECT {} FROM {}.{}").format(
+                    sql.Identifier(self.target_schema), sql.Identifier(table), column_list,
+                    column_list, sql.Identifier(self.schema), sql.Identifier(table)
+                ))
+                moved[table] = cursor.rowcount
+            if deferred:
+                set_build_workers(cursor, self.conn, build_workers)
+                for definition in deferred:
+                    rebuild_index(cursor, definition)
+                logger.info(f"[staging] [commit_to_target] {len(deferred)} index reconstruit(s) après le transfert")
+            if on_commit is not None:
+                on_commit(cursor)
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            raise StagingError(f"Échec du transfert vers {self.target_schema}, aucune donnée n'a été importée : {e}")
+        finally:
+            cursor.close()
+        logger.info(f"[staging] [commit_to_target] {sum(moved.values())} ligne(s) transférée(s) vers "
+                    f"{self.target_schema} en {time.perf_counter() - start:.3f}s : {moved}")
+        return moved
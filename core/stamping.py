@@ -0,0 +1,175 @@
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from qgis.core import QgsFeatureRequest, QgsVectorDataProvider
+
+logger = logging.getLogger('DourBase')
+
+# Champs écrasés dans les données des récolements, dans l'ordre historique de run_sql
+STAMPED_FIELDS = (
+    'ID_SOURCE',
+    'AUTEUR',
+    'DATE_PLAN',
+    'MOA',
+    'EXPLOITANT',
+    'HYPERLIENS',
+    'ND_AMONT',
+    'ND_AVAL',
+    'ID_CARG',
+    'ENTREPRISE',
+)
+
+STAMPING_MODES = ('bulk', 'edit_buffer', 'ab')
+
+
+class StampingError(Exception):
+    """Exception levée lorsqu'une couche ne peut pas être marquée."""
+    pass
+
+
+def build_stamp_values(id_source, auteur, date_plan, moa, exploitant, nom_fichier, entreprise) -> Dict[str, Any]:
+    """
+    Calcule une seule fois par import les valeurs constantes écrites dans chaque entité.
+
+    Args:
+        date_plan (str): Date du plan déjà formatée en 'yyyy-MM-dd'
+        nom_fichier (str): Nom de fichier généré, utilisé pour l'hyperlien vers le PDF
+
+    Returns:
+        Dict[str, Any]: Valeur à écrire pour chaque champ de STAMPED_FIELDS
+    """
+    return {
+        'ID_SOURCE': id_source,
+        'AUTEUR': auteur,
+        'DATE_PLAN': date_plan,
+        'MOA': moa,
+        'EXPLOITANT': exploitant,
+        'HYPERLIENS': './pdf/' + nom_fichier + '.pdf',
+        'ND_AMONT': None,
+        'ND_AVAL': None,
+        'ID_CARG': None,
+        'ENTREPRISE': entreprise,
+    }
+
+
+class AttributeStamper:
+    """
+    Moteur de marquage des attributs des couches avant leur import.
+
+    Les index de champs sont résolus une seule fois par couche, puis une table
+    {fid: {idx: valeur}} est construite et appliquée en un seul appel au fournisseur
+    de données, au lieu d'un changeAttributeValue par champ et par entité.
+
+    Args:
+        values (Dict[str, Any]): Valeurs retournées par build_stamp_values
+    """
+
+    def __init__(self, values: Dict[str, Any]):
+        self.values = values
+
+    def resolve_indexes(self, fields) -> Dict[int, Any]:
+        """Retourne {index: valeur} pour les champs de STAMPED_FIELDS présents dans la couche."""
+        attr_map = {}
+        for name in STAMPED_FIELDS:
+            idx = fields.indexFromName(name)
+            if idx >= 0:
+                attr_map[idx] = self.values[name]
+        return attr_map
+
+    def build_change_map(self, layer, attr_map: Dict[int, Any]) -> Dict[int, Dict[int, Any]]:
+        """Construit la table {fid: {idx: valeur}} sans charger ni géométries ni attributs."""
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setNoAttributes()
+        return {feat.id(): dict(attr_map) for feat in layer.getFeatures(request)}
+
+    def stamp_bulk(self, layer) -> Dict[str, Any]:
+        """
+        Applique les valeurs via un unique appel à changeAttributeValues du fournisseur.
+
+        Returns:
+            Dict: {'modified': bool, 'features': int, 'seconds': float}
+        """
+        start = time.perf_counter()
+        provider = layer.dataProvider()
+        if not provider.capabilities() & QgsVectorDataProvider.ChangeAttributeValues:
+            raise StampingError(f"Le fournisseur de la couche {layer.source()} ne permet pas la modification des attributs.")
+
+        attr_map = self.resolve_indexes(layer.fields())
+        change_map = self.build_change_map(layer, attr_map) if attr_map else {}
+        if change_map and not provider.changeAttributeValues(change_map):
+            errors = "; ".join(provider.errors()) if provider.hasErrors() else "erreur inconnue"
+            raise StampingError(f"Échec de la validation des modifications : {errors}")
+        layer.reload()
+
+        seconds = time.perf_counter() - start
+        logger.debug(f"[stamping] [stamp_bulk] {len(change_map)} entité(s) marquée(s) en {seconds:.3f}s : {layer.source()}")
+        return {'modified': bool(change_map), 'features': len(change_map), 'seconds': seconds}
+
+    def stamp_edit_buffer(self, layer, commit: bool = True) -> Dict[str, Any]:
+        """
+        Ancien chemin : un changeAttributeValue par champ et par entité dans le tampon d'édition.
+
+        Args:
+            commit (bool): Si False, les modifications sont annulées après la mesure (mode A/B)
+
+        Returns:
+            Dict: {'modified': bool, 'features': int, 'seconds': float}
+        """
+        start = time.perf_counter()
+        attr_map = self.resolve_indexes(layer.fields())
+        if not layer.startEditing():
+            raise StampingError(f"Impossible de démarrer l'édition de la couche {layer.source()}.")
+
+        modified = False
+        features = 0
+        try:
+            for feat in layer.getFeatures():
+                fid = feat.id()
+                features += 1
+                for idx, value in attr_map.items():
+                    layer.changeAttributeValue(fid, idx, value)
+                    modified = True
+        except Exception:
+            layer.rollBack()
+            raise
+
+        if commit:
+            if not layer.commitChanges():
+                raise StampingError("Échec de la validation des modifications.")
+        else:
+            layer.rollBack()
+
+        seconds = time.perf_counter() - start
+        logger.debug(f"[stamping] [stamp_edit_buffer] {features} entité(s) traitée(s) en {seconds:.3f}s (commit={commit}) : {layer.source()}")
+        return {'modified': modified, 'features': features, 'seconds': seconds}
+
+    def stamp(self, layer, mode: Optional[str] = 'bulk') -> Dict[str, Any]:
+        """
+        Marque la couche selon le mode choisi.
+
+        Args:
+            mode (str): 'bulk' (défaut), 'edit_buffer' (ancien chemin) ou 'ab' (les deux chemins
+                sont chronométrés sur la même couche, seul le chemin 'bulk' est conservé)
+
+        Returns:
+            Dict: {'mode', 'modified', 'features', 'bulk_s', 'edit_buffer_s'}
+        """
+        if mode not in STAMPING_MODES:
+            logger.warning(f"[stamping] [stamp] Mode inconnu '{mode}', utilisation du mode 'bulk'")
+            mode = 'bulk'
+
+        timing = {'mode': mode, 'bulk_s': None, 'edit_buffer_s': None}
+        if mode == 'edit_buffer':
+            result = self.stamp_edit_buffer(layer)
+            timing['edit_buffer_s'] = result['seconds']
+        else:
+            if mode == 'ab':
+                timing['edit_buffer_s'] = self.stamp_edit_buffer(layer, commit=False)['seconds']
+            result = self.stamp_bulk(layer)
+            timing['bulk_s'] = result['seconds']
+
+        timing['modified'] = result['modified']
+        timing['features'] = result['features']
+        return timing
@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger('DourBase')
+
+
+class StageTimer:
+    """
+    Chronométrage des étapes d'un import : temps écoulé et temps CPU du thread qui exécute l'étape.
+
+    Le temps CPU ne comprend pas les processus externes (ogr2ogr) ni le travail du serveur
+    PostgreSQL : un écart important entre les deux temps indique une attente.
+
+    Exemple :
+        timer = StageTimer()
+        with timer.stage("stamping", "AEP_CANA"):
+            ...
+        report["timings"] = timer.entries
+    """
+
+    def __init__(self):
+        self.entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, layer: Optional[str] = None):
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            entry = {
+                'stage': name,
+                'layer': layer,
+                'wall': time.perf_counter() - wall_start,
+                'cpu': time.thread_time() - cpu_start,
+            }
+            with self._lock:
+                self.entries.append(entry)
+            logger.debug(f"[timing] [stage] {name}{f' ({layer})' if layer else ''} : "
+                         f"{entry['wall']:.3f}s écoulées, {entry['cpu']:.3f}s CPU")
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Temps cumulés par étape, dans l'ordre de première exécution : {étape: {wall, cpu, count}}."""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for entry in self.entries:
+                total = totals.setdefault(entry['stage'], {'wall': 0.0, 'cpu': 0.0, 'count': 0})
+                total['wall'] += entry['wall']
+                total['cpu'] += entry['cpu']
+                total['count'] += 1
+        return totals
+
+
+def format_timings(entries: List[Dict[str, Any]], detailed: bool = False) -> str:
+    """
+    Texte des temps par étape pour le compte rendu.
+
+    Args:
+        entries (List[Dict]): StageTimer.entries (ou report['timings'])
+        detailed (bool): Ajoute le détail par couche (fichier de logs)
+    """
+    if not entries:
+        return ""
+    timer = StageTimer()
+    timer.entries = list(entries)
+    text = "Temps par étape (écoulé / CPU) :\n"
+    for stage, total in timer.totals().items():
+        count = f" ({int(total['count'])} fois)" if total['count'] > 1 else ""
+        text += f"  - {stage}{count} : {total['wall']:.3f}s / {total['cpu']:.3f}s\n"
+    if detailed:
+        text += "Détail par couche :\n"
+        for entry in entries:
+            if entry.get('layer'):
+                text += f"  - {entry['stage']} {entry['layer']} : {entry['wall']:.3f}s / {entry['cpu']:.3f}s\n"
+    return text
@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import re
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from typing import Optional
+
+logger = logging.getLogger('DourBase')
+
+LOCK_SUFFIX = '.lock'
+# Sous-dossier de scratch_root réservé aux espaces de travail : rien d'autre n'y est jamais supprimé
+WORKSPACES_DIR = 'DourBase_workspaces'
+# Fichier écrit par RunWorkspace dans chaque espace : seuls les dossiers qui le portent sont supprimés
+MARKER_FILE = '.dourbase_workspace'
+# Un verrou plus ancien est considéré comme abandonné (QGIS fermé brutalement, poste éteint...)
+LOCK_STALE_AFTER = 12 * 3600
+
+
+class WorkspaceError(Exception):
+    """Exception levée lorsqu'un espace de travail est déjà utilisé par un autre import."""
+    pass
+
+
+def default_scratch_root() -> str:
+    return os.path.join(tempfile.gettempdir(), "DourBase")
+
+
+def workspaces_root(scratch_root: Optional[str] = None) -> str:
+    """Dossier des espaces de travail : sous-dossier dédié de scratch_root (du dossier temporaire sinon)."""
+    return os.path.join(scratch_root or default_scratch_root(), WORKSPACES_DIR)
+
+
+def is_workspace(path: str) -> bool:
+    """True si path est un dossier créé par RunWorkspace (il contient le fichier marqueur)."""
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, MARKER_FILE))
+
+
+def _remove_workspace(path: str) -> bool:
+    if not is_workspace(path):
+        if os.path.exists(path):
+            logger.debug(f"[workspace] [_remove_workspace] {path} n'est pas un espace de travail DourBase : conservé")
+        return False
+    shutil.rmtree(path, ignore_errors=True)
+    return True
+
+
+def _pid_alive(pid: int) -> bool:
+    if sys.platform.startswith('win'):
+        # os.kill(pid, 0) n'est pas un test d'existence sous Windows : seul l'âge du verrou est utilisé
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_lock(lock_path: str) -> Optional[dict]:
+    try:
+        with open(lock_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_stale(lock_path: str, stale_after: float = LOCK_STALE_AFTER) -> bool:
+    """Un verrou est abandonné s'il est trop ancien, illisible, ou si son processus (sur ce poste) n'existe plus."""
+    try:
+        age = time.time() - os.path.getmtime(lock_path)
+    except OSError:
+        return True
+    if age > stale_after:
+        return True
+    owner = read_lock(lock_path)
+    if owner is None:
+        # Verrou en cours d'écriture par un autre processus : laissé en place s'il est récent
+        return age > 60
+    if owner.get('host') == socket.gethostname() and isinstance(owner.get('pid'), int):
+        return not _pid_alive(owner['pid'])
+    return False
+
+
+def cleanup_stale_workspaces(root: str, stale_after: float = LOCK_STALE_AFTER) -> int:
+    """
+    Supprime les espaces de travail abandonnés de root : verrou abandonné, ou dossier sans verrou.
+    Seuls les dossiers portant le fichier marqueur de RunWorkspace sont supprimés.
+
+    Returns:
+        int: Nombre d'espaces supprimés
+    """
+    if not os.path.isdir(root):
+        return 0
+    removed = 0
+    for entry in os.listdir(root):
+        path = os.path.join(root, entry)
+        if entry.endswith(LOCK_SUFFIX):
+            if is_stale(path, stale_after):
+                _remove_workspace(path[:-len(LOCK_SUFFIX)])
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                removed += 1
+        elif not os.path.exists(path + LOCK_SUFFIX) and _remove_workspace(path):
+            removed += 1
+    if removed:
+        logger.info(f"[workspace] [cleanup_stale_workspaces] {removed} espace(s) de travail abandonné(s) supprimé(s)")
+    return removed
+
+
+class RunWorkspace:
+    """
+    Espace de travail propre à un import, dans scratch_root/DourBase_workspaces/<id_source>, protégé par un
+    fichier verrou et identifié par un fichier marqueur.
+
+    Deux imports de sources différentes utilisent des dossiers distincts et peuvent s'exécuter en
+    parallèle (y compris depuis deux instances de QGIS). Un second import de la même source est
+    refusé tant que le premier est en cours. Le dossier est supprimé à la libération.
+
+    Args:
+        id_source (str): Identifiant de la source importée
+        root (str): Dossier racine des espaces de travail (paramètre scratch_root, dossier temporaire sinon)
+        keep (bool): Conserve le dossier à la libération (diagnostic)
+    """
+
+    def __init__(self, id_source: str, root: Optional[str] = None, keep: bool = False):
+        self.root = workspaces_root(root)
+        self.name = re.sub(r'[^A-Za-z0-9_.-]', '_', str(id_source)) or "import"
+        self.path = os.path.join(self.root, self.name)
+        self.lock_path = self.path + LOCK_SUFFIX
+        self.keep = keep
+        self._locked = False
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+        return False
+
+    def acquire(self) -> str:
+        """
+        Pose le verrou et crée un dossier vide.
+
+        Returns:
+            str: Chemin de l'espace de travail
+
+        Raises:
+            WorkspaceError: Si un autre import de la même source est en cours
+        """
+        os.makedirs(self.root, exist_ok=True)
+        cleanup_stale_workspaces(self.root)
+        try:
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            owner = read_lock(self.lock_path) or {}
+            raise WorkspaceError(
+                f"Un import de {self.name} est déjà en cours (poste {owner.get('host', '?')}, "
+                f"processus {owner.get('pid', '?')}, depuis {owner.get('started', '?')}). "
+                f"Verrou : {self.lock_path}")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({'pid': os.getpid(), 'host': socket.gethostname(),
+                       'started': time.strftime("%Y-%m-%d %H:%M:%S")}, f)
+        self._locked = True
+        if os.path.exists(self.path) and not _remove_workspace(self.path):
+            self.release()
+            raise WorkspaceError(f"{self.path} existe déjà et n'est pas un espace de travail DourBase.")
+        os.makedirs(self.path)
+        with open(os.path.join(self.path, MARKER_FILE), "w", encoding="utf-8") as f:
+            f.write(self.name)
+        logger.info(f"[workspace] [acquire] Espace de travail {self.path} verrouillé")
+        return self.path
+
+    def release(self) -> None:
+        if not self._locked:
+            return
+        if not self.keep:
+            _remove_workspace(self.path)
+        try:
+            os.remove(self.lock_path)
+        except OSError as e:
+            logger.warning(f"[workspace] [release] Impossible de supprimer le verrou {self.lock_path} : {e}")
+        self._locked = False
+        logger.info(f"[workspace] [release] Espace de travail {self.path} libéré")
@@ -31,6 +31,7 @@ logger.info("DourBase logger initialized")
 from .dour_base_dialog import DourBaseDialog
 from .theme import DarkTheme, LightTheme
 from .utils import get_config_dir
+from .core.pg_pool import shutdown_pool
 
 s = QSettings()
 
@@ -73,6 +74,8 @@ class DourBase:
             self.iface.removeToolBarIcon(self.action)
             self.iface.removePluginMenu("&DourBase", self.action)
             logger.info("Plugin removed from interface")
+            shutdown_pool()
+            logger.info("Database connections closed")
         except Exception as e:
             logger.error(f"Error unloading plugin: {str(e)}", exc_info=True)
             raise
@@ -1,11 +1,8 @@
-import glob
 import logging
 import os
 import sys
 import zipfile
 import requests
-import subprocess
-import tempfile
 import certifi
 import time
 import traceback
@@ -13,20 +10,27 @@ import qgis
 from qgis.PyQt.QtWidgets import (
     QDialog, QVBoxLayout, QLineEdit, QLabel, QCheckBox, QComboBox, QHBoxLayout, QPushButton, QMessageBox,
     QDateEdit, QScrollArea, QWidget, QFileDialog, QInputDialog, QTabWidget, QSpacerItem, QSizePolicy,
-    QFormLayout, QDialogButtonBox, QGroupBox, QTextEdit, QFrame, QSpinBox
+    QFormLayout, QDialogButtonBox, QGroupBox, QTextEdit, QFrame, QSpinBox, QProgressBar
 )
-from qgis.PyQt.QtCore import Qt
-from qgis.PyQt.QtCore import QDate, QSettings, Qt, QSize, QCoreApplication, QRegExp, QTimer
+from qgis.PyQt.QtCore import QDate, QSettings, Qt, QSize
 from datetime import datetime
-from qgis.PyQt.QtGui import QPalette, QColor, QIcon, QPixmap, QIntValidator
+from qgis.PyQt.QtGui import QIcon, QPixmap, QIntValidator
+
+from qgis.core import QgsApplication, QgsSettings
+from .utils import update_file_name, open_config, check_shapefile_completeness, get_shamas, get_param
+from .core.pg_pool import configure_pool, get_pool
+from .core.metadata_cache import get_metadata_cache
+from .core.import_pipeline import ImportTask, import_options_from_settings
+from .core.service import ImportService, build_import_values, saved_connection_params, source_exists
+from .core.batch import (BatchImport, BatchImportTask, DEFAULT_BATCH_WORKERS, format_batch_report, read_batch_manifest,
+                         validate_batch)
+from .core.layer_registry import get_layer_registry
+from .core.planner import ImportPlanner, estimated_throughput, format_plan, record_throughput
+from .core.deployment import DeploymentPipeline, DeploymentTask
+from .core.folder_snapshot import FolderSnapshot
+from .core.timing import StageTimer, format_timings
+from .core.console import BufferedConsole, DEFAULT_FLUSH_INTERVAL_MS, DEFAULT_MAX_LINES
 
-from osgeo import ogr
-import psycopg2
-from qgis.core import QgsSettings, QgsDataSourceUri, QgsVectorLayer
-from .utils import update_file_name, open_config, check_shapefile_completeness, get_shamas, \
-    get_filename_without_extension, get_suffix_after_last_underscore, main_prepare_shapefiles, get_param
-
-import logging
 logger = logging.getLogger('DourBase')
 
 s = QSettings()
@@ -345,6 +349,11 @@ class DourBaseDialog(QDialog):
         self._database_password = ""
         self._database_schema = ""
         self.setWindowTitle("DourBase")
+        configure_pool(
+            idle_timeout=float(get_param("pool_idle_timeout") or 300),
+            health_check_interval=float(get_param("pool_health_check_interval") or 30)
+        )
+        get_metadata_cache(ttl=float(get_param("metadata_cache_ttl") or 300))
 
 
         ############################################################
@@ -537,11 +546,21 @@ class DourBaseDialog(QDialog):
         file_name_edit_layout.addWidget(help_icon_widget("L'ID_SOURCE,\nCelui-ci sera ajouté à BASEDOC et sera écrasé dans les données des récolements."))
         self.content_layout.addLayout(file_name_edit_layout)
 
+        # Plan de l'import (lecture des en-têtes uniquement)
+        self.plan_button = QPushButton("Planifier l'import")
+        self.plan_button.clicked.connect(self.plan_import)
+        self.content_layout.addWidget(self.plan_button)
+
         # Bouton d'exécution SQL
         self.run_button = QPushButton("Insérer dans la base")
         self.run_button.clicked.connect(self.run_sql)
         self.content_layout.addWidget(self.run_button)
 
+        # Import de plusieurs dossiers décrits dans un manifeste (CSV ou JSON)
+        self.batch_button = QPushButton("Import par lot")
+        self.batch_button.clicked.connect(self.run_batch)
+        self.content_layout.addWidget(self.batch_button)
+
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
         self.scroll_area.setWidget(self.content_widget)
@@ -845,6 +864,33 @@ class DourBaseDialog(QDialog):
         self.log_backup_count.valueChanged.connect(self.apply_log_settings)
         backup_count_layout.addWidget(self.log_backup_count, 0, Qt.AlignRight)
         self.param_layout.addLayout(backup_count_layout)
+
+        # Séparateur
+        separator = QFrame()
+        separator.setFrameShape(QFrame.HLine)
+        separator.setFrameShadow(QFrame.Sunken)
+        self.param_layout.addWidget(separator)
+
+        # Cache des métadonnées de la base (schémas, groupes, tables)
+        self.param_layout.addWidget(QLabel("<b>Cache des métadonnées de la base :</b>"))
+
+        metadata_ttl_layout = QHBoxLayout()
+        metadata_ttl_layout.addWidget(QLabel("Durée de validité (secondes, 0 = désactivé) :"))
+        metadata_ttl_layout.addStretch()
+
+        self.metadata_cache_ttl = QSpinBox(self)
+        self.metadata_cache_ttl.setMinimum(0)
+        self.metadata_cache_ttl.setMaximum(86400)
+        self.metadata_cache_ttl.setValue(int(float(get_param("metadata_cache_ttl") or 300)))
+        self.metadata_cache_ttl.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.metadata_cache_ttl.valueChanged.connect(self.apply_metadata_cache_settings)
+        metadata_ttl_layout.addWidget(self.metadata_cache_ttl, 0, Qt.AlignRight)
+        self.param_layout.addLayout(metadata_ttl_layout)
+
+        self.refresh_metadata_btn = QPushButton("Rafraîchir les schémas et groupes")
+        self.refresh_metadata_btn.setToolTip("Vide le cache : les schémas, groupes et tables seront relus depuis la base")
+        self.refresh_metadata_btn.clicked.connect(self.refresh_metadata_cache)
+        self.param_layout.addWidget(self.refresh_metadata_btn)
         
         # Ajoute un espace extensible en bas pour forcer l'alignement en haut
         self.param_layout.addSpacerItem(QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding))
@@ -928,14 +974,8 @@ class DourBaseDialog(QDialog):
         }
         groupes = []
         try:
-            import psycopg2
-            conn = psycopg2.connect(**conn_params)
-            cur = conn.cursor()
-            cur.execute("SELECT rolname FROM pg_roles WHERE rolcanlogin = false;")
-            rows = cur.fetchall()
-            groupes = [row[0] for row in rows]
-            cur.close()
-            conn.close()
+            groupes = get_metadata_cache().group_roles(conn_params["host"], conn_params["port"], conn_params["database"],
+                                                       conn_params["user"], conn_params["password"])
         except Exception as e:
             print("Erreur lors de la connexion ou de la requête :", e)
         return groupes
@@ -946,37 +986,38 @@ class DourBaseDialog(QDialog):
         except Exception:
             pass
 
+        if getattr(self, 'console', None) is not None:
+            self.console.close()
+
         self.console_widget = QWidget()
         layout = QVBoxLayout(self.console_widget)
         self.console_textedit = QTextEdit()
         self.console_textedit.setReadOnly(True)
         layout.addWidget(self.console_textedit)
+        self.console = BufferedConsole(
+            self.console_textedit,
+            max_lines=int(get_param("console_max_lines") or DEFAULT_MAX_LINES),
+            flush_interval_ms=int(get_param("console_flush_ms") or DEFAULT_FLUSH_INTERVAL_MS),
+            spill_dir=os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "console"),
+            parent=self
+        )
+        self.console_progress = QProgressBar()
+        self.console_progress.setRange(0, 100)
+        self.console_progress.setVisible(False)
+        layout.addWidget(self.console_progress)
         self.console_tab_index = self.tabs.addTab(self.console_widget, "Console")
         self.tabs.setCurrentIndex(self.console_tab_index)
 
     def log_to_console(self, message):
         logger.info(f"[DourBaseDialog] [log_to_console] {message}")
-        # Détection du niveau de log et application de la couleur
-        color = None
-        html_message = message
-
-        if message.startswith("[INFO]"):
-            color = "blue"
-            html_message = f'<span style="color:{color};"><b>[INFO]</b></span>{message[6:]}'
-        elif message.startswith("[WARNING]"):
-            color = "orange"
-            html_message = f'<span style="color:{color};"><b>[WARNING]</b></span>{message[9:]}'
-        elif message.startswith("[ERROR]"):
-            color = "red"
-            html_message = f'<span style="color:{color};"><b>[ERROR]</b></span>{message[7:]}'
-        elif "Aborting" in message:
-            color = "red"
-
-            html_message = message.replace('Aborting', f'<span style="color:{color};"><b>Aborting</b></span>')
-        html_message = html_message.replace('\n', '<br>')
-        self.console_textedit.append(html_message)
-        self.console_textedit.verticalScrollBar().setValue(self.console_textedit.verticalScrollBar().maximum())
-        QCoreApplication.processEvents()
+        if getattr(self, 'console', None) is not None:
+            self.console.append(message)
+
+    def console_text(self):
+        """Historique complet de la console (y compris les messages qui ne sont plus affichés)."""
+        if getattr(self, 'console', None) is None:
+            return ""
+        return self.console.text()
 
     def format_num_source(self):
         text = self.num_source_edit.text()
@@ -1266,6 +1307,20 @@ class DourBaseDialog(QDialog):
         except Exception as e:
             logger.error(f"[DourBaseDialog] [apply_log_settings] Erreur lors de la mise à jour des paramètres des logs: {str(e)}")
 
+    def apply_metadata_cache_settings(self):
+        """Applique la durée de validité du cache des métadonnées"""
+        ttl = self.metadata_cache_ttl.value()
+        s.setValue("DourBase/metadata_cache_ttl", ttl)
+        get_metadata_cache(ttl=float(ttl))
+        logger.info(f"[DourBaseDialog] [apply_metadata_cache_settings] Durée de validité du cache : {ttl}s")
+
+    def refresh_metadata_cache(self):
+        """Vide le cache des métadonnées de la base"""
+        removed = get_metadata_cache().clear()
+        logger.info(f"[DourBaseDialog] [refresh_metadata_cache] {removed} entrée(s) supprimée(s)")
+        QMessageBox.information(self, "Cache vidé",
+                                "Les schémas, groupes et tables seront relus depuis la base à la prochaine utilisation.")
+
     def change_theme(self):
         """Change le thème de l'application en fonction de la sélection"""
         theme = self.theme_combo.currentData()
@@ -1299,20 +1354,7 @@ class DourBaseDialog(QDialog):
         settings.endGroup()
 
     def get_selected_db_params(self):
-        settings = QgsSettings()
-        selected = self.db_combo.currentText()
-        group = f"PostgreSQL/connections/{selected}"
-
-        settings.beginGroup(group)
-        params = {
-            "host": settings.value("host", ""),
-            "port": settings.value("port", ""),
-            "dbname": settings.value("database", ""),
-            "user": settings.value("username", ""),
-            "password": settings.value("password", ""),
-            "schema": settings.value("schema", "")
-        }
-        settings.endGroup()
+        params = saved_connection_params(self.db_combo.currentText())
 
         if not params["user"] or not params["password"]:
             dlg = LoginDialog(self, params["user"], params["password"])
@@ -1367,97 +1409,6 @@ class DourBaseDialog(QDialog):
             name = f"Erreur : {e}"
         self.file_name_edit.setText(name)
 
-    def count_features_in_db(self, database, schema, table):
-        conn = psycopg2.connect(
-            dbname=database["dbname"],
-            user=database['user'],
-            password=database["password"],
-            host=database["host"],
-            port=database["port"]
-        )
-        cur = conn.cursor()
-        query = f'SELECT COUNT(*) FROM "{schema}"."{table}"'
-        cur.execute(query)
-        count = cur.fetchone()[0]
-        cur.close()
-        conn.close()
-        return count
-
-    def get_allowed_shp_types(self):
-        shp_type_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "shp_type.txt")
-        try:
-            with open(shp_type_file, "r", encoding="utf-8") as f:
-                allowed_types = [line.strip().lower() for line in f.readlines()]
-            return allowed_types
-        except Exception as e:
-            self.log_to_console(f"[ERROR] Impossible de lire shp_type.txt : {e}")
-            return []
-
-    def is_shp_allowed(self, shpfile):
-        allowed_types = self.get_allowed_shp_types()
-        shp_name = get_filename_without_extension(shpfile).lower()
-        return shp_name in allowed_types
-
-    def upload_to_db(self, shpfile, database):
-        if not self.is_shp_allowed(shpfile):
-            self.log_to_console(
-                f"[WARNING] Le shapefile {shpfile} n'est pas dans la liste des types autorisés. Ignoré.")
-
-            self.report['shp_files_ignored'] = self.report['shp_files_ignored'] + 1
-            return
-
-        if not database["password"]:
-            QMessageBox.critical(self, "Erreur", "Aucun mot de passe PostgreSQL fourni, connexion annulée.")
-            self.log_to_console(f"[ERROR] Aucun mot de passe PostgreSQL fourni, connexion annulée.")
-            return
-
-        layer = QgsVectorLayer(shpfile, "", "ogr")
-        if not layer.isValid():
-            self.log_to_console(f"[ERROR] Failed to load the shapefile : {shpfile}.")
-            print("Failed to load the shapefile!")
-            return
-
-        layer_name = get_filename_without_extension(shpfile).lower()
-        expected = layer.featureCount()  # X
-
-        # 1. Compter avant import
-        count_before = self.count_features_in_db(database, database['schema'], layer_name)
-
-        geometry_type = layer.geometryType()
-
-        self.log_to_console(f"[INFO] Geometry Type: {geometry_type}.\n[INFO] layer name : {layer.name}")
-        print(f"Geometry Type: {geometry_type}")
-        print(layer.name)
-
-        if str(geometry_type) in ("1", "3"):
-            nlt_arg = "-nlt PROMOTE_TO_MULTI"
-        elif str(geometry_type) == "0":
-            nlt_arg = "-nlt POINT"
-        else:
-            print(f"Geometry type of {shpfile} is unknown. aborting")
-            self.log_to_console(f"Geometry type of {shpfile} is unknown. Aborting.")
-            return
-        password = database['password']
-        password = password.replace('"', '\\"')
-        command = f"""ogr2ogr.exe -f PostgreSQL "PG:dbname='{database["dbname"]}' host={database["host"]} port={database["port"]} sslmode=disable user={database['user']} password={password}" -lco DIM=2 {shpfile} {get_filename_without_extension(shpfile)} -append -lco GEOMETRY_NAME=geom -lco FID=ID_{get_suffix_after_last_underscore(shpfile)} -nln {database['schema']}.{layer_name} -a_srs EPSG:2154 {nlt_arg}"""
-        safe_command = command.replace(
-            f"password={password}",
-            "password=[PASSWORD HIDDEN FOR SECURITY REASONS]"
-        )
-
-        os.system(command)
-        self.log_to_console(f"[INFO] Command executed {safe_command}.")
-        print(safe_command)
-
-        # 2. Compter après import
-        count_after = self.count_features_in_db(database, database['schema'], layer_name)
-        inserted = count_after - count_before  # Y
-
-        # 3. Stocker dans le rapport
-        if 'entities_per_layer' not in self.report:
-            self.report['entities_per_layer'] = {}
-        self.report['entities_per_layer'][layer_name] = (inserted, expected)
-
     def show_report_popup(self):
         entities_info = ""
         if 'entities_per_layer' in self.report:
@@ -1465,22 +1416,60 @@ class DourBaseDialog(QDialog):
             for layer, (added, expected) in self.report['entities_per_layer'].items():
                 entities_info += f"  - {layer} : {added}/{expected}\n"
 
+        load_errors_info = ""
+        load_errors = {layer: result['errors'] for layer, result in self.report.get('load_results', {}).items() if result['errors']}
+        if load_errors:
+            load_errors_info = "\nErreurs renvoyées par le chargement :\n"
+            for layer, errors in load_errors.items():
+                load_errors_info += f"  - {layer} : {'; '.join(errors)}\n"
+
+        stamping_info = ""
+        if self.report.get('stamping'):
+            stamping_info = "\nTemps de marquage des attributs (tampon d'édition / appel groupé) :\n"
+            total_edit_buffer = 0.0
+            total_bulk = 0.0
+            for layer, timing in self.report['stamping'].items():
+                edit_buffer_s = timing.get('edit_buffer_s')
+                bulk_s = timing.get('bulk_s')
+                total_edit_buffer += edit_buffer_s or 0.0
+                total_bulk += bulk_s or 0.0
+                edit_buffer_txt = f"{edit_buffer_s:.3f}s" if edit_buffer_s is not None else "-"
+                bulk_txt = f"{bulk_s:.3f}s" if bulk_s is not None else "-"
+                stamping_info += f"  - {layer} ({timing.get('features', 0)} entités) : {edit_buffer_txt} / {bulk_txt}\n"
+            stamping_info += f"  Total : {total_edit_buffer:.3f}s / {total_bulk:.3f}s\n"
+
+        created_indexes = [name for names in self.report.get('created_indexes', {}).values() for name in names]
+        created_indexes_info = f"Index créés après l'import : {', '.join(created_indexes)}\n" if created_indexes else ""
+        deferred_tables = self.report.get('deferred_indexes', [])
+        if deferred_tables:
+            created_indexes_info += f"Index reconstruits après le chargement : {', '.join(deferred_tables)}\n"
+
+        # Les chargeurs gdal et copy remontent leurs erreurs (load_errors_info), ogr2ogr non
+        ogr2ogr_warning = ""
+        if self.report.get('loader_backend', get_param("loader_backend") or "ogr2ogr") == "ogr2ogr":
+            ogr2ogr_warning = "ATTENTION ! Le compte rendu ne prend pas en compte les erreurs renvoyées par l'outil ogr2ogr.\n"
+
         summary = (
             f"Créées : Les couches ont été créées \"telle quelle\", sans modification.\n"
             f"Modifiées : Les couches ont été modifiées (attributs mis à jour) avant d’être importées.\n\n"
-            f"ATTENTION ! Le compte rendu ne prend pas en compte les erreurs renvoyées par l'outil ogr2ogr.\n\n\n\n"
+            f"{ogr2ogr_warning}\n\n\n"
             f"Nombre de fichiers .shp à traiter : {self.report['total_layers']}\n"
             f"Nombre de fichiers .shp traités : {self.report['shp_files_processed']}\n"
             f"Nombre de fichiers .shp ignorés : {self.report['shp_files_ignored']}\n"
+            f"Nombre de fichiers .shp inchangés depuis le dernier import : {self.report.get('shp_files_unchanged', 0)}\n"
             f"Nombre de couches créées : {self.report['added_layers']}\n"
             f"Nombre de couches modifiées : {self.report['modified_layers']}\n"
             f"Nombre de fichiers en erreur : {self.report['shp_files_errors']}\n"
             f"{entities_info}"
+            f"{load_errors_info}"
+            f"{stamping_info}"
+            f"{format_timings(self.report.get('timings', []))}"
+            f"{created_indexes_info}"
         )
         console_logs = (
             f"\n\n\n\n\n"
             "========== Console output ==========\n\n"
-            f"{self.console_textedit.toPlainText()}"
+            f"{self.console_text()}"
         )
 
         msg = QMessageBox(self)
@@ -1489,7 +1478,14 @@ class DourBaseDialog(QDialog):
 
         # Préparation des logs complets
         full_logs = "Compte rendu du traitement :\n\n" + summary + "\nDétails :\n" + "\n".join(self.report.get("logs", []))
-        if hasattr(self, 'console_textedit'):
+        if self.report.get('timings'):
+            full_logs += "\n\n" + format_timings(self.report['timings'], detailed=True)
+        if self.report.get('layer_metadata'):
+            full_logs += "\nCouches importées (entités, type de géométrie, SCR, champs) :\n"
+            for layer, metadata in self.report['layer_metadata'].items():
+                full_logs += (f"  - {layer} : {metadata['features']}, {metadata['geometry_type']}, "
+                              f"{metadata['crs'] or 'SCR non lu'}, {metadata['fields']} champ(s)\n")
+        if getattr(self, 'console', None) is not None:
             full_logs += console_logs
         
         # Gestion des logs avec save_logs qui gère déjà tous les cas
@@ -1558,6 +1554,175 @@ class DourBaseDialog(QDialog):
 
             print(f"[ERROR] Error installing RsxIndent : {e}")
 
+    def start_import_task(self, pipeline):
+        """Lance l'import dans le gestionnaire de tâches de QGIS, sans bloquer l'interface."""
+        task = ImportTask(pipeline)
+        task.logMessage.connect(self.log_to_console)
+        task.progressChanged.connect(lambda progress: self.console_progress.setValue(int(progress)))
+        task.importSucceeded.connect(self.on_import_succeeded)
+        task.importFailed.connect(self.on_import_failed)
+        # Conserve une référence : la tâche ne doit pas être détruite avant la fin de l'import
+        self._import_task = task
+        self.run_button.setEnabled(False)
+        self.console_progress.setValue(0)
+        self.console_progress.setVisible(True)
+        QgsApplication.taskManager().addTask(task)
+        self.log_to_console("[INFO] Import lancé en arrière-plan")
+
+    def on_import_succeeded(self, report):
+        options = self._import_task.pipeline.options
+        self._import_task = None
+        if report.get("elapsed_seconds"):
+            record_throughput(report.get("source_bytes", 0), report["elapsed_seconds"],
+                              options.get("import_pipeline") or "qgis", options.get("loader_backend") or "ogr2ogr")
+        self.run_button.setEnabled(True)
+        self.console_progress.setVisible(False)
+        self.report = report
+        self.log_to_console(f"[INFO] Insertion réussie dans la base.")
+        QMessageBox.information(self, "Succès", f"Insertion réussie dans la base !")
+        self.show_report_popup()
+
+    def on_import_failed(self, error, report):
+        self._import_task = None
+        self.run_button.setEnabled(True)
+        self.console_progress.setVisible(False)
+        self.report = report
+        self.log_to_console(f"[ERROR] Erreur lors de l'insertion :{error}")
+        MessagesBoxes.error(self, "Erreur", f"Erreur lors de l'insertion :\n{error}",
+                            savelog=True,
+                            console_logs=self.console_text(), folder=self.FOLDER)
+
+    def run_batch(self):
+        """
+        Importe les dossiers listés dans un manifeste de lot (CSV ou JSON), avec leurs métadonnées basedoc.
+        Toutes les entrées sont validées avant le premier import.
+        """
+        path, _ = QFileDialog.getOpenFileName(self, "Manifeste du lot", "", "Manifeste (*.csv *.json)")
+        if not path:
+            return
+        self.add_console_tab()
+        self.log_to_console(f"[INFO] Import par lot : {path}")
+        try:
+            database = self.get_selected_db_params()
+        except Exception as e:
+            self.log_to_console(f"[ERROR] Error getting database params: {e}")
+            QMessageBox.critical(self, "Erreur de connexion",
+                                 f"Impossible de se connecter à la base de données. Erreur: {e}")
+            return
+        if database is None:
+            self.log_to_console("[WARNING] Database is none. Aborting")
+            return
+
+        try:
+            entries, problems = validate_batch(read_batch_manifest(path), database)
+        except Exception as e:
+            self.log_to_console(f"[ERROR] Validation du lot impossible : {e}")
+            MessagesBoxes.error(self, "Erreur", f"Validation du lot impossible :\n{e}",
+                                savelog=True, console_logs=self.console_text(), folder=os.path.dirname(path))
+            return
+        if problems:
+            for problem in problems:
+                self.log_to_console(f"[ERROR] {problem}")
+            MessagesBoxes.error(self, "Lot invalide",
+                                f"{len(problems)} problème(s) dans le manifeste, aucun import n'a été lancé :\n\n"
+                                + "\n".join(problems[:30]),
+                                savelog=True, console_logs=self.console_text(), folder=os.path.dirname(path))
+            return
+        if not entries:
+            QMessageBox.warning(self, "Import par lot", "Le manifeste ne contient aucune entrée.")
+            return
+
+        try:
+            workers = int(get_param("batch_workers") or DEFAULT_BATCH_WORKERS)
+        except ValueError:
+            workers = DEFAULT_BATCH_WORKERS
+        reply = QMessageBox.question(
+            self, "Import par lot",
+            f"{len(entries)} dossier(s) valide(s), importés {workers} à la fois.\nLancer l'import ?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply == QMessageBox.No:
+            self.log_to_console("[INFO] User answered 'NO'. Aborting")
+            return
+
+        task = BatchImportTask(BatchImport(entries, database, import_options_from_settings(), workers))
+        task.logMessage.connect(self.log_to_console)
+        task.progressChanged.connect(lambda progress: self.console_progress.setValue(int(progress)))
+        task.batchFinished.connect(self.on_batch_finished)
+        task.batchFailed.connect(self.on_batch_failed)
+        self._batch_task = task
+        self.run_button.setEnabled(False)
+        self.batch_button.setEnabled(False)
+        self.console_progress.setValue(0)
+        self.console_progress.setVisible(True)
+        QgsApplication.taskManager().addTask(task)
+        self.log_to_console("[INFO] Import par lot lancé en arrière-plan")
+
+    def on_batch_finished(self, report):
+        options = self._batch_task.batch.options
+        self._batch_task = None
+        for result in report["entries"]:
+            if result["status"] == "réussi" and result["report"].get("elapsed_seconds"):
+                record_throughput(result["report"].get("source_bytes", 0), result["report"]["elapsed_seconds"],
+                                  options.get("import_pipeline") or "qgis", options.get("loader_backend") or "ogr2ogr")
+        self.run_button.setEnabled(True)
+        self.batch_button.setEnabled(True)
+        self.console_progress.setVisible(False)
+        text = format_batch_report(report)
+        self.log_to_console(f"[INFO] {text}")
+        if report["failed"]:
+            MessagesBoxes.error(self, "Import par lot", text, savelog=True, console_logs=self.console_text())
+        else:
+            MessagesBoxes.succes(self, "Import par lot", text, savelog=True, console_logs=self.console_text())
+
+    def on_batch_failed(self, error):
+        self._batch_task = None
+        self.run_button.setEnabled(True)
+        self.batch_button.setEnabled(True)
+        self.console_progress.setVisible(False)
+        self.log_to_console(f"[ERROR] Import par lot interrompu : {error}")
+        MessagesBoxes.error(self, "Erreur", f"Import par lot interrompu :\n{error}",
+                            savelog=True, console_logs=self.console_text())
+
+    def plan_import(self):
+        """
+        Affiche le plan de l'import sans rien écrire : entités et volume lus dans les en-têtes,
+        couches ignorées, tables absentes du schéma cible et durée estimée.
+        """
+        if not self.FOLDER:
+            QMessageBox.warning(self, "Plan de l'import", "Veuillez d'abord importer un dossier.")
+            return
+        try:
+            allowed_types = get_layer_registry().allowed
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Impossible de lire shp_type.txt :\n{e}")
+            return
+
+        existing_tables = None
+        if not is_test_mode:
+            try:
+                database = self.get_selected_db_params()
+                if database is not None:
+                    # Liste des tables lue dans le cache des métadonnées (une requête au plus par durée de validité)
+                    existing_tables = get_metadata_cache().tables(database["host"], database["port"], database["dbname"],
+                                                                  database["user"], database["password"],
+                                                                  database["schema"])
+            except Exception as e:
+                logger.warning(f"[dour_base_dialog] [plan_import] Existence des tables non vérifiée : {e}")
+
+        throughput = estimated_throughput(get_param("import_pipeline") or "qgis",
+                                          get_param("loader_backend") or "ogr2ogr")
+        plan = ImportPlanner(self.FOLDER, allowed_types, existing_tables, throughput).plan()
+        text = format_plan(plan)
+        if existing_tables is None:
+            text += "\n\nExistence des tables cibles non vérifiée."
+
+        msg = QMessageBox(self)
+        msg.setWindowTitle("Plan de l'import")
+        msg.setIcon(QMessageBox.Warning if plan["missing_tables"] or plan["errors"] else QMessageBox.Information)
+        msg.setText(text)
+        msg.exec_()
+
     def run_sql(self):
         self.add_console_tab()
         self.log_to_console("[INFO] Run_sql called")
@@ -1574,14 +1739,16 @@ class DourBaseDialog(QDialog):
                 else:
                     self.log_to_console(f"[ERROR] Error getting database params: {e}")
                     MessagesBoxes.error(self, "Erreur de connexion", 
-                                        f"Impossible de se connecter à la base de données. Erreur: {e}",savelog=True,console_logs=self.console_textedit.toPlainText(), folder=self.FOLDER)
+                                        f"Impossible de se connecter à la base de données. Erreur: {e}",savelog=True,console_logs=self.console_text(), folder=self.FOLDER)
                     return
             if database is None:
                 print("[WARNING] Database is none. Aborting")
                 self.log_to_console("[WARNING] Database is none. Aborting")
                 return
             try:
-                check_shapefile_completeness(self.FOLDER)
+                # Le dossier est lu une seule fois : l'instantané sert ensuite à la préparation et à l'import
+                snapshot = FolderSnapshot(self.FOLDER)
+                check_shapefile_completeness(self.FOLDER, snapshot)
             except FileNotFoundError as e:
                 # QMessageBox.critical(self, "Erreur",
                 #                      f"Erreur lors de la récupération des fichiers :\n{e}\n\nAjout dans la base de données annulé.")
@@ -1589,14 +1756,11 @@ class DourBaseDialog(QDialog):
                 MessagesBoxes.error(self, "Erreur",
                                     f"Erreur lors de la récupération des fichiers :\n{e}\n\nAjout dans la base de données annulé.",
                                     savelog=True,
-                                    console_logs=self.console_textedit.toPlainText(), folder=self.FOLDER)
+                                    console_logs=self.console_text(), folder=self.FOLDER)
                 return
 
 
             self.auteur = self.b_etude_edit.text()
-            convert_dir = main_prepare_shapefiles(self.FOLDER)
-            self.NEW_FOLDER = convert_dir
-            self.SHP = os.path.join(self.NEW_FOLDER, '*.shp')
             depco = self.combo_depco.currentData()
             depco = depco[1]
             num_source = self.num_source_edit.text()
@@ -1606,9 +1770,9 @@ class DourBaseDialog(QDialog):
             cote = 'Oui' if self.cote.isChecked() else 'Non'
             utilisat = 'Oui' if self.utilisat.isChecked() else 'Non'
             no_origine = ''
-            localisat = self.localisat_edit.text().replace("'", "''")
+            localisat = self.localisat_edit.text()
             date_qdate = self.date_plan_edit.date()
-            type_plan = self.plan_type_edit.text().replace("'", "''")
+            type_plan = self.plan_type_edit.text()
             date_str = date_qdate.toString("yyyy-MM-dd")
             b_etude = self.b_etude_edit.text()
             entreprise = self.combo_entreprise.currentData()
@@ -1622,29 +1786,9 @@ class DourBaseDialog(QDialog):
             moa = self.combo_moa.currentData()
             id_source = str(depco) + '_' + str(num_source)
             exploitant = self.combo_exploitant.currentData()
-            hyperliens = './pdf/' + nom_fichier + '.pdf'
-            ID_OBJET = None
-            ND_AMONT = None
-            ND_AVAL = None
-            ID_CARG = None
-            self.report = {
-                "total_layers": 0,
-                "added_layers": 0,
-                "modified_layers": 0,
-                "shp_files_processed": 0,
-                "shp_files_errors": 0,
-                "shp_files_ignored": 0,
-                "logs": []
-            }
-
-            shp_files = glob.glob(self.SHP)
-            self.report["total_layers"] = len(shp_files)
-
             text = (
                 f"[INFO] Données utilisée dans le traitement : \n"
                 f"* auteur : {self.auteur}\n"
-                f"* Dossier de sortie : {convert_dir}\n"
-                f"* fichiers shp : {self.SHP}\n"
                 f"* depco : {depco}\n"
                 f"* num_source : {num_source}\n"
                 f"* aep : {'non' if aep == '' else 'oui'}\n"
@@ -1665,9 +1809,9 @@ class DourBaseDialog(QDialog):
                 f"* moa : {moa}\n"
                 f"* id source : {id_source}\n"
                 f"* exploitant : {exploitant}\n"
-                f"* fichiers shp : {shp_files}\n"
             )
             self.log_to_console(text)
+            timer = StageTimer()
 
 
             try:
@@ -1679,13 +1823,8 @@ class DourBaseDialog(QDialog):
                     return
 
                 try:
-                    conn = psycopg2.connect(
-                        host=database["host"],
-                        dbname=database["dbname"],
-                        user=database["user"],
-                        password=database["password"],
-                        port=database["port"]
-                    )
+                    conn = get_pool().acquire(database["host"], database["port"], database["dbname"],
+                                              database["user"], database["password"])
                     cursor = conn.cursor()
                 except Exception as e:
                     error_message = str(e)
@@ -1700,11 +1839,12 @@ class DourBaseDialog(QDialog):
                         self.log_to_console(f"[ERROR] Error connecting to the database: {error_message}")
                     return
 
-                cursor.execute(
-                    f"SELECT 1 FROM {database['schema']}.basedoc WHERE id_source = %s",
-                    (id_source,)
-                )
-                exists = cursor.fetchone() is not None
+                try:
+                    with timer.stage("existence basedoc"):
+                        exists = source_exists(cursor, database['schema'], id_source)
+                finally:
+                    cursor.close()
+                    get_pool().release(conn)
 
                 if exists:
                     self.log_to_console(
@@ -1720,14 +1860,10 @@ class DourBaseDialog(QDialog):
                     if reply == QMessageBox.No:
                         self.log_to_console(
                             f"[INFO] User answered 'NO'. Aborting")
-                        cursor.close()
-                        conn.close()
                         return
                     else:
                         self.log_to_console(
                             f"[INFO] User answered 'YES'.")
-                        cursor.close()
-                        conn.close()
             except Exception as e:
                 print(traceback.format_exc())
                 self.log_to_console(
@@ -1748,189 +1884,31 @@ class DourBaseDialog(QDialog):
                 else:
                     self.log_to_console(
                         f"[INFO] User answered 'YES'.")
-            try:
-                for layer_path in shp_files:
-                    print(f"Traitement de la couche : {layer_path}")
-                    self.log_to_console(
-                        f"[INFO] Traitement de la couche : {layer_path}")
-                    try:
-                        layer_edit = QgsVectorLayer(layer_path, '', 'ogr')
-                        if not layer_edit.isValid():
-                            self.report["shp_files_errors"] += 1
-                            self.log_to_console(
-                                f"[ERROR] Couche invalide {layer_path}")
-                            self.report["logs"].append(f"Erreur : Couche invalide {layer_path}")
-                            QMessageBox.critical(self, "Erreur",
-                                                f"La couche {layer_path} n'est pas valide. Modifications annulées.")
-                            continue
-
-                        # Récupération des index de champs (vérifier existence)
-                        index_id_source = layer_edit.fields().indexFromName('ID_SOURCE')
-                        index_auteur = layer_edit.fields().indexFromName('AUTEUR')
-                        index_date_plan = layer_edit.fields().indexFromName('DATE_PLAN')
-                        index_moa = layer_edit.fields().indexFromName('MOA')
-                        index_exploitant = layer_edit.fields().indexFromName('EXPLOITANT')
-                        index_hyperliens = layer_edit.fields().indexFromName('HYPERLIENS')
-                        index_id_objet = 0
-                        index_nd_amont = layer_edit.fields().indexFromName('ND_AMONT')
-                        index_nd_aval = layer_edit.fields().indexFromName('ND_AVAL')
-                        index_id_carg = layer_edit.fields().indexFromName('ID_CARG')
-                        index_entreprise = layer_edit.fields().indexFromName('ENTREPRISE')
-                        # Démarrer l'édition
-                        if not layer_edit.startEditing():
-                            self.log_to_console(
-                                f"[ERROR] Impossible de démarrer l'édition de la couche {layer_path}.")
-                            self.report["shp_files_errors"] += 1
-                            self.report["logs"].append(f"Erreur : Impossible de démarrer l'édition {layer_path}")
-                            QMessageBox.critical(self, "Erreur",
-                                                f"Impossible de démarrer l'édition de la couche {layer_path}.")
-                            continue
-
-                        try:
-                            modified = False
-                            for feat in layer_edit.getFeatures():
-                                fid = feat.id()
-                                if index_id_source >= 0:
-                                    layer_edit.changeAttributeValue(fid, index_id_source, id_source)
-                                    modified = True
-                                if index_auteur >= 0:
-                                    layer_edit.changeAttributeValue(fid, index_auteur, self.auteur)
-                                    modified = True
-                                if index_date_plan >= 0:
-                                    layer_edit.changeAttributeValue(fid, index_date_plan,
-                                                                    self.date_plan_edit.date().toString("yyyy-MM-dd"))
-                                    modified = True
-                                if index_moa >= 0:
-                                    layer_edit.changeAttributeValue(fid, index_moa, moa)
-                                    modified = True
-                                if index_exploitant >= 0:
-                                    layer_edit.changeAttributeValue(fid, index_exploitant, exploitant)
-                                    modified = True
-                                if index_hyperliens >= 0:
-                                    layer_edit.changeAttributeValue(fid, index_hyperliens,
-                                                                    './pdf/' + self.file_name_edit.text() + '.pdf')
-                                    modified = True
-                                if index_nd_amont >= 0:
-                                    layer_edit.changeAttributeValue(fid, index_nd_amont, None)
-                                    modified = True
-                                if index_nd_aval >= 0:
-                                    layer_edit.changeAttributeValue(fid, index_nd_aval, None)
-                                    modified = True
-                                if index_id_carg >= 0:
-                                    layer_edit.changeAttributeValue(fid, index_id_carg, None)
-                                    modified = True
-                                if index_entreprise >= 0:
-                                    layer_edit.changeAttributeValue(fid, index_entreprise, entreprise)
-                                    modified = True
-                            # Valider les modifications
-                            if not layer_edit.commitChanges():
-                                raise Exception("Échec de la validation des modifications.")
-
-                            self.report["shp_files_processed"] += 1
-                            if modified:
-                                self.report["modified_layers"] += 1
-                                self.report["logs"].append(f"Modifié : {layer_path}")
-                            else:
-                                self.report["added_layers"] += 1
-                                self.report["logs"].append(f"Ajouté (pas de modif détectée) : {layer_path}")
-
-                        except Exception as e:
-                            self.log_to_console(
-                                f"[ERROR] Erreur lors de la modification de la couche {layer_path} :\n{str(e)}")
-                            self.report["shp_files_errors"] += 1
-                            self.report["logs"].append(f"Erreur sur {layer_path} : {str(e)}")
-                            QMessageBox.critical(self, "Erreur",
-                                                f"Erreur lors de la modification de la couche {layer_path} :\n{str(e)}")
-                    except Exception as e:
-                        self.log_to_console(
-                            f"[ERROR] Error : {str(e)}")
-                        print(f"ERROR : {str(e)}")
-                        QMessageBox.critical(self, "Erreur",
-                                            f"Erreur : {str(e)}")
-
-                # Import des donnees dans PostgreSQL-PostGIS
-                print("self.SHP =", self.SHP)
-                self.log_to_console(f"self.SHP = {self.SHP}")
-                print(f"glob.glob(self.SHP) = {glob.glob(self.SHP)}")
-                self.log_to_console(f"glob.glob(self.SHP) = {glob.glob(self.SHP)}")
-                for layer in shp_files:
-                    try:
-                        self.log_to_console(f"[INFO] importing layer {layer}")
-                        self.upload_to_db(layer, database)
-                        self.log_to_console(f"[INFO] layer imported succesfuly ({layer})")
-                        self.report["logs"].append(f"Import réussi : {layer}")
-                    except Exception as e:
-                        self.report["shp_files_errors"] += 1
-                        self.log_to_console(f"[INFO] Error importing layer {layer}: {str(e)}")
-                        self.report["logs"].append(f"Erreur d'import sur {layer} : {str(e)}")
-
-                conn = psycopg2.connect(
-                    host=database["host"],
-                    dbname=database["dbname"],
-                    user=database["user"],
-                    password=database["password"],
-                    port=database["port"]
-                )
-
-                sql = f"""
-                INSERT INTO {database["schema"]}.basedoc(
-                    id_source,
-                    depco,
-                    no_origine,
-                    aep,
-                    eu,
-                    epl,
-                    localisat,
-                    type_plan,
-                    b_etude,
-                    entreprise,
-                    date,
-                    echelle,
-                    cote,
-                    etat,
-                    q_support,
-                    nom_fich,
-                    utilisat)
-                VALUES (
-                    '{id_source}',
-                    '{depco}',
-                    '{no_origine}',
-                    '{aep}',
-                    '{eu}',
-                    '{epl}',
-                    '{localisat}',
-                    '{type_plan}',
-                    '{b_etude}',
-                    '{str(entreprise)}',
-                    '{date_str}',
-                    '{echelle}',
-                    '{cote}',
-                    '{etat}',
-                    '{q_support}',
-                    '{nom_fichier}',
-                    '{utilisat}'
-                );"""
-                print(sql)
-                self.log_to_console(f"[INFO] sql request: {sql}")
-                cursor = conn.cursor()
-                self.log_to_console(f"[INFO] executing sql request")
-                cursor.execute(sql)
-                self.log_to_console(f"[INFO] commiting changes")
-                conn.commit()
-                cursor.close()
-                self.log_to_console(f"[INFO] cursor closed")
-                conn.close()
-                self.log_to_console(f"[INFO] Insertion réussie dans la base.")
-                QMessageBox.information(self, "Succès", f"Insertion réussie dans la base !")
-                self.show_report_popup()
-
-            except Exception as e:
-                print(traceback.format_exc())
-                self.log_to_console(f"[ERROR] Erreur lors de l'insertion :{e}")
-                # QMessageBox.critical(self, "Erreur", f"Erreur lors de l'insertion :\n{e}")
-                MessagesBoxes.error(self, "Erreur", f"Erreur lors de l'insertion :\n{e}",
-                                    savelog=True,
-                                    console_logs=self.console_textedit.toPlainText(), folder=self.FOLDER)
+            _, stamp_values, basedoc_row = build_import_values(
+                depco=depco,
+                num_source=num_source,
+                aep=self.aep_cb.isChecked(),
+                eu=self.eu_cb.isChecked(),
+                epl=self.epl_cb.isChecked(),
+                date_str=date_str,
+                entreprise=entreprise,
+                etat=etat,
+                q_support=q_support,
+                moa=moa,
+                exploitant=exploitant,
+                cote=self.cote.isChecked(),
+                utilisat=self.utilisat.isChecked(),
+                localisat=localisat,
+                type_plan=type_plan,
+                b_etude=b_etude,
+                echelle=echelle,
+                no_origine=no_origine,
+                nom_fichier=nom_fichier,
+                auteur=self.auteur
+            )
+            pipeline = ImportService(database).create_pipeline(self.FOLDER, stamp_values, basedoc_row,
+                                                               snapshot=snapshot, timer=timer)
+            self.start_import_task(pipeline)
         else:
             self.report = {
                 "total_layers": 50,
@@ -1954,7 +1932,7 @@ class DourBaseDialog(QDialog):
             
             groupes = self.get_groupes()
             if not groupes:
-                MessagesBoxes.error(self,"Error", "Aucun groupes n'a été trouvé. Abandon.", savelog=True, console_logs=self.console_textedit.toPlainText())
+                MessagesBoxes.error(self,"Error", "Aucun groupes n'a été trouvé. Abandon.", savelog=True, console_logs=self.console_text())
                 return
 
             # Création de la popup
@@ -2024,7 +2002,7 @@ class DourBaseDialog(QDialog):
                         else:
                             self.log_to_console(f"[ERROR] Error getting schemas: {e}")
                             MessagesBoxes.error(self, "Erreur de connexion", 
-                                                f"Impossible de se connecter à la base de données. Erreur: {e}",savelog=True,console_logs=self.console_textedit.toPlainText(), folder=self.FOLDER)
+                                                f"Impossible de se connecter à la base de données. Erreur: {e}",savelog=True,console_logs=self.console_text(), folder=self.FOLDER)
                             return
                     schemas.sort()
                     self.log_to_console(f"[INFO] Schémas disponibles : {schemas}")
@@ -2057,7 +2035,7 @@ class DourBaseDialog(QDialog):
                         else:
                             self.log_to_console(f"[ERROR] Error getting schemas: {e}")
                             MessagesBoxes.error(self, "Erreur de connexion", 
-                                                f"Impossible de se connecter à la base de données. Erreur: {e}",savelog=True,console_logs=self.console_textedit.toPlainText(), folder=self.FOLDER)
+                                                f"Impossible de se connecter à la base de données. Erreur: {e}",savelog=True,console_logs=self.console_text(), folder=self.FOLDER)
                             return
                     schemas.sort()
                     self.log_to_console(f"[INFO] Schémas disponibles : {schemas}")
@@ -2081,149 +2059,56 @@ class DourBaseDialog(QDialog):
             message = (
                 f"[INFO] Rapport des données avant le lancement :\n"
                 f"* db_consultation_backup_path : {db_consultation_backup_path}\n"
-                f"* password : {password}\n"
+                f"* password : [PASSWORD HIDDEN FOR SECURITY REASONS]\n"
                 f"* username : {username}\n"
                 f"* backup_travail_path : {backup_travail_path}")
-            message = message.replace(
-                f"* password : {password}",
-                "* password : [PASSWORD HIDDEN FOR SECURITY REASONS]"
-            )
             self.log_to_console(message)
-            batch_content = f"""
-            @echo off
-            set PGPASSWORD={password}
-            pg_dump.exe -h {db_consultation['host']} -U {username} -d {db_consultation['dbname']} -p {db_consultation['port']} -n {db_consultation['schema']} -E UTF8 > "{db_consultation_backup_path}\\{db_consultation['schema']}_backup.sql"
-            pg_dump.exe -h {db_work['host']} -U {username} -d {db_work['dbname']} -p {db_work['port']} -n {db_work['schema']} -E UTF8 > "{backup_travail_path}\\{db_work['schema']}.sql"
-            """
-            safe_batch_content = batch_content.replace(
-                f"set PGPASSWORD={password}",
-                "set PGPASSWORD=[PASSWORD HIDDEN FOR SECURITY REASONS]"
+            pipeline = DeploymentPipeline(
+                db_consultation=db_consultation,
+                db_work=db_work,
+                username=username,
+                password=password,
+                group=group,
+                backup_consultation_path=db_consultation_backup_path,
+                backup_travail_path=backup_travail_path
             )
-
-            self.log_to_console(f"[INFO] Contenu du fichier batch : {safe_batch_content}")
-            self.log_to_console(f"[INFO] Création du fichier batch temporaire")
-            print(batch_content)
-            batch_content = '\n'.join([line.strip() for line in batch_content.split('\n') if line.strip()])
-            with tempfile.NamedTemporaryFile(suffix='.bat', delete=False, mode='w') as f:
-                f.write(batch_content)
-                bat_path = f.name
-            self.log_to_console(f"[INFO] Fichier batch temporaire créé. bat_path : {bat_path}")
-            try:
-                result = subprocess.run(
-                    [bat_path],
-                    shell=True,
-                    check=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    encoding='cp1252'  # ou encoding='mbcs' mais en théorie c'est encoding='cp1252'. à voir si nous devons changer ça dans le futur
-                )
-            except subprocess.CalledProcessError as e:
-                # QMessageBox.critical(self, "Erreur",
-                #                         f"Sortie standard : {e.stdout}\nErreur standard : {e.stderr}")
-                MessagesBoxes.error(self, "Erreur", f"Sortie standard : {e.stdout}\nErreur standard : {e.stderr}",
-                                    savelog=True,
-                                    console_logs=self.console_textedit.toPlainText(), folder=self.save_dir_path)
-                self.log_to_console(f"[ERROR] Erreur lors de l'exécution du batch : Sortie standard : {e.stdout}\nErreur standard : {e.stderr}")
-                print("Erreur lors de l'exécution du batch :")
-                print("Sortie standard :", e.stdout)
-                print("Erreur standard :", e.stderr)
-
-            finally:
-                self.log_to_console(
-                    f"[INFO] Supression du batch temporaire")
-                try:
-                    os.unlink(bat_path)
-
-                    self.log_to_console(
-                        f"[INFO] Supression terminée")
-                except:
-                    pass
-            try:
-                batch_content = f"""
-                @echo off
-                set PGPASSWORD={password}
-                psql.exe -h {db_consultation['host']} -U {username} -d {db_consultation['dbname']} -p {db_consultation['port']} < "{backup_travail_path}\\{db_consultation['schema']}.sql"
-                """
-                conn = psycopg2.connect(
-                    host=db_consultation["host"],
-                    dbname=db_consultation["dbname"],
-                    user=username,
-                    port=db_consultation["port"],
-                    password=password
-                )
-                cur = conn.cursor()
-                cur.execute(f"DROP SCHEMA IF EXISTS {db_consultation['schema']} CASCADE;")
-                conn.commit()
-                batch_content = '\n'.join([line.strip() for line in batch_content.split('\n') if line.strip()])
-                with tempfile.NamedTemporaryFile(suffix='.bat', delete=False, mode='w') as f:
-                    f.write(batch_content)
-                    bat_path = f.name
-                safe_batch_content = batch_content.replace(
-                    f"set PGPASSWORD={password}",
-                    "set PGPASSWORD=[PASSWORD HIDDEN FOR SECURITY REASONS]"
-                )
-
-                self.log_to_console(f"[INFO] Contenu du fichier batch : {safe_batch_content}")
-                self.log_to_console(f"[INFO] Fichier batch temporaire créé. bat_path : {bat_path}")
-                try:
-                    result = subprocess.run(
-                        [bat_path],
-                        shell=True,
-                        check=True,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True,
-                        encoding='cp1252'
-                        # ou encoding='mbcs' mais en théorie c'est encoding='cp1252'. à voir si nous devons changer ça dans le futur
-                    )
-                except subprocess.CalledProcessError as e:
-                #     QMessageBox.critical(self, "Erreur",
-                #                          f"Sortie standard : {e.stdout}\nErreur standard : {e.stderr}")
-                    MessagesBoxes.error(self, "Erreur", f"Sortie standard : {e.stdout}\nErreur standard : {e.stderr}", savelog=True,
-                                        console_logs=self.console_textedit.toPlainText())
-                    self.log_to_console(
-                        f"[ERROR] Erreur lors de l'exécution du batch : Sortie standard : {e.stdout}\nErreur standard : {e.stderr}")
-                    print("Erreur lors de l'exécution du batch :")
-                    print("Sortie standard :", e.stdout)
-                    print("Erreur standard :", e.stderr)
-
-                finally:
-                    self.log_to_console(
-                        f"[INFO] Suppression du batch temporaire")
-                    try:
-                        os.unlink(bat_path)
-
-                        self.log_to_console(
-                            f"[INFO] Suppression terminée")
-                    except:
-                        pass
-                command2 = f"GRANT USAGE ON SCHEMA {db_consultation['schema']} TO {group};"
-                command3 = f"ALTER DEFAULT PRIVILEGES IN SCHEMA {db_consultation['schema']} GRANT SELECT ON TABLES TO {group};"
-                self.log_to_console(f"[INFO] Executing command2 : {command2}")
-                cur.execute(command2)
-                self.log_to_console(f"[INFO] Succes.")
-                self.log_to_console(f"[INFO] Executing command3 : {command3}")
-                cur.execute(command3)
-                self.log_to_console(f"[INFO] Succes.")
-                conn.commit()
-                self.log_to_console(f"[INFO] Changes commited.")
-                cur.close()
-                self.log_to_console(f"[INFO] Cursor closed.")
-                conn.close()
-                self.log_to_console(f"[INFO] Connection closed.")
-            except Exception as e:
-                MessagesBoxes.error(self, "Erreur", f"Erreur lors du déploiement : {e}", savelog=True,
-                                    console_logs=self.console_textedit.toPlainText(), folder=self.save_dir_path)
-            finally:
-                MessagesBoxes.succes(self, "Information", "Déploiement terminé.", savelog=True, console_logs=self.console_textedit.toPlainText(), folder=self.save_dir_path)
+            self.start_deployment_task(pipeline)
         else:
             self.log_to_console(f"[INFO] Connection closed.")
-            MessagesBoxes.succes(self, "Information", "Déploiement terminé.", savelog=True, console_logs=self.console_textedit.toPlainText(), folder=self.save_dir_path)
-        # continuer la boucle de manière dégueu, mais bon faute de meilleur idée...
-        # le but est de ne pas terminer le processus, on attends un certain nombre de secondes pour après fermer l'onglet console. Cela dis, ça ne sera pas super fluide, étant donné que l'interface sera mise à jour toute les 0.1 secondes.
-        for item in range(1000):
-            time.sleep(0.1)
-            QCoreApplication.processEvents()
-
-        self.tabs.removeTab(4)
+            MessagesBoxes.succes(self, "Information", "Déploiement terminé.", savelog=True, console_logs=self.console_text(), folder=self.save_dir_path)
+            self.tabs.removeTab(self.console_tab_index)
+
+    def start_deployment_task(self, pipeline):
+        """Lance le déploiement dans le gestionnaire de tâches de QGIS, sans bloquer l'interface."""
+        task = DeploymentTask(pipeline)
+        task.logMessage.connect(self.log_to_console)
+        task.stageStarted.connect(lambda stage: self.log_to_console(f"[INFO] Déploiement : étape '{stage}'"))
+        task.progressChanged.connect(lambda progress: self.console_progress.setValue(int(progress)))
+        task.deploymentSucceeded.connect(self.on_deployment_succeeded)
+        task.deploymentFailed.connect(self.on_deployment_failed)
+        # Conserve une référence : la tâche ne doit pas être détruite avant la fin du déploiement
+        self._deployment_task = task
+        self.deploy_button.setEnabled(False)
+        self.console_progress.setValue(0)
+        self.console_progress.setVisible(True)
+        QgsApplication.taskManager().addTask(task)
+        self.log_to_console("[INFO] Déploiement lancé en arrière-plan")
+
+    def on_deployment_succeeded(self):
+        self._deployment_task = None
+        self.deploy_button.setEnabled(True)
+        self.console_progress.setVisible(False)
+        self.log_to_console("[INFO] Déploiement terminé.")
+        MessagesBoxes.succes(self, "Information", "Déploiement terminé.", savelog=True,
+                             console_logs=self.console_text(), folder=self.save_dir_path)
+        # Le déploiement a abouti : la console n'est plus utile
+        self.tabs.removeTab(self.console_tab_index)
+
+    def on_deployment_failed(self, stage, error):
+        self._deployment_task = None
+        self.deploy_button.setEnabled(True)
+        self.console_progress.setVisible(False)
+        self.log_to_console(f"[ERROR] Erreur lors du déploiement (étape '{stage}') : {error}")
+        # La console reste ouverte pour permettre l'analyse de l'erreur
+        MessagesBoxes.error(self, "Erreur", f"Erreur lors du déploiement (étape '{stage}') : {error}", savelog=True,
+                            console_logs=self.console_text(), folder=self.save_dir_path)
@@ -0,0 +1,62 @@
+"""
+Tests unitaires des modules de core/ qui ne dépendent pas d'une base PostgreSQL.
+
+Le plugin est importé comme paquet (les modules de core/ utilisent des imports relatifs), comme dans
+benchmarks/bench_import.py. Les modules qui importent qgis, osgeo ou psycopg2 sont ignorés si ces
+bibliothèques sont absentes ; lancer les tests avec l'interpréteur Python de QGIS pour tout exécuter :
+
+    python -m pytest -q tests
+"""
+import importlib
+import os
+import struct
+import sys
+
+import pytest
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_plugin_module(name: str, *requires: str):
+    """Importe un module du plugin, après avoir vérifié (ou ignoré le test sans) les bibliothèques requises."""
+    for module in requires:
+        pytest.importorskip(module)
+    if os.path.dirname(PLUGIN_DIR) not in sys.path:
+        sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+    return importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.{name}")
+
+
+def shp_header(shape_type: int, file_length: int, bbox=(0.0, 0.0, 0.0, 0.0)) -> bytes:
+    """En-tête de 100 octets d'un .shp ou d'un .shx (longueur en octets)."""
+    return (struct.pack('>i', 9994) + b'\x00' * 20 + struct.pack('>i', file_length // 2)
+            + struct.pack('<ii', 1000, shape_type) + struct.pack('<4d', *bbox) + b'\x00' * 32)
+
+
+def dbf_header(records: int, fields) -> bytes:
+    """En-tête d'un .dbf : fields est une liste de (nom, type, longueur, décimales)."""
+    header_length = 32 + 32 * len(fields) + 1
+    record_length = 1 + sum(length for _, _, length, _ in fields)
+    data = bytes([3, 124, 1, 1]) + struct.pack('<IHH', records, header_length, record_length) + b'\x00' * 20
+    for name, field_type, length, decimals in fields:
+        data += (name.encode('latin-1').ljust(11, b'\x00') + field_type.encode('ascii') + b'\x00' * 4
+                 + bytes([length, decimals]) + b'\x00' * 14)
+    return data + b'\x0d'
+
+
+def write_shapefile(folder, name: str, shape_type: int = 1, records: int = 2, shx_records=None,
+                    fields=(('ID_SOURCE', 'C', 30, 0), ('DIAMETRE', 'N', 5, 0)), bbox=(1.0, 2.0, 3.0, 4.0)) -> str:
+    """
+    Écrit un shapefile dont seuls les en-têtes sont significatifs (les enregistrements sont des octets nuls).
+
+    Returns:
+        str: Chemin du .shp
+    """
+    shx_records = records if shx_records is None else shx_records
+    base = os.path.join(str(folder), name)
+    with open(base + '.shp', 'wb') as f:
+        f.write(shp_header(shape_type, 100 + 28 * records, bbox) + b'\x00' * 28 * records)
+    with open(base + '.shx', 'wb') as f:
+        f.write(shp_header(shape_type, 100 + 8 * shx_records, bbox) + b'\x00' * 8 * shx_records)
+    with open(base + '.dbf', 'wb') as f:
+        f.write(dbf_header(records, fields) + b' ' * records)
+    return base + '.shp'
@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+from conftest import import_plugin_module, write_shapefile
+
+batch = import_plugin_module("core.batch", "qgis", "psycopg2", "osgeo")
+
+CONFIG = {
+    'depco': [('LESNEVEN', 29124), ('PLOUIDER', 29186)],
+    'entreprise': [('NR', -2), ('CEO', 1)],
+    'etat': [('Numérique', 1), ('Papier', 2)],
+    'q_support': [('Bon', 0), ('Moyen', 1)],
+    'moa': [('NR', -2), ('Brest métropole', 900)],
+    'exploitant': [('NR', -2), ('Eau du Ponant', 2)],
+}
+
+
+def delivery(folder) -> str:
+    os.makedirs(str(folder), exist_ok=True)
+    path = write_shapefile(folder, "aep_vanne")
+    with open(os.path.splitext(path)[0] + ".prj", "w") as f:
+        f.write('PROJCS["RGF93 / Lambert-93"]')
+    return str(folder)
+
+
+def row(folder, **values):
+    entry = {'folder': folder, 'depco': '29124', 'num_source': '7', 'aep': 'oui', 'date_plan': '2024-03-01',
+             'entreprise': 'CEO', 'etat': '1', 'q_support': 'Bon', 'moa': '900', 'exploitant': 'Eau du Ponant'}
+    entry.update(values)
+    return entry
+
+
+def test_read_batch_manifest_csv(tmp_path):
+    path = tmp_path / "lot.csv"
+    path.write_text("\ufeffFolder;DEPCO;num_source;aep;inconnue\nrecolements/a;29124; 7 ;oui;x\n;29186;8;;\n",
+                    encoding="utf-8")
+    rows = batch.read_batch_manifest(str(path))
+    assert len(rows) == 2
+    assert rows[0]['folder'] == os.path.join(str(tmp_path), "recolements", "a")
+    assert rows[0]['depco'] == '29124' and rows[0]['num_source'] == '7'
+    assert rows[1]['folder'] == '' and rows[1]['aep'] == ''
+
+
+def test_read_batch_manifest_json(tmp_path):
+    path = tmp_path / "lot.json"
+    path.write_text(json.dumps({'entries': [{'folder': 'a', 'num_source': 7, 'aep': None}]}), encoding="utf-8")
+    rows = batch.read_batch_manifest(str(path))
+    assert rows == [{'folder': os.path.join(str(tmp_path), "a"), 'num_source': '7', 'aep': ''}]
+    path.write_text(json.dumps([{'folder': '/data/b'}]), encoding="utf-8")
+    assert batch.read_batch_manifest(str(path))[0]['folder'] == os.path.normpath('/data/b')
+
+
+@pytest.mark.parametrize('content', ['{"entries": 3}', '["a", "b"]', '{pas du json'])
+def test_read_batch_manifest_invalid(tmp_path, content):
+    path = tmp_path / "lot.json"
+    path.write_text(content, encoding="utf-8")
+    with pytest.raises(batch.BatchError):
+        batch.read_batch_manifest(str(path))
+
+
+def test_read_batch_manifest_missing_file(tmp_path):
+    with pytest.raises(batch.BatchError):
+        batch.read_batch_manifest(str(tmp_path / "absent.csv"))
+
+
+def test_build_entry(tmp_path):
+    folder = delivery(tmp_path / "recolement")
+    entry, problems = batch.build_entry(row(folder, etat='Numérique', depco='lesneven'), 2, CONFIG)
+    assert problems == []
+    assert entry.line == 2 and entry.folder == folder
+    assert entry.id_source == '29124_007'
+    assert entry.stamp_values['ID_SOURCE'] == '29124_007'
+    assert entry.basedoc_row['aep'] == '*' and entry.basedoc_row['eu'] == ''
+    assert entry.basedoc_row['etat'] == 'Numérique'
+    assert entry.snapshot is not None
+
+
+def test_build_entry_missing_fields():
+    entry, problems = batch.build_entry({'folder': '/data', 'depco': '29124'}, 3, CONFIG)
+    assert entry is None
+    assert "champ 'num_source' manquant" in problems
+    assert len(problems) == len(batch.REQUIRED_FIELDS) - 2
+
+
+def test_build_entry_invalid_values(tmp_path):
+    entry, problems = batch.build_entry(
+        row(str(tmp_path / "absent"), depco='99999', num_source='sept', date_plan='01/03/2024', aep='non'), 4, CONFIG)
+    assert entry is None
+    assert len(problems) == 5
+    assert problems[0].startswith("dossier introuvable")
+
+
+def test_build_entry_incomplete_shapefile(tmp_path):
+    folder = delivery(tmp_path / "recolement")
+    os.remove(os.path.join(folder, "aep_vanne.prj"))
+    entry, problems = batch.build_entry(row(folder), 5, CONFIG)
+    assert entry is None and len(problems) == 1
@@ -0,0 +1,72 @@
+import argparse
+
+import pytest
+
+from conftest import import_plugin_module, write_shapefile
+
+cli = import_plugin_module("cli", "qgis", "psycopg2", "osgeo")
+
+
+def connection_args(**values):
+    args = {'connection': None, 'host': 'localhost', 'port': None, 'dbname': 'dourbase', 'user': 'sig',
+            'schema': 'recolement'}
+    args.update(values)
+    return argparse.Namespace(**args)
+
+
+def test_database_params(monkeypatch):
+    monkeypatch.setenv("DOURBASE_PASSWORD", "secret")
+    params = cli.database_params(connection_args())
+    assert params['password'] == "secret"
+    assert params['port'] == "5432"
+
+
+def test_database_params_missing_value_is_invalid_input(monkeypatch, capsys):
+    monkeypatch.setenv("DOURBASE_PASSWORD", "secret")
+    with pytest.raises(SystemExit) as exit_info:
+        cli.database_params(connection_args(dbname=None))
+    assert exit_info.value.code == cli.EXIT_INVALID
+    assert "dbname" in capsys.readouterr().err
+
+
+@pytest.fixture
+def unreachable_database(monkeypatch, tmp_path):
+    """Lot valide, mais la vérification des id_source dans basedoc échoue (mot de passe refusé)."""
+    import psycopg2
+
+    batch = import_plugin_module("core.batch")
+
+    def existing_sources(database, id_sources):
+        raise psycopg2.OperationalError('FATAL:  password authentication failed for user "sig"')
+
+    monkeypatch.setenv("DOURBASE_PASSWORD", "faux")
+    monkeypatch.setattr(batch, "existing_sources", existing_sources)
+    monkeypatch.setattr(batch, "load_config_values", lambda: {
+        'depco': [('LESNEVEN', 29124)], 'entreprise': [('CEO', 1)], 'etat': [('Numérique', 1)],
+        'q_support': [('Bon', 0)], 'moa': [('Brest métropole', 900)], 'exploitant': [('Eau du Ponant', 2)],
+    })
+    folder = tmp_path / "recolement"
+    folder.mkdir()
+    write_shapefile(folder, "aep_vanne")
+    (folder / "aep_vanne.prj").write_text('PROJCS["RGF93 / Lambert-93"]')
+    return str(folder)
+
+
+CONNECTION = ["--host", "localhost", "--dbname", "dourbase", "--user", "sig", "--schema", "recolement"]
+
+
+def test_command_import_database_error_is_invalid_input(unreachable_database, capsys):
+    args = cli.build_parser().parse_args(
+        ["import", unreachable_database, "--depco", "29124", "--num-source", "7", "--aep", "--date-plan", "2024-03-01",
+         "--entreprise", "CEO", "--etat", "1", "--q-support", "Bon", "--moa", "900", "--exploitant", "2"] + CONNECTION)
+    assert cli.command_import(args) == cli.EXIT_INVALID
+    assert "password authentication failed" in capsys.readouterr().err
+
+
+def test_command_batch_database_error_is_invalid_input(unreachable_database, tmp_path, capsys):
+    manifest = tmp_path / "lot.csv"
+    manifest.write_text("folder;depco;num_source;aep;date_plan;entreprise;etat;q_support;moa;exploitant\n"
+                        f"{unreachable_database};29124;7;oui;2024-03-01;CEO;1;Bon;900;2\n", encoding="utf-8")
+    args = cli.build_parser().parse_args(["batch", str(manifest)] + CONNECTION)
+    assert cli.command_batch(args) == cli.EXIT_INVALID
+    assert "password authentication failed" in capsys.readouterr().err
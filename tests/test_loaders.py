@@ -0,0 +1,97 @@
+from conftest import import_plugin_module
+
+loaders = import_plugin_module("core.loaders", "psycopg2", "osgeo")
+
+DATABASE = {'host': 'localhost', 'port': '5432', 'dbname': 'dourbase', 'user': 'sig', 'password': 'x',
+            'schema': 'recolement'}
+
+
+class FakeDefn:
+    def __init__(self, fields):
+        self.fields = fields
+
+    def GetFieldIndex(self, name):
+        return self.fields.index(name) if name in self.fields else -1
+
+
+class FakeTable:
+    """Table PostgreSQL vue par OGR : lignes = valeurs de id_source."""
+
+    def __init__(self, rows, fields=('id_source',)):
+        self.rows = list(rows)
+        self.fields = list(fields)
+        self.filter = None
+
+    def GetLayerDefn(self):
+        return FakeDefn(self.fields)
+
+    def SetAttributeFilter(self, expression):
+        self.filter = expression
+
+    def GetFeatureCount(self):
+        if self.filter is None:
+            return len(self.rows)
+        return sum(1 for value in self.rows if self.filter == f"id_source = '{value}'")
+
+
+class FakeDataset:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def GetLayerByName(self, name):
+        return self.tables.get(name)
+
+    def FlushCache(self):
+        pass
+
+
+class FakeSource:
+    def __init__(self, count):
+        self.count = count
+
+    def GetLayer(self, index):
+        return self
+
+    def GetFeatureCount(self):
+        return self.count
+
+    def GetName(self):
+        return "aep_vanne"
+
+
+def gdal_loader(monkeypatch, tables, id_source='29124_007'):
+    loader = loaders.GdalLoader(DATABASE, id_source=id_source)
+    loader._ds = FakeDataset(tables)
+    monkeypatch.setattr(loaders.gdal, "PushErrorHandler", lambda handler: None, raising=False)
+    monkeypatch.setattr(loaders.gdal, "PopErrorHandler", lambda: None, raising=False)
+    monkeypatch.setattr(loaders.gdal, "VectorTranslateOptions", lambda options: options, raising=False)
+    return loader
+
+
+def test_count_rows_filters_on_id_source(monkeypatch):
+    table = FakeTable(['29124_007', '29124_007', '29186_001'])
+    loader = gdal_loader(monkeypatch, {'recolement.aep_vanne': table})
+    assert loader.count_rows('aep_vanne') == 2
+    assert table.filter is None
+    assert loader.count_rows('eu_regard') == 0
+
+
+def test_count_rows_without_id_source_column(monkeypatch):
+    table = FakeTable(['a', 'b', 'c'], fields=('nom',))
+    assert gdal_loader(monkeypatch, {'recolement.aep_vanne': table}).count_rows('aep_vanne') == 3
+
+
+def test_load_layer_measures_written_rows(monkeypatch):
+    table = FakeTable(['29124_007', '29186_001'])
+    loader = gdal_loader(monkeypatch, {'recolement.aep_vanne': table})
+
+    def vector_translate(ds, src, options):
+        # Le pilote n'écrit que 3 des 5 entités, sans signaler d'erreur
+        table.rows.extend(['29124_007'] * 3)
+        return ds
+
+    monkeypatch.setattr(loaders.ogr, "Open", lambda path, update: FakeSource(5), raising=False)
+    monkeypatch.setattr(loaders.gdal, "VectorTranslate", vector_translate, raising=False)
+    result = loader.load_layer("/tmp/aep_vanne.shp", "aep_vanne", "ID_VANNE", "POINT")
+    assert result['errors'] == []
+    assert (result['written'], result['expected']) == (3, 5)
@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import import_plugin_module, write_shapefile
+
+manifest = import_plugin_module("core.manifest", "psycopg2", "osgeo")
+
+STAMP = {'ID_SOURCE': '29019_007', 'AUTEUR': 'Bureau', 'DATE_PLAN': '2024-05-02'}
+
+
+def test_stamp_digest_ignores_key_order():
+    reordered = dict(reversed(list(STAMP.items())))
+    assert manifest.stamp_digest(STAMP) == manifest.stamp_digest(reordered)
+    assert manifest.stamp_digest(STAMP) != manifest.stamp_digest(dict(STAMP, AUTEUR='Autre'))
+
+
+def test_layer_content_hash_is_stable(tmp_path):
+    path = write_shapefile(tmp_path, "aep_vanne")
+    content_hash = manifest.layer_content_hash(path, STAMP)
+    assert len(content_hash) == 64
+    assert manifest.layer_content_hash(path, dict(STAMP)) == content_hash
+
+
+def test_layer_content_hash_changes_with_content(tmp_path):
+    path = write_shapefile(tmp_path, "aep_vanne", records=2)
+    before = manifest.layer_content_hash(path, STAMP)
+    with open(tmp_path / "aep_vanne.dbf", "ab") as f:
+        f.write(b' ')
+    assert manifest.layer_content_hash(path, STAMP) != before
+
+
+def test_layer_content_hash_changes_with_stamp(tmp_path):
+    path = write_shapefile(tmp_path, "aep_vanne")
+    assert manifest.layer_content_hash(path, STAMP) != manifest.layer_content_hash(path, dict(STAMP, DATE_PLAN='2024-06-01'))
+
+
+def test_layer_content_hash_ignores_other_sidecars(tmp_path):
+    path = write_shapefile(tmp_path, "aep_vanne")
+    before = manifest.layer_content_hash(path, STAMP)
+    (tmp_path / "aep_vanne.shx").write_bytes(b'\x00' * 200)
+    (tmp_path / "aep_vanne.prj").write_text('PROJCS["RGF93 / Lambert-93"]')
+    assert manifest.layer_content_hash(path, STAMP) == before
+
+
+def test_layer_content_hash_requires_dbf(tmp_path):
+    path = write_shapefile(tmp_path, "aep_vanne")
+    (tmp_path / "aep_vanne.dbf").unlink()
+    with pytest.raises(FileNotFoundError):
+        manifest.layer_content_hash(path, STAMP)
+
+
+def test_is_unchanged():
+    entry = manifest.ImportManifest(None, 'recolement', '29019_007')
+    entry.entries = {'aep_vanne': 'abc'}
+    assert entry.is_unchanged('aep_vanne', 'abc')
+    assert not entry.is_unchanged('aep_vanne', 'def')
+    assert not entry.is_unchanged('eu_regard', 'abc')
@@ -0,0 +1,109 @@
+import struct
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from conftest import import_plugin_module
+
+pg_copy = import_plugin_module("core.pg_copy", "psycopg2", "osgeo")
+
+POINT_NDR = struct.pack('<BIdd', 1, 1, 150000.0, 6850000.0)
+POINT_XDR = struct.pack('>BIdd', 0, 1, 150000.0, 6850000.0)
+POLYGON_NDR = struct.pack('<BIII', 1, 3, 1, 4) + struct.pack('<8d', 0, 0, 1, 0, 1, 1, 0, 0)
+
+
+def numeric(ndigits, weight, sign, dscale, *groups) -> bytes:
+    return struct.pack('!hhHH', ndigits, weight, sign, dscale) + struct.pack(f'!{len(groups)}H', *groups)
+
+
+def test_launder_and_fid_column():
+    assert pg_copy.launder("Nom Voie-2#") == "nom_voie_2_"
+    assert pg_copy.fid_column_for("aep_canalisation") == "id_canalisation"
+
+
+def test_ewkb_from_wkb_little_endian():
+    ewkb = pg_copy.ewkb_from_wkb(POINT_NDR, srid=2154)
+    assert ewkb[0] == 1
+    assert struct.unpack('<II', ewkb[1:9]) == (1 | 0x20000000, 2154)
+    assert ewkb[9:] == POINT_NDR[5:]
+
+
+def test_ewkb_from_wkb_big_endian():
+    ewkb = pg_copy.ewkb_from_wkb(POINT_XDR, srid=2154)
+    assert ewkb[0] == 0
+    assert struct.unpack('>II', ewkb[1:9]) == (1 | 0x20000000, 2154)
+    assert ewkb[9:] == POINT_XDR[5:]
+
+
+def test_ewkb_from_wkb_promote_to_multi():
+    ewkb = pg_copy.ewkb_from_wkb(POLYGON_NDR, srid=2154, promote_to_multi=True)
+    assert struct.unpack('<BIII', ewkb[:13]) == (1, 6 | 0x20000000, 2154, 1)
+    assert ewkb[13:] == POLYGON_NDR
+    # Un point n'est pas promu (comme -nlt PROMOTE_TO_MULTI, qui ne concerne que lignes et polygones)
+    assert pg_copy.ewkb_from_wkb(POINT_NDR, promote_to_multi=True)[9:] == POINT_NDR[5:]
+
+
+def test_ewkb_from_wkb_empty():
+    assert pg_copy.ewkb_from_wkb(None) is None
+    assert pg_copy.ewkb_from_wkb(b'') is None
+
+
+def test_encode_text_value():
+    assert pg_copy.encode_text_value(None) == '\\N'
+    assert pg_copy.encode_text_value(True) == 't'
+    assert pg_copy.encode_text_value(12.5) == '12.5'
+    assert pg_copy.encode_text_value(b'abc') == 'abc'
+    assert pg_copy.encode_text_value('a\tb\nc\\d\r') == 'a\\tb\\nc\\\\d\\r'
+
+
+@pytest.mark.parametrize('value, expected', [
+    (Decimal('123.45'), numeric(2, 0, 0, 2, 123, 4500)),
+    (Decimal('-123.45'), numeric(2, 0, 0x4000, 2, 123, 4500)),
+    (Decimal('10000'), numeric(1, 1, 0, 0, 1)),
+    (Decimal('0.0001'), numeric(1, -1, 0, 4, 1)),
+    (Decimal('0'), numeric(0, 0, 0, 0)),
+    (12345678.9, numeric(3, 1, 0, 1, 1234, 5678, 9000)),
+    (Decimal('NaN'), numeric(0, 0, 0xC000, 0)),
+])
+def test_binary_numeric(value, expected):
+    assert pg_copy.BINARY_ENCODERS['numeric'](value) == expected
+
+
+def test_binary_encoders():
+    encoders = pg_copy.BINARY_ENCODERS
+    assert encoders['int2']('7') == b'\x00\x07'
+    assert encoders['int4'](-1) == b'\xff\xff\xff\xff'
+    assert encoders['int8'](2 ** 40) == struct.pack('!q', 2 ** 40)
+    assert encoders['float8'](1.5) == struct.pack('!d', 1.5)
+    assert encoders['bool'](False) == b'\x00'
+    assert encoders['text']('Lesneven é') == 'Lesneven é'.encode('utf-8')
+    # Dates et horodatages : jours / microsecondes depuis le 2000-01-01
+    assert encoders['date'](date(2000, 1, 2)) == struct.pack('!i', 1)
+    assert encoders['date']('1999/12/31') == struct.pack('!i', -1)
+    assert encoders['date'](datetime(2000, 1, 11, 8, 30)) == struct.pack('!i', 10)
+    assert encoders['timestamp'](datetime(2000, 1, 1, 0, 0, 1)) == struct.pack('!q', 1000000)
+    assert encoders['timestamp'](date(2000, 1, 2)) == struct.pack('!q', 86400 * 1000000)
+
+
+def test_supports_binary():
+    assert pg_copy.supports_binary(['int4', 'varchar', 'geometry'])
+    assert not pg_copy.supports_binary(['int4', 'jsonb'])
+
+
+def test_binary_chunks():
+    counter = {'rows': 0}
+    data = b''.join(pg_copy._binary_chunks([(1, None), (2, 'ab')], ['int4', 'text'], counter))
+    assert counter['rows'] == 2
+    assert data.startswith(b'PGCOPY\n\xff\r\n\x00' + b'\x00' * 8)
+    body = data[19:]
+    assert body == (struct.pack('!hi', 2, 4) + struct.pack('!i', 1) + struct.pack('!i', -1)
+                    + struct.pack('!hi', 2, 4) + struct.pack('!i', 2) + struct.pack('!i', 2) + b'ab'
+                    + struct.pack('!h', -1))
+
+
+def test_iter_stream():
+    stream = pg_copy.IterStream([b'abc', b'', b'defg'])
+    assert stream.read(2) == b'ab'
+    assert stream.read() == b'cdefg'
+    assert stream.read() == b''
@@ -0,0 +1,54 @@
+import os
+
+from conftest import import_plugin_module, write_shapefile
+
+planner = import_plugin_module("core.planner", "qgis")
+
+HISTORY = [
+    {'key': 'qgis/copy', 'bytes': 1000, 'seconds': 1},
+    {'key': 'qgis/copy', 'bytes': 3000, 'seconds': 1},
+    {'key': 'qgis/copy', 'bytes': 8000, 'seconds': 2},
+    {'key': 'qgis/ogr2ogr', 'bytes': 100, 'seconds': 1},
+    {'key': 'columnar', 'bytes': 50000, 'seconds': 5},
+]
+
+
+def test_estimated_throughput_same_pipeline():
+    assert planner.estimated_throughput('qgis', 'copy', HISTORY) == 3000
+    assert planner.estimated_throughput('qgis', 'ogr2ogr', HISTORY) == 100
+
+
+def test_estimated_throughput_columnar_ignores_loader():
+    assert planner.estimated_throughput('columnar', 'copy', HISTORY) == 10000
+    assert planner.estimated_throughput('columnar', 'ogr2ogr', HISTORY) == 10000
+
+
+def test_estimated_throughput_falls_back_to_all_imports():
+    # Médiane de 1000, 3000, 4000, 100 et 10000 octets/s
+    assert planner.estimated_throughput('qgis', 'gdal', HISTORY) == 3000
+
+
+def test_estimated_throughput_without_history():
+    assert planner.estimated_throughput('qgis', 'copy', []) is None
+    assert planner.estimated_throughput('qgis', 'copy', [{'key': 'qgis/copy', 'bytes': 10, 'seconds': 0}]) is None
+
+
+def test_layer_size(tmp_path):
+    path = write_shapefile(tmp_path, "aep_vanne", records=3)
+    expected = os.path.getsize(path) + os.path.getsize(str(tmp_path / "aep_vanne.dbf"))
+    assert planner.layer_size(path) == expected
+    assert planner.layer_size(str(tmp_path / "absente.shp")) == 0
+
+
+def test_plan_layer(tmp_path):
+    plan = planner.ImportPlanner(str(tmp_path), ['AEP_VANNE'], existing_tables=['aep_vanne'])
+    entry = plan.plan_layer(write_shapefile(tmp_path, "aep_vanne", records=4))
+    assert entry['allowed'] and entry['table_exists']
+    assert entry['features'] == 4
+    entry = plan.plan_layer(write_shapefile(tmp_path, "eu_regard"))
+    assert not entry['allowed'] and entry['table_exists'] is False
+
+
+def test_plan_layer_without_table_check(tmp_path):
+    plan = planner.ImportPlanner(str(tmp_path), ['aep_vanne'])
+    assert plan.plan_layer(write_shapefile(tmp_path, "aep_vanne"))['table_exists'] is None
@@ -0,0 +1,80 @@
+import pytest
+
+from conftest import import_plugin_module, write_shapefile
+
+shp_inspector = import_plugin_module("core.shp_inspector")
+
+
+def test_read_shp_header(tmp_path):
+    path = write_shapefile(tmp_path, "aep_canalisation", shape_type=3, records=4, bbox=(1.0, 2.0, 3.0, 4.0))
+    header = shp_inspector.read_shp_header(path)
+    assert header['shape_type_code'] == 3
+    assert header['shape_type'] == 'PolyLine'
+    assert header['bbox'] == (1.0, 2.0, 3.0, 4.0)
+    assert header['file_length'] == 100 + 28 * 4
+
+
+def test_read_shp_header_rejects_other_files(tmp_path):
+    path = tmp_path / "faux.shp"
+    path.write_bytes(b'\x00' * 100)
+    with pytest.raises(shp_inspector.ShapefileHeaderError):
+        shp_inspector.read_shp_header(str(path))
+
+
+def test_read_shx_count(tmp_path):
+    write_shapefile(tmp_path, "aep_vanne", records=7)
+    assert shp_inspector.read_shx_count(str(tmp_path / "aep_vanne.shx")) == 7
+
+
+def test_read_dbf_header(tmp_path):
+    write_shapefile(tmp_path, "eu_regard", records=3,
+                    fields=[('ID_SOURCE', 'C', 30, 0), ('Z_TN', 'N', 8, 3)])
+    dbf = shp_inspector.read_dbf_header(str(tmp_path / "eu_regard.dbf"))
+    assert dbf['records'] == 3
+    assert dbf['record_length'] == 1 + 30 + 8
+    assert dbf['fields'] == [
+        {'name': 'ID_SOURCE', 'type': 'C', 'length': 30, 'decimals': 0},
+        {'name': 'Z_TN', 'type': 'N', 'length': 8, 'decimals': 3},
+    ]
+
+
+def test_read_dbf_header_truncated(tmp_path):
+    path = tmp_path / "tronque.dbf"
+    path.write_bytes(b'\x03' * 10)
+    with pytest.raises(shp_inspector.ShapefileHeaderError):
+        shp_inspector.read_dbf_header(str(path))
+
+
+def test_inspect_shapefile(tmp_path):
+    path = write_shapefile(tmp_path, "AEP_Vanne", shape_type=1, records=5)
+    info = shp_inspector.inspect_shapefile(path)
+    assert info['errors'] == []
+    assert info['layer'] == 'aep_vanne'
+    assert info['shape_type'] == 'Point'
+    assert info['geometry_type'] == 0
+    assert info['features'] == info['shx_features'] == 5
+    assert [field['name'] for field in info['fields']] == ['ID_SOURCE', 'DIAMETRE']
+    assert info['size_bytes'] == (tmp_path / "AEP_Vanne.shp").stat().st_size + (tmp_path / "AEP_Vanne.dbf").stat().st_size
+
+
+def test_inspect_shapefile_uppercase_sidecars(tmp_path):
+    path = write_shapefile(tmp_path, "eu_regard", records=2)
+    (tmp_path / "eu_regard.dbf").rename(tmp_path / "eu_regard.DBF")
+    info = shp_inspector.inspect_shapefile(path)
+    assert info['errors'] == []
+    assert info['features'] == 2
+
+
+def test_inspect_shapefile_count_mismatch(tmp_path):
+    info = shp_inspector.inspect_shapefile(write_shapefile(tmp_path, "eu_regard", records=3, shx_records=2))
+    assert info['features'] == 3 and info['shx_features'] == 2
+    assert len(info['errors']) == 1
+
+
+def test_inspect_shapefile_missing_sidecars(tmp_path):
+    path = write_shapefile(tmp_path, "epl_grille")
+    (tmp_path / "epl_grille.shx").unlink()
+    (tmp_path / "epl_grille.dbf").unlink()
+    info = shp_inspector.inspect_shapefile(path)
+    assert info['features'] is None and info['shx_features'] is None
+    assert len(info['errors']) == 2
@@ -0,0 +1,93 @@
+import json
+import os
+import time
+
+import pytest
+
+from conftest import import_plugin_module
+
+workspace = import_plugin_module("core.workspace")
+
+
+def make_workspace(root, name: str, lock=None, age: float = 0) -> str:
+    """Espace de travail laissé par un import précédent, avec son verrou (lock : contenu JSON)."""
+    path = os.path.join(workspace.workspaces_root(str(root)), name)
+    os.makedirs(path)
+    with open(os.path.join(path, workspace.MARKER_FILE), "w", encoding="utf-8") as f:
+        f.write(name)
+    if lock is not None:
+        lock_path = path + workspace.LOCK_SUFFIX
+        with open(lock_path, "w", encoding="utf-8") as f:
+            json.dump(lock, f)
+        if age:
+            os.utime(lock_path, (time.time() - age, time.time() - age))
+    return path
+
+
+def test_acquire_and_release(tmp_path):
+    run = workspace.RunWorkspace("29019_007/AEP", str(tmp_path))
+    with run as path:
+        assert path == os.path.join(str(tmp_path), workspace.WORKSPACES_DIR, "29019_007_AEP")
+        assert workspace.is_workspace(path)
+        assert os.path.isfile(run.lock_path)
+        assert workspace.read_lock(run.lock_path)['pid'] == os.getpid()
+    assert not os.path.exists(path)
+    assert not os.path.exists(run.lock_path)
+
+
+def test_keep_workspace(tmp_path):
+    with workspace.RunWorkspace("src", str(tmp_path), keep=True) as path:
+        pass
+    assert workspace.is_workspace(path)
+
+
+def test_second_import_of_same_source_is_refused(tmp_path):
+    with workspace.RunWorkspace("src", str(tmp_path)) as path:
+        with pytest.raises(workspace.WorkspaceError):
+            workspace.RunWorkspace("src", str(tmp_path)).acquire()
+        assert workspace.is_workspace(path)
+        with workspace.RunWorkspace("autre", str(tmp_path)) as other:
+            assert other != path
+
+
+def test_unmarked_directory_is_never_removed(tmp_path):
+    root = workspace.workspaces_root(str(tmp_path))
+    user_dir = os.path.join(root, "src")
+    os.makedirs(user_dir)
+    with open(os.path.join(user_dir, "donnees.txt"), "w") as f:
+        f.write("à conserver")
+    with pytest.raises(workspace.WorkspaceError):
+        workspace.RunWorkspace("src", str(tmp_path)).acquire()
+    assert os.path.isfile(os.path.join(user_dir, "donnees.txt"))
+    assert not os.path.exists(user_dir + workspace.LOCK_SUFFIX)
+
+
+def test_scratch_root_content_is_left_alone(tmp_path):
+    (tmp_path / "autre_dossier").mkdir()
+    with workspace.RunWorkspace("src", str(tmp_path)):
+        pass
+    assert (tmp_path / "autre_dossier").is_dir()
+
+
+def test_cleanup_stale_workspaces(tmp_path):
+    root = workspace.workspaces_root(str(tmp_path))
+    unlocked = make_workspace(tmp_path, "sans_verrou")
+    old = make_workspace(tmp_path, "ancien", lock={'pid': os.getpid(), 'host': 'autre-poste'},
+                         age=workspace.LOCK_STALE_AFTER + 60)
+    running = make_workspace(tmp_path, "en_cours", lock={'pid': os.getpid(), 'host': 'autre-poste'})
+    os.makedirs(os.path.join(root, "non_marque"))
+
+    assert workspace.cleanup_stale_workspaces(root) == 2
+    assert not os.path.exists(unlocked)
+    assert not os.path.exists(old) and not os.path.exists(old + workspace.LOCK_SUFFIX)
+    assert workspace.is_workspace(running)
+    assert os.path.isdir(os.path.join(root, "non_marque"))
+
+
+def test_is_stale(tmp_path):
+    lock_path = str(tmp_path / "src.lock")
+    assert workspace.is_stale(lock_path)
+    with open(lock_path, "w", encoding="utf-8") as f:
+        json.dump({'pid': os.getpid(), 'host': 'autre-poste'}, f)
+    assert not workspace.is_stale(lock_path)
+    assert workspace.is_stale(lock_path, stale_after=-1)
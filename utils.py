@@ -5,10 +5,13 @@ import logging.handlers
 from qgis.PyQt.QtCore import QSettings
 import os
 import csv
-from qgis.core import QgsDataSourceUri
-from qgis.PyQt.QtSql import QSqlDatabase, QSqlQuery
 import shutil
 
+from .core.folder_snapshot import FolderSnapshot
+from .core.layer_registry import get_layer_registry
+from .core.metadata_cache import get_metadata_cache
+from .core.workspace import MARKER_FILE as WORKSPACE_MARKER
+
 def get_plugin_version():
     with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "metadata.txt"), "r") as f:
         for line in f:
@@ -141,21 +144,16 @@ def open_config(filename, dir=None):
         raise
     return tmp_list
 
-def check_shapefile_completeness(folder):
+def check_shapefile_completeness(folder, snapshot=None):
     logger.info(f"[utils] [check_shapefile_completeness] Checking shapefile completeness in: {folder}")
     required_exts = {'.shp', '.shx', '.dbf', '.prj'}
-    all_files = os.listdir(folder)
-    shapefile_basenames = set(os.path.splitext(f)[0] for f in all_files if f.endswith('.shp'))
+    if snapshot is None:
+        snapshot = FolderSnapshot(folder)
+    shapefile_basenames = snapshot.shapefile_basenames()
     logger.debug(f"[utils] [check_shapefile_completeness] Found {len(shapefile_basenames)} shapefile(s)")
-    missing_files_list = []
-
-    for basename in shapefile_basenames:
-        logger.debug(f"[utils] [check_shapefile_completeness] Checking shapefile: {basename}")
-        present_exts = {os.path.splitext(f)[1] for f in all_files if os.path.splitext(f)[0] == basename}
-        missing_exts = required_exts - present_exts
-        for ext in missing_exts:
-            missing_files_list.append(f"{basename}{ext}")
-            logger.warning(f"[utils] [check_shapefile_completeness] Missing extension: {ext}")
+    missing_files_list = snapshot.missing_components(required_exts)
+    for missing_file in missing_files_list:
+        logger.warning(f"[utils] [check_shapefile_completeness] Missing file: {missing_file}")
 
     if missing_files_list:
         if len(missing_files_list) == 1:
@@ -188,70 +186,107 @@ def get_suffix_after_last_underscore(filepath):
     logger.info(f"[utils] [get_suffix_after_last_underscore] Suffix after last underscore: {suffix}")
     return suffix
 
-def get_shamas(host, port, database_name, username, password):
-
-    # Define the database connection parameters
-    uri = QgsDataSourceUri()
-    uri.setConnection(host, port, database_name, username, password)
-
-    # Open a connection to the database
-    db = QSqlDatabase.addDatabase("QPSQL")  # (QPSQL for PostgreSQL)
-    db.setHostName(uri.host())
-    db.setPort(int(uri.port()))
-    db.setDatabaseName(uri.database())
-    db.setUserName(uri.username())
-    db.setPassword(uri.password())
-
-    if db.open():
+def get_shamas(host, port, database_name, username, password, refresh=False):
+    try:
+        schemas = get_metadata_cache().schemas(host, port, database_name, username, password, refresh=refresh)
         logger.info("[utils] [get_shamas] Database connection successful!")
+    except Exception as e:
+        logger.error(f"[utils] [get_shamas] Failed to connect to the database: {e}")
+        raise
+    logger.info(f"[utils] [get_shamas] Schemas : {schemas}")
+    return schemas
 
-        query = QSqlQuery(db)
-        query.exec_("SELECT schema_name FROM information_schema.schemata")
+def read_shp_types(filepath):
+    return get_layer_registry(filepath).names
 
-        schemas = []
-        while query.next():
-            schemas.append(query.value(0))
-        logger.info(f"[utils] [get_shamas] Schemas : {schemas}")
-        db.close()
-        return schemas
-    else:
-        logger.error(f"[utils] [get_shamas] Failed to connect to the database: {db.lastError().text()}")
-        db.close()
-        raise Exception(db.lastError().text())
+PREPARE_MODES = ('copy', 'link')
+# Fichiers réécrits par le marquage des attributs : toujours copiés, pour ne jamais modifier les originaux
+MATERIALIZED_EXTENSIONS = ('.dbf',)
 
-def read_shp_types(filepath):
-    with open(filepath, encoding="utf-8") as f:
-        return [line.strip() for line in f if line.strip()]
+def link_or_copy(src, dst, mode='copy'):
+    """
+    Place src en dst : lien physique en mode 'link' (aucune donnée dupliquée), copie sinon ou en cas d'échec
+    du lien (autre volume, système de fichiers sans liens physiques...). Les fichiers de MATERIALIZED_EXTENSIONS
+    sont toujours copiés. Retourne True si un lien a été créé.
+    """
+    # dst peut être un lien vers un original : il est supprimé, jamais réécrit
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if mode == 'link' and not src.lower().endswith(MATERIALIZED_EXTENSIONS):
+        try:
+            os.link(src, dst)
+            return True
+        except OSError as e:
+            logger.debug(f"[utils] [link_or_copy] Lien impossible pour {src}, copie : {e}")
+    shutil.copy2(src, dst)
+    return False
 
-def prepare_convert_folder(blank_dir, convert_dir):
+def prepare_convert_folder(blank_dir, convert_dir, mode='copy', skip=()):
     os.makedirs(convert_dir, exist_ok=True)
     for item in os.listdir(convert_dir):
-        if item.lower() != "readme.md":
+        # Le marqueur de l'espace de travail est conservé : il autorise sa suppression en fin d'import
+        if item.lower() not in ("readme.md", WORKSPACE_MARKER):
             path = os.path.join(convert_dir, item)
             if os.path.isfile(path) or os.path.islink(path):
                 os.remove(path)
             elif os.path.isdir(path):
                 shutil.rmtree(path)
     for item in os.listdir(blank_dir):
+        # Couches vides remplacées par celles de l'utilisateur : inutile de les placer
+        if os.path.splitext(item)[0].lower() in skip:
+            continue
         s = os.path.join(blank_dir, item)
         d = os.path.join(convert_dir, item)
         if os.path.isdir(s):
-            shutil.copytree(s, d, dirs_exist_ok=True)
+            shutil.copytree(s, d, dirs_exist_ok=True, copy_function=lambda src, dst: link_or_copy(src, dst, mode))
         else:
-            shutil.copy2(s, d)
+            link_or_copy(s, d, mode)
 
-def copy_actual_shp_files(src_folder, convert_dir):
-    for file in os.listdir(src_folder):
-        if file.lower().endswith(('.shp', '.shx', '.dbf', '.prj')):
-            shutil.copy2(os.path.join(src_folder, file), os.path.join(convert_dir, file))
+def copy_actual_shp_files(src_folder, convert_dir, mode='copy', snapshot=None):
+    if snapshot is None:
+        snapshot = FolderSnapshot(src_folder)
+    linked = 0
+    for info in snapshot.files_with_extensions(('.shp', '.shx', '.dbf', '.prj')):
+        linked += link_or_copy(info.path, os.path.join(convert_dir, os.path.basename(info.path)), mode)
+    return linked
 
-def main_prepare_shapefiles(user_shp_folder):
+def main_prepare_shapefiles(user_shp_folder, mode=None, convert_dir=None, snapshot=None):
+    """
+    Prépare convert_dir (SHPS/convert par défaut) : couches vides de SHPS/blank complétées par les fichiers
+    de l'utilisateur.
+    En mode 'link' (paramètre prepare_mode), seuls les .dbf, réécrits par le marquage, sont copiés ;
+    les autres fichiers sont des liens physiques vers les originaux.
+    """
+    if mode is None:
+        mode = get_param("prepare_mode") or 'copy'
+    if mode not in PREPARE_MODES:
+        logger.warning(f"[utils] [main_prepare_shapefiles] Mode de préparation inconnu : {mode}, copie utilisée")
+        mode = 'copy'
     base_dir = os.path.dirname(os.path.abspath(__file__))
     blank_dir = os.path.join(base_dir, "SHPS", "blank")
-    convert_dir = os.path.join(base_dir, "SHPS", "convert")
+    if convert_dir is None:
+        convert_dir = os.path.join(base_dir, "SHPS", "convert")
+    if snapshot is None:
+        snapshot = FolderSnapshot(user_shp_folder)
+    user_layers = set(snapshot.shapefiles())
 
     # 1. Reset convert
-    prepare_convert_folder(blank_dir, convert_dir)
+    prepare_convert_folder(blank_dir, convert_dir, mode, skip=user_layers)
     # 2. Copier les fichiers réels de l'utilisateur
-    copy_actual_shp_files(user_shp_folder, convert_dir)
+    linked = copy_actual_shp_files(user_shp_folder, convert_dir, mode, snapshot)
+    logger.info(f"[utils] [main_prepare_shapefiles] Préparation en mode {mode} : {linked} fichier(s) lié(s)")
     return convert_dir
+
+def list_source_shapefiles(user_shp_folder, snapshot=None):
+    """
+    Liste les .shp à importer sans rien copier : ceux du dossier utilisateur, complétés
+    par les couches vides de SHPS/blank qui n'y figurent pas.
+    """
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    blank_dir = os.path.join(base_dir, "SHPS", "blank")
+    if snapshot is None:
+        snapshot = FolderSnapshot(user_shp_folder)
+    shp_files = FolderSnapshot(blank_dir).shapefiles()
+    shp_files.update(snapshot.shapefiles())
+    logger.info(f"[utils] [list_source_shapefiles] {len(shp_files)} shapefile(s) à importer")
+    return sorted(shp_files.values())